@@ -1,4 +1,26 @@
 from .main import *
+import importlib
+import bamboo.main
 import bamboo.cooling
-import bamboo.plot
-import bamboo.materials
\ No newline at end of file
+import bamboo.materials
+import bamboo.atmosphere
+import bamboo.io
+import bamboo.results
+import bamboo.trajectory
+
+#Submodules that are only imported when they're first used (e.g. bamboo.plot imports matplotlib, which is slow), so 'import bamboo' stays fast.
+#'import bamboo.plot' still works as normal.
+_LAZY_SUBMODULES = ["plot", "cache", "sweep", "optimise"]
+
+def __getattr__(name):
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f"bamboo.{name}")
+
+    #Modules such as bamboo.plt, which used to be imported by 'from .main import *'
+    if name in bamboo.main._LAZY_MODULES:
+        return getattr(bamboo.main, name)
+
+    raise AttributeError(f"module 'bamboo' has no attribute '{name}'")
+
+def __dir__():
+    return sorted(list(globals()) + _LAZY_SUBMODULES + list(bamboo.main._LAZY_MODULES))
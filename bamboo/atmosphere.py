@@ -0,0 +1,147 @@
+"""International Standard Atmosphere (ISA), for trajectory simulations. The properties are tabulated once (the first time they're needed) at closely spaced altitudes,
+and then found by linear interpolation, which works on whole arrays of altitudes at once and is much faster than calculating them from scratch each time.
+
+Notes:
+    - Altitudes are geometric altitudes above sea level (m).
+    - The table covers 0 m to 81,020 m (80 km geopotential height), the same range as the 'ambiance' module. Above this, the pressure and density are taken to be zero.
+      Below 0 m, the sea level values are used.
+
+References:
+    - [1] - U.S. Standard Atmosphere 1976, https://ntrs.nasa.gov/citations/19770009539  \n
+"""
+
+import bisect
+import numpy as np
+
+G0 = 9.80665                #Standard gravitational acceleration (m/s^2)
+R_AIR = 287.05287           #Specific gas constant for air (J/kg/K)
+R_EARTH = 6356766           #Effective Earth radius used to convert between geometric and geopotential heights (m)
+
+H_MAX = 81020               #Maximum geometric altitude covered by the model (m)
+TABLE_SPACING = 10          #Altitude interval between points in the table (m). The layer boundaries are also included.
+
+#Base geopotential height (m), base temperature (K), temperature lapse rate (K/m) and base pressure (Pa) for each layer - Reference [1]
+LAYERS = np.array([[0.00e3, 288.15, -6.5e-3, 1.01325e+5],
+                   [11.0e3, 216.65,  0.0e-3, 2.26320e+4],
+                   [20.0e3, 216.65,  1.0e-3, 5.47487e+3],
+                   [32.0e3, 228.65,  2.8e-3, 8.68014e+2],
+                   [47.0e3, 270.65,  0.0e-3, 1.10906e+2],
+                   [51.0e3, 270.65, -2.8e-3, 6.69384e+1],
+                   [71.0e3, 214.65, -2.0e-3, 3.95639e+0]])
+
+_table = None       #Tabulated properties, shared by every call. Created by _get_table().
+
+def calculate(h):
+    """Calculate the atmospheric properties directly from the ISA equations, without using the table. Used to create the table.
+
+    Args:
+        h (float or array): Geometric altitude (m). Must be between 0 and H_MAX.
+
+    Returns:
+        tuple: (temperature, pressure, density), in (K, Pa, kg/m^3)
+    """
+    h = np.asarray(h, dtype = 'float')
+    H = R_EARTH*h/(R_EARTH + h)     #Geopotential height
+
+    layer = np.searchsorted(LAYERS[:, 0], H, side = "right") - 1
+    H_base, T_base, lapse_rate, p_base = LAYERS[layer].T
+
+    temperature = T_base + lapse_rate*(H - H_base)
+
+    #Avoid dividing by zero in isothermal layers - those values are replaced with the isothermal equation
+    safe_lapse_rate = np.where(lapse_rate == 0, 1.0, lapse_rate)
+    pressure = np.where(lapse_rate == 0,
+                        p_base*np.exp(-G0*(H - H_base)/(R_AIR*T_base)),
+                        p_base*(temperature/T_base)**(-G0/(R_AIR*safe_lapse_rate)))
+
+    return temperature, pressure, pressure/(R_AIR*temperature)
+
+def _get_table():
+    """Create the table of properties the first time it's needed, and return it.
+    """
+    global _table
+
+    if _table is None:
+        #Include the layer boundaries, so that no interval in the table straddles a kink in the temperature profile
+        layer_boundaries = R_EARTH*LAYERS[:, 0]/(R_EARTH - LAYERS[:, 0])
+        h = np.union1d(np.arange(0, H_MAX, TABLE_SPACING, dtype = 'float'), np.append(layer_boundaries, H_MAX))
+        temperature, pressure, density = calculate(h)
+
+        _table = {"h" : h, "T" : temperature, "p" : pressure, "rho" : density}
+
+        #Python lists are faster than arrays for looking up single values
+        _table["lists"] = {key : value.tolist() for key, value in _table.items()}
+
+    return _table
+
+def _interpolate(keys, h):
+    """Linearly interpolate properties from the table. Below 0 m the sea level values are used, and above H_MAX the pressure and density are zero.
+
+    Args:
+        keys (list): Properties to get, from "T", "p" and "rho"
+        h (float or array): Geometric altitude (m)
+
+    Returns:
+        list: The value of each property, as a float or an array (matching h)
+    """
+    table = _get_table()
+
+    #Single altitudes are done in pure Python, which avoids the overhead of creating small arrays (this is the common case in trajectory simulations)
+    if np.ndim(h) == 0:
+        h = float(h)
+        lists = table["lists"]
+        heights = lists["h"]
+
+        i = min(max(bisect.bisect_right(heights, h) - 1, 0), len(heights) - 2)
+        weight = min(max((h - heights[i])/(heights[i + 1] - heights[i]), 0.0), 1.0)
+
+        return [0.0 if (h > H_MAX and key != "T") else lists[key][i] + weight*(lists[key][i + 1] - lists[key][i]) for key in keys]
+
+    h = np.asarray(h, dtype = 'float')
+    above = h > H_MAX
+
+    return [np.interp(h, table["h"], table[key]) if key == "T" else np.where(above, 0.0, np.interp(h, table["h"], table[key])) for key in keys]
+
+def temperature(h):
+    """Atmospheric temperature. Is constant above H_MAX.
+
+    Args:
+        h (float or array): Geometric altitude (m)
+
+    Returns:
+        float or array: Temperature (K)
+    """
+    return _interpolate(["T"], h)[0]
+
+def pressure(h):
+    """Atmospheric pressure. Is zero above H_MAX.
+
+    Args:
+        h (float or array): Geometric altitude (m)
+
+    Returns:
+        float or array: Pressure (Pa)
+    """
+    return _interpolate(["p"], h)[0]
+
+def density(h):
+    """Atmospheric density. Is zero above H_MAX.
+
+    Args:
+        h (float or array): Geometric altitude (m)
+
+    Returns:
+        float or array: Density (kg/m^3)
+    """
+    return _interpolate(["rho"], h)[0]
+
+def pressure_and_density(h):
+    """Atmospheric pressure and density together, which is faster than calling pressure() and density() separately since the table is only searched once for single altitudes.
+
+    Args:
+        h (float or array): Geometric altitude (m)
+
+    Returns:
+        tuple: (pressure, density) in (Pa, kg/m^3). Both are zero above H_MAX.
+    """
+    return tuple(_interpolate(["p", "rho"], h))
@@ -0,0 +1,289 @@
+"""Module for caching heating analysis results on disk, so that repeated runs of the same analysis don't need to be recomputed.
+
+Results are stored under a hash of everything that the analysis depends on (the engine and all of its components, and the analysis settings), so a cached
+result is only reused if the inputs are identical.
+
+Example:
+    >>> cache = bamboo.cache.ResultCache()
+    >>> results = engine.steady_heating_analysis(cache = cache)     #Runs the analysis and stores the result
+    >>> results = engine.steady_heating_analysis(cache = cache)     #Loads the stored result
+"""
+
+import os
+import json
+import types
+import hashlib
+import zipfile
+import numpy as np
+
+import bamboo.io
+import bamboo.results
+
+CACHE_VERSION = 1       #Increase this if a change to bamboo alters the results of an analysis, so that old cached results are not reused
+
+#Attributes which hold caches or other state that doesn't affect the results, and so are left out of the hash
+IGNORED_ATTRIBUTES = ["_flow_states", "_exit_state", "cache", "_cache_owner", "_splines", "_warned_table_bounds", "table_error"]
+
+def fingerprint(value, _seen = None):
+    """Convert an object into a JSON serialisable form that only depends on the values it contains, for hashing. Objects are described by their class name
+    and attributes, arrays by a hash of their contents, and functions by their name, bytecode, default arguments and the values they use from enclosing scopes 
+    (e.g. the events from bamboo.cooling.wall_temperature_event()), so two lambdas with different thresholds are told apart.
+
+    Note:
+        Objects from the 'thermo' module are described by their class and identifiers (CAS numbers and mole fractions), rather than their attributes, since they
+        store the state from the last property calculation.
+
+    Args:
+        value: Object to describe
+
+    Returns:
+        JSON serialisable description of the object
+    """
+    if _seen is None:
+        _seen = set()
+
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+
+    elif isinstance(value, np.generic):
+        return fingerprint(value.item(), _seen)
+
+    elif isinstance(value, float):
+        return repr(value)      #repr() round trips exactly, and handles nan and inf
+
+    elif isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value)
+        return {"array" : [array.dtype.str, list(array.shape), hashlib.sha256(array.tobytes()).hexdigest()]}
+
+    elif isinstance(value, (list, tuple)):
+        return [fingerprint(item, _seen) for item in value]
+
+    elif isinstance(value, (set, frozenset)):
+        return sorted((fingerprint(item, _seen) for item in value), key = json.dumps)
+
+    elif isinstance(value, dict):
+        return {str(key) : fingerprint(item, _seen) for key, item in sorted(value.items(), key = lambda item : str(item[0]))}
+
+    elif isinstance(value, bytes):
+        return {"bytes" : hashlib.sha256(value).hexdigest()}
+
+    elif isinstance(value, types.CodeType):
+        #Constants include any nested functions' code objects, e.g. a lambda defined inside an event function
+        return {"code" : fingerprint(value.co_code, _seen),
+                "constants" : fingerprint(list(value.co_consts), _seen),
+                "names" : list(value.co_names)}
+
+    elif isinstance(value, (types.FunctionType, types.MethodType)):
+        function = value.__func__ if isinstance(value, types.MethodType) else value
+        closure = [cell.cell_contents for cell in function.__closure__] if function.__closure__ is not None else []
+
+        return {"function" : f"{function.__module__}.{function.__qualname__}",
+                "code" : fingerprint(function.__code__, _seen),
+                "defaults" : fingerprint(function.__defaults__, _seen),
+                "keyword_defaults" : fingerprint(function.__kwdefaults__, _seen),
+                "closure" : fingerprint(closure, _seen),
+                "attributes" : fingerprint(vars(function), _seen),
+                "self" : fingerprint(value.__self__, _seen) if isinstance(value, types.MethodType) else None}
+
+    elif type(value).__module__.split(".")[0] == "thermo":
+        identifiers = {key : getattr(value, key) for key in ["CAS", "CASs", "zs", "ws"] if hasattr(value, key)}
+        return {"class" : f"{type(value).__module__}.{type(value).__qualname__}", "identifiers" : fingerprint(identifiers, _seen)}
+
+    elif hasattr(value, "__dict__"):
+        if id(value) in _seen:
+            return {"class" : type(value).__qualname__, "reference" : True}
+
+        _seen.add(id(value))
+        attributes = {key : item for key, item in vars(value).items() if key not in IGNORED_ATTRIBUTES}
+        description = {"class" : f"{type(value).__module__}.{type(value).__qualname__}", "attributes" : fingerprint(attributes, _seen)}
+        _seen.discard(id(value))
+
+        return description
+
+    else:
+        return repr(value)
+
+class ResultCache:
+    """Cache of heating analysis results, stored as .npz files in a directory on disk (using bamboo.io.save_results()). Pass it to Engine.steady_heating_analysis()
+    or Engine.transient_heating_analysis() with the 'cache' argument. When the total size of the stored results exceeds 'max_size', the least recently used results
+    are deleted. The directory can be shared between processes (e.g. by bamboo.sweep), since each result is written to a temporary file and then renamed.
+
+    Note:
+        The hash covers the engine and its components, the transport property models and the analysis settings, but not the source code of bamboo. If you change
+        bamboo in a way that affects results, call clear() or increase bamboo.cache.CACHE_VERSION.
+
+    Args:
+        directory (str, optional): Directory to store results in. Is created if it doesn't exist. Defaults to None (uses '.cache/bamboo' in the user's home directory).
+        max_size (float, optional): Maximum total size of the stored results (bytes). Defaults to 1e9.
+        bypass (bool, optional): If True, the cache is ignored - analyses are always run, and their results are not stored. Defaults to False.
+
+    Attributes:
+        hits (int): Number of analyses that were loaded from the cache.
+        misses (int): Number of analyses that had to be run.
+    """
+    def __init__(self, directory = None, max_size = 1e9, bypass = False):
+        if max_size <= 0:
+            raise ValueError("ResultCache max_size must be greater than zero")
+
+        if directory is None:
+            directory = os.path.join(os.path.expanduser("~"), ".cache", "bamboo")
+
+        os.makedirs(directory, exist_ok = True)
+
+        self.directory = directory
+        self.max_size = max_size
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries())
+
+    def __repr__(self):
+        return f"ResultCache('{self.directory}', size = {self.size()/1e6:.1f}/{self.max_size/1e6:.1f} MB, hits = {self.hits}, misses = {self.misses})"
+
+    def key(self, engine, analysis, **settings):
+        """Get the hash that identifies an analysis.
+
+        Args:
+            engine (Engine): Engine being analysed
+            analysis (str): Name of the analysis, e.g. 'steady_heating_analysis'
+            **settings: Settings for the analysis, e.g. h_gas_model = "1". These can include EngineMesh objects and event functions.
+
+        Returns:
+            str: Hexadecimal SHA-256 hash
+        """
+        description = {"version" : CACHE_VERSION,
+                       "analysis" : analysis,
+                       "engine" : fingerprint(engine),
+                       "settings" : fingerprint(settings)}
+
+        return hashlib.sha256(json.dumps(description, sort_keys = True).encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        """Get the file path that a result is stored at.
+
+        Args:
+            key (str): Key from ResultCache.key()
+
+        Returns:
+            str: Path to the .npz file
+        """
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key):
+        """Load a stored result, marking it as recently used.
+
+        Args:
+            key (str): Key from ResultCache.key()
+
+        Returns:
+            HeatingResult or None: The stored result, or None if it isn't in the cache.
+        """
+        path = self.path(key)
+
+        try:
+            stored = bamboo.io.load_results(path, mmap = False)
+            header = stored.pop("metadata")
+            result = bamboo.results.HeatingResult(x = stored["x"],
+                                                  t = stored.get("t"),
+                                                  fields = {field : stored[field] for field in header["fields"]},
+                                                  extras = header["extras"],
+                                                  metadata = header["metadata"])
+            os.utime(path)      #The modification time is used to track when a result was last used
+
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        except (zipfile.BadZipFile, OSError, EOFError, ValueError, KeyError) as error:
+            #Truncated or corrupt file (e.g. from a process that was killed) - delete it so it can be stored again
+            print(f"WARNING: Deleting unreadable cached result {path} ({type(error).__name__}: {error})")
+            self.misses += 1
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+            return None
+
+        self.hits += 1
+
+        return result
+
+    def put(self, key, result):
+        """Store a result, then delete the least recently used results if the cache is too large.
+
+        Args:
+            key (str): Key from ResultCache.key()
+            result (HeatingResult): Result to store
+        """
+        arrays = {"x" : result.x}
+
+        if result.t is not None:
+            arrays["t"] = result.t
+
+        arrays.update(result.fields)
+
+        header = {"fields" : list(result.fields),
+                  "extras" : bamboo.io._to_json_type(result.extras),
+                  "metadata" : result.metadata}
+
+        #Write to a temporary file first, so other processes never see a partially written result
+        temporary_path = os.path.join(self.directory, f"{key}.{os.getpid()}.tmp.npz")
+        bamboo.io.save_results(temporary_path, arrays, metadata = header)
+        os.replace(temporary_path, self.path(key))
+
+        self.evict()
+
+    def size(self):
+        """Get the total size of the stored results.
+
+        Returns:
+            int: Size (bytes)
+        """
+        return sum(stat.st_size for path, stat in self._stats())
+
+    def evict(self):
+        """Delete the least recently used results until the total size is no more than max_size.
+        """
+        entries = sorted(self._stats(), key = lambda item : item[1].st_mtime)
+        total_size = sum(stat.st_size for path, stat in entries)
+
+        while total_size > self.max_size and len(entries) > 0:
+            path, stat = entries.pop(0)
+            total_size -= stat.st_size
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass    #Already deleted by another process
+
+    def clear(self):
+        """Delete all of the stored results and reset the hit and miss counters.
+        """
+        for entry in self._entries():
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+        self.hits = 0
+        self.misses = 0
+
+    def _entries(self):
+        return [entry for entry in os.scandir(self.directory) if entry.name.endswith(".npz") and not entry.name.endswith(".tmp.npz")]
+
+    def _stats(self):
+        """Get the path and os.stat() result of each stored result, skipping any that are deleted by another process while the directory is being read.
+        """
+        stats = []
+
+        for entry in self._entries():
+            try:
+                stats.append((entry.path, entry.stat()))
+            except FileNotFoundError:
+                pass
+
+        return stats
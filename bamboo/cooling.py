@@ -20,19 +20,21 @@ References:
 
 import bamboo as bam
 import numpy as np
-import matplotlib.pyplot as plt
-import scipy
+import collections
+import uuid
+import importlib.util
+import bamboo.io
 
 
-#Check if CoolProp is installed
-import imp
-try:
-    imp.find_module('CoolProp')
-    CoolProp_available = True
-    from CoolProp.CoolProp import PropsSI
+#Check if CoolProp is installed, without importing it (which is slow) until it's first used
+CoolProp_available = importlib.util.find_spec("CoolProp") is not None
 
-except ImportError:
-    CoolProp_available = False
+def PropsSI(*args):
+    """Imports CoolProp.CoolProp.PropsSI() the first time it's called, and replaces this function with it.
+    """
+    global PropsSI
+    from CoolProp.CoolProp import PropsSI
+    return PropsSI(*args)
 
 SIGMA = 5.670374419e-8      #Stefan-Boltzmann constant (W/m^2/K^4)
 
@@ -178,6 +180,67 @@ def h_coolant_3(rho, V, D, mu, Pr, k):
 
     return Nu*k/D
 
+def friction_factor(Re):
+    """Friction factor for turbulent flow in a smooth pipe. Formula from Reference [5] page 29.
+
+    Args:
+        Re (float or array): Reynolds number
+
+    Returns:
+        float or array: Dimensionless friction factor
+    """
+    return ((0.79*np.log(Re)) - 1.64)**(-2)
+
+def steady_state_event(dT_dt_tolerance = 0.1):
+    """Event for Engine.transient_heating_analysis(), that stops the simulation once the wall has (nearly) stopped heating up.
+
+    Args:
+        dT_dt_tolerance (float, optional): The simulation stops when the maximum rate of change of wall temperature drops below this value (K/s). Defaults to 0.1.
+
+    Returns:
+        callable: Event function
+    """
+    def event(t, state):
+        return np.amax(np.abs(state["dT_dt"])) - dT_dt_tolerance
+
+    event.terminal = True
+    event.direction = -1
+    return event
+
+def wall_temperature_event(T_limit, terminal = True):
+    """Event for Engine.transient_heating_analysis(), that triggers when the wall temperature first exceeds a limit (e.g. the maximum service temperature of the material).
+
+    Args:
+        T_limit (float): Wall temperature limit (K)
+        terminal (bool, optional): Whether to stop the simulation when the event occurs. Defaults to True.
+
+    Returns:
+        callable: Event function
+    """
+    def event(t, state):
+        return np.amax(state["T_wall"]) - T_limit
+
+    event.terminal = terminal
+    event.direction = 1
+    return event
+
+def time_event(t_event, terminal = True):
+    """Event for Engine.transient_heating_analysis(), that triggers at a given time (e.g. burnout).
+
+    Args:
+        t_event (float): Time of the event (s)
+        terminal (bool, optional): Whether to stop the simulation when the event occurs. Defaults to True.
+
+    Returns:
+        callable: Event function
+    """
+    def event(t, state):
+        return t - t_event
+
+    event.terminal = terminal
+    event.direction = 1
+    return event
+
 
 class Material:
     """Class used to specify a material and its properties. 
@@ -278,6 +341,110 @@ Thermal conductivity = {self.k} W/m/K
         return np.sum([self.polyCoeffs[index] * T**index for index in range(self.polyOrder)])
 
 
+class PropertyCache:
+    """Least-recently-used cache for fluid property lookups, for use with TransportProperties. Temperatures and pressures are rounded to the nearest
+    multiple of the tolerances, and the properties are evaluated at the rounded values, so states that nearly repeat share one flash calculation.
+
+    Note:
+        With non-zero tolerances the cached properties are evaluated at the rounded state rather than the requested one. Use tolerances that are small compared 
+        to the scale over which the properties vary (the defaults of zero only match exactly repeated states).
+
+    Args:
+        max_size (int, optional): Maximum number of states to store. The least recently used state is discarded when the cache is full. Defaults to 4096.
+        T_tolerance (float, optional): Temperature quantisation step (K). Defaults to 0 (exact matches only).
+        p_tolerance (float, optional): Pressure quantisation step (Pa). Defaults to 0 (exact matches only).
+
+    Attributes:
+        hits (int): Number of lookups that were found in the cache.
+        misses (int): Number of lookups that needed a new property evaluation.
+    """
+    def __init__(self, max_size = 4096, T_tolerance = 0.0, p_tolerance = 0.0):
+        if max_size < 1:
+            raise ValueError("PropertyCache max_size must be at least 1")
+
+        if T_tolerance < 0 or p_tolerance < 0:
+            raise ValueError("PropertyCache tolerances cannot be negative")
+
+        self.max_size = max_size
+        self.T_tolerance = T_tolerance
+        self.p_tolerance = p_tolerance
+        self.hits = 0
+        self.misses = 0
+        self._states = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._states)
+
+    def __repr__(self):
+        return f"PropertyCache(size = {len(self)}/{self.max_size}, hits = {self.hits}, misses = {self.misses})"
+
+    def quantise(self, T, p, owner = None):
+        """Round a state to the cache's grid.
+
+        Args:
+            T (float): Temperature (K)
+            p (float): Pressure (Pa)
+            owner (hashable, optional): Identifies the fluid the state belongs to, so objects sharing the cache never get each other's properties. Defaults to None.
+
+        Returns:
+            tuple: (key, T_rounded, p_rounded), where key is hashable and identifies the rounded state of the owner's fluid.
+        """
+        T, p = float(T), float(p)
+
+        if self.T_tolerance > 0:
+            T_index = round(T/self.T_tolerance)
+            T = T_index*self.T_tolerance
+        else:
+            T_index = T
+
+        if self.p_tolerance > 0:
+            p_index = round(p/self.p_tolerance)
+            p = p_index*self.p_tolerance
+        else:
+            p_index = p
+
+        return (owner, T_index, p_index), T, p
+
+    def get(self, key):
+        """Get a cached state, marking it as recently used.
+
+        Args:
+            key (tuple): Key from PropertyCache.quantise()
+
+        Returns:
+            dict or None: The cached properties, or None if the state is not in the cache.
+        """
+        try:
+            value = self._states[key]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self._states.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store a state, discarding the least recently used one if the cache is full.
+
+        Args:
+            key (tuple): Key from PropertyCache.quantise()
+            value (dict): Properties to store
+        """
+        self._states[key] = value
+        self._states.move_to_end(key)
+
+        if len(self._states) > self.max_size:
+            self._states.popitem(last = False)
+
+    def clear(self):
+        """Empty the cache and reset the hit and miss counters.
+        """
+        self._states.clear()
+        self.hits = 0
+        self.misses = 0
+
+
 class TransportProperties:
     """Container for transport properties of a fluid. 
     
@@ -286,8 +453,11 @@ class TransportProperties:
         If you are getting questionable data, it may be useful to try out the 'force_phase' argument.
 
     Args:
-        model (str, optional): The module to use for modelling. Options include 'thermo' and 'CoolProp' and 'custom'.
+        model (str, optional): The module to use for modelling. Options include 'thermo', 'CoolProp', 'custom' and 'table'.
         force_phase (str, optional): 'l' for liquid or 'g' for gas. Forces thermo to use transport properties in the given phase. Does not affect other models. Defaults to None.
+        cache (PropertyCache or bool, optional): Cache to store previously calculated states in. Can be shared between TransportProperties objects (e.g. to limit their total 
+                                                 memory use), but each object's states are stored separately, so they never get each other's properties. Copies of an object 
+                                                 made with copy.deepcopy() or pickle count as the same object. True creates a PropertyCache with the default settings. Defaults to None (no caching).
     
     Keywords Args:
         thermo_object (thermo.chemical.Chemical or thermo.mixture.Mixture): An object from the 'thermo' Python module.
@@ -295,12 +465,34 @@ class TransportProperties:
         custom_Pr (float): Prandtl number to use for model = 'custom'
         custom_mu (float): Absolute viscosity to use for model = 'custom' (Pa s)
         custom_k (float): Thermal conductivity to use for model = 'custom' (W/m/K)
+        source (TransportProperties): For model = 'table', the model to sample the table from.
+        T_range (tuple or array): For model = 'table', either (T_min, T_max) or an array of the temperatures to sample at (K).
+        p_range (tuple or array): For model = 'table', either (p_min, p_max) or an array of the pressures to sample at (Pa). Tuples give logarithmically spaced pressures.
+        T_points (int): For model = 'table', the number of temperatures to sample at if T_range is a tuple. Defaults to 100.
+        p_points (int): For model = 'table', the number of pressures to sample at if p_range is a tuple. Defaults to 50.
+        interpolation (str): For model = 'table', 'linear' for bilinear or 'cubic' for bicubic interpolation. Cubic splines overshoot badly next to phase changes, so only use 'cubic' for single phase tables. Defaults to 'linear'.
+        check_error (bool): For model = 'table', whether to estimate the interpolation error by comparing against the source at the centre of each cell. Cells that span a phase change are ignored. Defaults to True.
+        file (str): For model = 'table', a .npz file saved with TransportProperties.save_table() to load the table from, instead of sampling a source.
+        mmap (bool): For model = 'table' with a file, whether to memory-map the table instead of reading it into memory. Defaults to True.
+
+    Attributes:
+        table_error (dict): For model = 'table', the maximum relative interpolation error for each property found with check_error = True. Is None if the error wasn't checked.
     """
 
-    def __init__(self, model = "thermo", force_phase = None, **kwargs):
+    def __init__(self, model = "thermo", force_phase = None, cache = None, **kwargs):
         self.model = model
         self.force_phase = force_phase
 
+        #Identifies this object's states in the cache. Kept by copies, which model the same fluid.
+        self._cache_owner = uuid.uuid4().hex
+
+        if cache is True:
+            self.cache = PropertyCache()
+        elif cache is False:
+            self.cache = None
+        else:
+            self.cache = cache
+
         if model == "thermo":
             self.thermo_object = kwargs["thermo_object"]
 
@@ -315,9 +507,30 @@ class TransportProperties:
             self.custom_mu = kwargs["custom_mu"]
             self.custom_k = kwargs["custom_k"]
 
+        elif model == "table":
+            self.interpolation = kwargs.get("interpolation", "linear")
+
+            if self.interpolation not in ["linear", "cubic"]:
+                raise ValueError(f"The interpolation {self.interpolation} is not a valid option. Try 'linear' or 'cubic'.")
+
+            self._splines = {}
+            self._warned_table_bounds = False
+
+            if "file" in kwargs:
+                self._load_table(kwargs["file"], mmap = kwargs.get("mmap", True))
+            else:
+                self._build_table(source = kwargs["source"], 
+                                  T_range = kwargs["T_range"], 
+                                  p_range = kwargs["p_range"], 
+                                  T_points = kwargs.get("T_points", 100), 
+                                  p_points = kwargs.get("p_points", 50), 
+                                  check_error = kwargs.get("check_error", True))
+
         else:
             raise ValueError(f"The model {model} is not a valid option.")
 
+    PROPERTIES = ["k", "mu", "Pr", "cp", "rho", "liquid"]     #Keys of the dictionaries returned by TransportProperties.state()
+
     def check_liquid(self, T, p):
         """Returns True if the fluid is a liquid at the given temperature and pressure. Used to check for coolant boil-off.
 
@@ -328,12 +541,15 @@ class TransportProperties:
         Returns:
             bool: True if the fluid is liquid, False if it's any other phase
         """
+        if self.cache is not None:
+            return self.state(T = T, p = p)["liquid"]
+
+        if self.model == "table":
+            return bool(self._interpolate("liquid", T, p) >= 0.5)
+
         if self.model == "thermo":
             self.thermo_object.calculate(T = T, P = p) 
-            if self.thermo_object.phase == 'l':
-                return True
-            else:
-                return False
+            return self._thermo_liquid()
             
         elif self.model == "CoolProp":
             #CoolProp uses a phase index of '0' to refer to the liquid state
@@ -341,7 +557,6 @@ class TransportProperties:
                 return True
             else:
                 return False
-        
 
     def k(self, T, p):
         """Thermal conductivity
@@ -353,15 +568,15 @@ class TransportProperties:
         Returns:
             float: Thermal conductivity
         """
+        if self.cache is not None:
+            return self.state(T = T, p = p)["k"]
+
+        if self.model == "table":
+            return self._interpolate("k", T, p)
+
         if self.model == "thermo":
             self.thermo_object.calculate(T = T, P = p)
-
-            if self.force_phase == 'l':
-                return self.thermo_object.kl
-            elif self.force_phase == 'g':
-                return self.thermo_object.kg
-            else:
-                return self.thermo_object.k
+            return self._thermo_k()
             
         elif self.model == "CoolProp":
             return PropsSI("CONDUCTIVITY", "T", T, "P", p, self.coolprop_name)
@@ -379,27 +594,22 @@ class TransportProperties:
         Returns:
             float: Absolute viscosity
         """
+        if self.cache is not None:
+            return self.state(T = T, p = p)["mu"]
+
+        if self.model == "table":
+            return self._interpolate("mu", T, p)
+
         if self.model == "thermo":
             self.thermo_object.calculate(T = T, P = p) 
-
-            if self.force_phase == 'l':
-                return self.thermo_object.mul
-            elif self.force_phase == 'g':
-                return self.thermo_object.mug
-            else:
-                #Manually check which phase we're in, and return the right viscosity (otherwise sometimes it seems to return odd results)
-                if self.thermo_object.phase == 'g':
-                    return self.thermo_object.mug
-                elif self.thermo_object.phase == 'l':
-                    return self.thermo_object.mul
-                else:
-                    return self.thermo_object.mu
+            return self._thermo_mu()
 
         elif self.model == "CoolProp":
             return PropsSI("VISCOSITY", "T", T, "P", p, self.coolprop_name)
 
         elif self.model == "custom":
             return self.custom_mu
+
     def Pr(self, T, p):
         """Prandtl number
 
@@ -410,15 +620,15 @@ class TransportProperties:
         Returns:
             float: Prandtl number
         """
+        if self.cache is not None:
+            return self.state(T = T, p = p)["Pr"]
+
+        if self.model == "table":
+            return self._interpolate("Pr", T, p)
+
         if self.model == "thermo":
             self.thermo_object.calculate(T = T, P = p) 
-
-            if self.force_phase == 'l':
-                return self.thermo_object.Prl
-            elif self.force_phase == 'g':
-                return self.thermo_object.Prg
-            else:
-                return self.thermo_object.Pr
+            return self._thermo_Pr()
 
         elif self.model == "CoolProp":
             return PropsSI("PRANDTL", "T", T, "P", p, self.coolprop_name)
@@ -437,15 +647,15 @@ class TransportProperties:
             float: Specific heat capacity at constant pressure (J/kg/K)
 
         """
+        if self.cache is not None:
+            return self.state(T = T, p = p)["cp"]
+
+        if self.model == "table":
+            return self._interpolate("cp", T, p)
+
         if self.model == "thermo":
             self.thermo_object.calculate(T = T, P = p) 
-
-            if self.force_phase == 'l':
-                return self.thermo_object.Cpl
-            elif self.force_phase == 'g':
-                return self.thermo_object.Cpg
-            else:
-                return self.thermo_object.Cp
+            return self._thermo_cp()
         
         elif self.model == "CoolProp":
             return PropsSI("CPMASS", "T", T, "P", p, self.coolprop_name)
@@ -461,19 +671,306 @@ class TransportProperties:
             float: Density (kg/m3)
 
         """
+        if self.cache is not None:
+            return self.state(T = T, p = p)["rho"]
+
+        if self.model == "table":
+            return self._interpolate("rho", T, p)
+
         if self.model == "thermo":
             self.thermo_object.calculate(T = T, P = p) 
-
-            if self.force_phase == 'l':
-                return self.thermo_object.rhol
-            elif self.force_phase == 'g':
-                return self.thermo_object.rhog
-            else:
-                return self.thermo_object.rho
+            return self._thermo_rho()
         
         elif self.model == "CoolProp":
             return PropsSI("DMASS", "T", T, "P", p, self.coolprop_name)
 
+    def state(self, T, p):
+        """Get all of the properties at once. This is much faster than calling k(), mu(), Pr(), cp(), rho() and check_liquid() separately, 
+        since the 'thermo' model only needs to do one flash calculation.
+
+        Args:
+            T (float): Temperature (K)
+            p (float): Pressure (Pa)
+
+        Returns:
+            dict: Dictionary with the keys 'k', 'mu', 'Pr', 'cp', 'rho' and 'liquid', containing the same values that the methods of the same name return.
+        """
+        if self.cache is not None:
+            key, T_rounded, p_rounded = self.cache.quantise(T, p, owner = self._cache_owner)
+            values = self.cache.get(key)
+
+            if values is None:
+                values = self._state(T = T_rounded, p = p_rounded)
+                self.cache.put(key, values)
+
+            return dict(values)
+
+        return self._state(T = T, p = p)
+
+    def _state(self, T, p):
+        if self.model == "thermo":
+            self.thermo_object.calculate(T = T, P = p)
+            return {"k" : self._thermo_k(),
+                    "mu" : self._thermo_mu(),
+                    "Pr" : self._thermo_Pr(),
+                    "cp" : self._thermo_cp(),
+                    "rho" : self._thermo_rho(),
+                    "liquid" : self._thermo_liquid()}
+
+        elif self.model == "CoolProp":
+            return {key : value[0] for key, value in self.states([T], [p]).items()}
+
+        elif self.model == "table":
+            values = {key : self._interpolate(key, T, p) for key in self.PROPERTIES[:-1]}
+            values["liquid"] = bool(self._interpolate("liquid", T, p) >= 0.5)
+
+            return values
+
+        elif self.model == "custom":
+            return {"k" : self.custom_k,
+                    "mu" : self.custom_mu,
+                    "Pr" : self.custom_Pr,
+                    "cp" : None,
+                    "rho" : None,
+                    "liquid" : None}
+
+    def states(self, T, p):
+        """Vectorised version of TransportProperties.state(), for getting all of the properties at arrays of temperatures and pressures. T and p are broadcast against each other.
+
+        Args:
+            T (array): Temperatures (K)
+            p (array): Pressures (Pa)
+
+        Returns:
+            dict: Dictionary with the keys 'k', 'mu', 'Pr', 'cp', 'rho' and 'liquid', each containing an array of values.
+
+        Note:
+            With the 'CoolProp' model the whole array is passed to CoolProp in one go, and the cache is not used.
+        """
+        T, p = np.broadcast_arrays(np.asarray(T, dtype = 'float'), np.asarray(p, dtype = 'float'))
+
+        if self.model == "CoolProp":
+            #PropsSI can take whole arrays of inputs
+            T_flat, p_flat = T.ravel(), p.ravel()
+            values = {"k" : PropsSI("CONDUCTIVITY", "T", T_flat, "P", p_flat, self.coolprop_name),
+                      "mu" : PropsSI("VISCOSITY", "T", T_flat, "P", p_flat, self.coolprop_name),
+                      "Pr" : PropsSI("PRANDTL", "T", T_flat, "P", p_flat, self.coolprop_name),
+                      "cp" : PropsSI("CPMASS", "T", T_flat, "P", p_flat, self.coolprop_name),
+                      "rho" : PropsSI("DMASS", "T", T_flat, "P", p_flat, self.coolprop_name),
+                      "liquid" : PropsSI("PHASE", "T", T_flat, "P", p_flat, self.coolprop_name) == 0}   #CoolProp uses a phase index of '0' to refer to the liquid state
+
+            return {key : np.asarray(value).reshape(T.shape) for key, value in values.items()}
+
+        elif self.model == "table":
+            weights = self._table_weights(T, p)
+            results = {key : self._interpolate(key, T, p, weights = weights) for key in self.PROPERTIES}
+            results["liquid"] = results["liquid"] >= 0.5
+
+            return results
+
+        elif self.model == "custom":
+            return {key : np.full(T.shape, value, dtype = 'float' if key != "liquid" else 'object') for key, value in self._state(None, None).items()}
+
+        else:
+            #Need to do one flash calculation at a time
+            results = {key : np.empty(T.shape, dtype = 'float') for key in self.PROPERTIES}
+            results["liquid"] = np.empty(T.shape, dtype = 'bool')
+
+            for index in np.ndindex(T.shape):
+                for key, value in self.state(T = T[index], p = p[index]).items():
+                    results[key][index] = value
+
+            return results
+
+    def clear_cache(self):
+        """Empty the property cache, if there is one. Needed if the underlying model is changed (e.g. the composition of a thermo Mixture).
+        """
+        if self.cache is not None:
+            self.cache.clear()
+
+    def save_table(self, path):
+        """Save the property table to an .npz file, which can be loaded with TransportProperties(model = 'table', file = path). Only works for model = 'table'.
+
+        Args:
+            path (str): File path to save to. Should end in '.npz'.
+        """
+        if self.model != "table":
+            raise AttributeError(f"Can only save property tables for model = 'table', not model = '{self.model}'")
+
+        arrays = {"T" : self.table_T, "p" : self.table_p}
+        arrays.update({key : self.table[key] for key in self.PROPERTIES})
+
+        if self.table_error is not None:
+            arrays["error"] = np.array([self.table_error[key] for key in self.PROPERTIES[:-1]])
+
+        bamboo.io.save_npz(path, **arrays)
+
+    def _build_table(self, source, T_range, p_range, T_points, p_points, check_error):
+        if len(T_range) == 2:
+            self.table_T = np.linspace(T_range[0], T_range[1], T_points)
+        else:
+            self.table_T = np.array(T_range, dtype = 'float')
+
+        if len(p_range) == 2:
+            self.table_p = np.geomspace(p_range[0], p_range[1], p_points)
+        else:
+            self.table_p = np.array(p_range, dtype = 'float')
+
+        if np.any(np.diff(self.table_T) <= 0) or np.any(np.diff(self.table_p) <= 0) or self.table_p[0] <= 0:
+            raise ValueError("Table temperatures and pressures must be strictly increasing, and pressures must be positive")
+
+        if len(self.table_T) < 2 or len(self.table_p) < 2:
+            raise ValueError("Tables need at least two temperatures and two pressures")
+
+        values = source.states(self.table_T[:, np.newaxis], self.table_p[np.newaxis, :])
+        self.table = {key : np.asarray(values[key]).astype('float') for key in self.PROPERTIES}
+
+        if check_error:
+            #Compare against the source in the middle of every cell, which is where the interpolation is least accurate
+            T_centres = (self.table_T[1:] + self.table_T[:-1])/2
+            p_centres = np.sqrt(self.table_p[1:] * self.table_p[:-1])
+            exact = source.states(T_centres[:, np.newaxis], p_centres[np.newaxis, :])
+            interpolated = self.states(T_centres[:, np.newaxis], p_centres[np.newaxis, :])
+
+            #Properties jump at phase changes, which no interpolation can capture - so ignore cells where the corners aren't all in the same phase
+            liquid = self.table["liquid"]
+            same_phase = (liquid[1:, 1:] == liquid[:-1, 1:]) & (liquid[1:, 1:] == liquid[1:, :-1]) & (liquid[1:, 1:] == liquid[:-1, :-1])
+
+            self.table_error = {}
+
+            for key in self.PROPERTIES[:-1]:
+                exact_values = np.asarray(exact[key]).astype('float')
+
+                with np.errstate(divide = 'ignore', invalid = 'ignore'):
+                    error = np.abs(interpolated[key] - exact_values) / np.abs(exact_values)
+
+                error[~same_phase] = np.nan
+
+                self.table_error[key] = float(np.nanmax(error)) if np.any(np.isfinite(error)) else np.nan
+
+        else:
+            self.table_error = None
+
+    def _load_table(self, path, mmap):
+        arrays = bamboo.io.load_npz(path, mmap = mmap)
+
+        self.table_T = arrays["T"]
+        self.table_p = arrays["p"]
+        self.table = {key : arrays[key] for key in self.PROPERTIES}
+
+        if "error" in arrays:
+            self.table_error = {key : float(value) for key, value in zip(self.PROPERTIES[:-1], arrays["error"])}
+        else:
+            self.table_error = None
+
+    def _table_weights(self, T, p):
+        """Find where a set of states lies in the table. Inputs outside of the table are clipped to its edges.
+
+        Returns:
+            tuple: (T, log(p), i, j, wT, wp) - the clipped inputs, the indices of the cells they lie in, and the fractional position within each cell.
+        """
+        T = np.asarray(T, dtype = 'float')
+        p = np.asarray(p, dtype = 'float')
+
+        T_clipped = np.clip(T, self.table_T[0], self.table_T[-1])
+        p_clipped = np.clip(p, self.table_p[0], self.table_p[-1])
+
+        if not self._warned_table_bounds and (np.any(T_clipped != T) or np.any(p_clipped != p)):
+            print("Accuracy warning: Temperature or pressure outside of the property table at least once, continuing with the nearest values in the table.")
+            self._warned_table_bounds = True 
+            # Set this flag true so the output isn't spammed
+
+        log_p = np.log(p_clipped)
+        log_table_p = np.log(self.table_p)
+
+        i = np.clip(np.searchsorted(self.table_T, T_clipped, side = 'right') - 1, 0, len(self.table_T) - 2)
+        j = np.clip(np.searchsorted(log_table_p, log_p, side = 'right') - 1, 0, len(self.table_p) - 2)
+
+        wT = (T_clipped - self.table_T[i]) / (self.table_T[i + 1] - self.table_T[i])
+        wp = (log_p - log_table_p[j]) / (log_table_p[j + 1] - log_table_p[j])
+
+        return T_clipped, log_p, i, j, wT, wp
+
+    def _interpolate(self, key, T, p, weights = None):
+        """Interpolate a property from the table, in temperature and log(pressure). 'weights' can be passed from _table_weights() to avoid recalculating them for every property.
+        """
+        if weights is None:
+            weights = self._table_weights(T, p)
+
+        T_clipped, log_p, i, j, wT, wp = weights
+
+        if self.interpolation == "cubic":
+            if key not in self._splines:
+                import scipy.interpolate
+                self._splines[key] = scipy.interpolate.RectBivariateSpline(self.table_T, np.log(self.table_p), self.table[key], kx = 3, ky = 3)
+
+            value = self._splines[key].ev(T_clipped, log_p)
+
+        else:
+            table = self.table[key]
+            value = ((1 - wT) * (1 - wp) * table[i, j] 
+                     + wT * (1 - wp) * table[i + 1, j] 
+                     + (1 - wT) * wp * table[i, j + 1] 
+                     + wT * wp * table[i + 1, j + 1])
+
+        if np.ndim(value) == 0:
+            return float(value)
+        else:
+            return value
+
+    #Property getters for the 'thermo' model, which assume that thermo_object.calculate() has already been run.
+    def _thermo_liquid(self):
+        if self.thermo_object.phase == 'l':
+            return True
+        else:
+            return False
+
+    def _thermo_k(self):
+        if self.force_phase == 'l':
+            return self.thermo_object.kl
+        elif self.force_phase == 'g':
+            return self.thermo_object.kg
+        else:
+            return self.thermo_object.k
+
+    def _thermo_mu(self):
+        if self.force_phase == 'l':
+            return self.thermo_object.mul
+        elif self.force_phase == 'g':
+            return self.thermo_object.mug
+        else:
+            #Manually check which phase we're in, and return the right viscosity (otherwise sometimes it seems to return odd results)
+            if self.thermo_object.phase == 'g':
+                return self.thermo_object.mug
+            elif self.thermo_object.phase == 'l':
+                return self.thermo_object.mul
+            else:
+                return self.thermo_object.mu
+
+    def _thermo_Pr(self):
+        if self.force_phase == 'l':
+            return self.thermo_object.Prl
+        elif self.force_phase == 'g':
+            return self.thermo_object.Prg
+        else:
+            return self.thermo_object.Pr
+
+    def _thermo_cp(self):
+        if self.force_phase == 'l':
+            return self.thermo_object.Cpl
+        elif self.force_phase == 'g':
+            return self.thermo_object.Cpg
+        else:
+            return self.thermo_object.Cp
+
+    def _thermo_rho(self):
+        if self.force_phase == 'l':
+            return self.thermo_object.rhol
+        elif self.force_phase == 'g':
+            return self.thermo_object.rhog
+        else:
+            return self.thermo_object.rho
+
 
 class CoolingJacket:
     """Container for cooling jacket information - e.g. for regenerative cooling.
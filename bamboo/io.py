@@ -0,0 +1,301 @@
+"""Module for saving and loading bamboo data to and from disk.
+"""
+
+import os
+import json
+import zipfile
+import numpy as np
+
+RESULTS_VERSION = 1     #Version number of the format written by save_results()
+
+def save_npz(path, **arrays):
+    """Save arrays to an uncompressed .npz file. Uncompressed files can be memory-mapped by load_npz().
+
+    Args:
+        path (str): File path to save to
+        **arrays: Arrays to save, with their keyword used as the name in the file.
+    """
+    np.savez(path, **arrays)
+
+def load_npz(path, mmap = True):
+    """Load all of the arrays from a .npz file.
+
+    Note:
+        numpy.load() ignores 'mmap_mode' for .npz files, so the arrays are memory-mapped here by finding their offsets within the zip archive directly.
+        This only works for uncompressed archives (as written by save_npz() or numpy.savez()) - compressed members are read into memory as normal.
+
+    Args:
+        path (str): Path to the .npz file
+        mmap (bool, optional): Whether to memory-map the arrays (read-only) instead of reading them into memory. Defaults to True.
+
+    Returns:
+        dict: Dictionary of arrays, with the '.npy' extension removed from their names.
+    """
+    arrays = {}
+
+    if not mmap:
+        with np.load(path, allow_pickle = False) as data:
+            for key in data.files:
+                arrays[key] = data[key]
+        return arrays
+
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as file:
+        for info in archive.infolist():
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+
+            if info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member, allow_pickle = False)
+                continue
+
+            #The local file header has a fixed length of 30 bytes, followed by the file name and an 'extra' field. Their lengths are stored at bytes 26-29.
+            file.seek(info.header_offset)
+            local_header = file.read(30)
+            name_length = int.from_bytes(local_header[26:28], "little")
+            extra_length = int.from_bytes(local_header[28:30], "little")
+            file.seek(info.header_offset + 30 + name_length + extra_length)
+
+            #Now at the start of the .npy file
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+
+            if dtype.hasobject:
+                raise ValueError(f"Cannot memory-map the object array '{name}' in {path}")
+
+            if np.prod(shape) == 0:
+                arrays[name] = np.empty(shape, dtype = dtype)
+            else:
+                arrays[name] = np.memmap(path,
+                                         dtype = dtype,
+                                         mode = "r",
+                                         offset = file.tell(),
+                                         shape = shape,
+                                         order = "F" if fortran_order else "C")
+
+    return arrays
+
+def save_results(path, results, metadata = None):
+    """Save a results dictionary (e.g. from Engine.steady_heating_analysis()) to an uncompressed .npz file, with one contiguous array per key, so it 
+    can be memory-mapped by load_results(). Numeric lists and arrays are stored as arrays, and anything else (e.g. "boil_off_position") is stored in a 
+    small JSON header alongside the metadata.
+
+    Args:
+        path (str): File path to save to. Should end in '.npz'.
+        results (dict): Results to save.
+        metadata (dict, optional): Extra information to store with the results, such as engine parameters and units. Must be JSON serialisable. Defaults to None.
+    """
+    arrays = {}
+    values = {}
+
+    for key, value in results.items():
+        array = None
+
+        if isinstance(value, (list, tuple, np.ndarray)):
+            try:
+                array = np.asarray(value)
+            except ValueError:
+                pass    #Ragged lists
+
+        if array is not None and array.dtype.kind in "biuf" and array.ndim > 0:
+            arrays[key] = array
+        else:
+            values[key] = _to_json_type(value)
+
+    header = {"version" : RESULTS_VERSION, "values" : values, "metadata" : metadata if metadata is not None else {}}
+    arrays["__header__"] = np.frombuffer(json.dumps(header).encode("utf-8"), dtype = np.uint8)
+
+    save_npz(path, **arrays)
+
+def load_results(path, mmap = True):
+    """Load results saved with save_results().
+
+    Args:
+        path (str): Path to the .npz file
+        mmap (bool, optional): Whether to memory-map the arrays (read-only) instead of reading them into memory. Defaults to True.
+
+    Returns:
+        dict: The results, with the same keys that were saved (arrays are returned as numpy arrays rather than lists), plus a "metadata" key containing the metadata.
+    """
+    results = load_npz(path, mmap = mmap)
+
+    try:
+        header = json.loads(bytes(results.pop("__header__")).decode("utf-8"))
+    except KeyError:
+        raise ValueError(f"{path} was not saved with bamboo.io.save_results()")
+
+    if header["version"] > RESULTS_VERSION:
+        raise ValueError(f"{path} uses results format version {header['version']}, but this version of bamboo can only read up to version {RESULTS_VERSION}")
+
+    results.update(header["values"])
+    results["metadata"] = header["metadata"]
+
+    return results
+
+def load(path, mmap = True):
+    """Load results from any of the formats that bamboo can export - a .npz file from save_results(), a directory from StreamWriter, or a .json file.
+
+    Args:
+        path (str): Path to the results
+        mmap (bool, optional): Whether to memory-map arrays, where the format allows it. Defaults to True.
+
+    Returns:
+        dict: The results
+    """
+    path = os.fspath(path)
+
+    if os.path.isdir(path):
+        return load_stream(path, mmap = mmap)
+
+    elif path.endswith(".json"):
+        with open(path, "r") as file:
+            return json.load(file)
+
+    else:
+        return load_results(path, mmap = mmap)
+
+def _to_json_type(value):
+    """Convert numpy types into their equivalent Python types, so they can be serialised with json.
+    """
+    if isinstance(value, dict):
+        return {key : _to_json_type(item) for key, item in value.items()}
+    elif isinstance(value, (list, tuple)):
+        return [_to_json_type(item) for item in value]
+    elif isinstance(value, np.ndarray):
+        return value.tolist()
+    elif isinstance(value, np.generic):
+        return value.item()
+    else:
+        return value
+
+class NpyAppender:
+    """Writes a .npy file one row at a time, so that arrays which are too big to hold in memory can be built up on disk. The result can be read with numpy.load(), 
+    including with mmap_mode = 'r'. Can be used as a context manager, which calls close() on exit.
+
+    Note:
+        The .npy header is written with enough padding to be rewritten with the final shape in close(). The file is not a valid .npy file until close() is called.
+
+    Args:
+        path (str): File path to write to. Should end in '.npy'.
+        row_shape (tuple or int, optional): Shape of each row. Defaults to () (i.e. a 1D array of scalars).
+        dtype (str, optional): Data type to store. Defaults to 'float64'.
+    """
+    HEADER_LENGTH = 128     #Total length of the magic string and header, which must be a multiple of 64 bytes
+
+    def __init__(self, path, row_shape = (), dtype = 'float64'):
+        self.path = path
+        self.row_shape = tuple(int(n) for n in np.atleast_1d(row_shape)) if np.ndim(row_shape) > 0 else (int(row_shape),)
+        self.dtype = np.dtype(dtype)
+        self.rows = 0
+
+        self._file = open(path, "wb")
+        self._write_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def append(self, row):
+        """Write a row to the end of the file.
+
+        Args:
+            row (array): Array with shape 'row_shape'
+        """
+        row = np.asarray(row, dtype = self.dtype)
+
+        if row.shape != self.row_shape:
+            raise ValueError(f"Row has shape {row.shape}, but rows for {self.path} must have shape {self.row_shape}")
+
+        self._file.write(np.ascontiguousarray(row).tobytes())
+        self.rows += 1
+
+    def close(self):
+        """Rewrite the header with the final number of rows, and close the file.
+        """
+        if not self._file.closed:
+            self._file.seek(0)
+            self._write_header()
+            self._file.close()
+
+    def _write_header(self):
+        shape = (self.rows,) + self.row_shape
+        header = "{" + f"'descr': {repr(self.dtype.str)}, 'fortran_order': False, 'shape': {repr(shape)}, " + "}"
+
+        #Version 1.0 format: magic string (6 bytes), version (2 bytes), header length (2 bytes), then the header padded with spaces and ending in a newline
+        header_length = self.HEADER_LENGTH - 10
+
+        if len(header) + 1 > header_length:
+            raise ValueError(f"Array shape {shape} is too large to store in {self.path}")
+
+        header = header.ljust(header_length - 1) + "\n"
+
+        self._file.write(b"\x93NUMPY\x01\x00")
+        self._file.write(header_length.to_bytes(2, "little"))
+        self._file.write(header.encode("latin1"))
+
+class StreamWriter:
+    """Streams time slices of simulation results to disk, as a directory containing one .npy file per field, plus 'x.npy' and 't.npy'. Only one time slice 
+    needs to be held in memory at a time. Read the results back with load_stream(). Can be used as a context manager, which calls close() on exit.
+
+    Args:
+        directory (str): Directory to write to. Is created if it doesn't exist.
+        x (array): Axial positions of the stations (m)
+        fields (list): Names of the fields to store. Each time slice must contain an array for each field, with the same length as x.
+    """
+    def __init__(self, directory, x, fields):
+        os.makedirs(directory, exist_ok = True)
+
+        self.directory = directory
+        self.fields = list(fields)
+        np.save(os.path.join(directory, "x.npy"), np.asarray(x, dtype = 'float'))
+
+        self._t = NpyAppender(os.path.join(directory, "t.npy"))
+        self._appenders = {field : NpyAppender(os.path.join(directory, f"{field}.npy"), row_shape = len(x)) for field in self.fields}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, t, state):
+        """Append a time slice.
+
+        Args:
+            t (float): Time (s)
+            state (dict): Dictionary containing an array for every field. Other keys are ignored.
+        """
+        self._t.append(t)
+
+        for field in self.fields:
+            self._appenders[field].append(np.broadcast_to(state[field], self._appenders[field].row_shape))
+
+    def close(self):
+        """Finish writing all of the files.
+        """
+        self._t.close()
+
+        for appender in self._appenders.values():
+            appender.close()
+
+def load_stream(directory, mmap = True):
+    """Load results written by StreamWriter.
+
+    Args:
+        directory (str): Directory that the results were written to
+        mmap (bool, optional): Whether to memory-map the arrays (read-only) instead of reading them into memory. Defaults to True.
+
+    Returns:
+        dict: Dictionary of arrays, keyed by field name (as well as 'x' and 't'). Fields have indexes [time_index, space_index].
+    """
+    arrays = {}
+
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(".npy"):
+            arrays[filename[:-4]] = np.load(os.path.join(directory, filename), mmap_mode = "r" if mmap else None)
+
+    return arrays
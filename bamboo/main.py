@@ -37,95 +37,291 @@ References:
 '''
 
 import numpy as np
-import matplotlib.pyplot as plt
-import scipy.optimize
-import ambiance
+import copy
+import importlib
 import bamboo.cooling as cool
-import json
-import matplotlib.patches
+import bamboo.atmosphere
+import bamboo.trajectory
+import bamboo.io
+import bamboo.results
+
+#matplotlib and scipy.optimize take much longer to import than the rest of bamboo, so they're only imported inside the functions that use them.
+#These names are still available as module attributes (e.g. bamboo.main.plt), through __getattr__() below.
+_LAZY_MODULES = {"plt" : "matplotlib.pyplot",
+                 "matplotlib" : "matplotlib",
+                 "scipy" : "scipy",
+                 "ambiance" : "ambiance"}
+
+def __getattr__(name):
+    if name in _LAZY_MODULES:
+        module = importlib.import_module(_LAZY_MODULES[name])
+
+        #Submodules that used to be imported here, so that e.g. bamboo.main.scipy.optimize still works
+        if name == "scipy":
+            importlib.import_module("scipy.optimize")
+        elif name == "matplotlib":
+            importlib.import_module("matplotlib.patches")
+
+        return module
+
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
 
 R_BAR = 8.3144621e3         #Universal gas constant (J/K/kmol)
 g0 = 9.80665                #Standard gravitational acceleration (m/s^2)
 
 
+def _check_gamma(gamma):
+    """Raise a ValueError if any ratio of specific heats is not greater than one. Works on floats and arrays alike.
+    """
+    if np.any(np.asarray(gamma) <= 1):
+        raise ValueError(f"The ratio of specific heats 'gamma' must be greater than 1. You tried to input {gamma}.")
+
+def _check_mach(M):
+    """Raise a ValueError if any Mach number is negative. Works on floats and arrays alike.
+    """
+    if np.any(np.asarray(M) < 0):
+        raise ValueError(f"Mach numbers cannot be negative. You tried to input {M}.")
+
 def m_bar(M, gamma):    
     """Non-dimensional mass flow rate, defined as mdot * sqrt(cp*T0)/(A*p0). A is the local cross sectional area that the flow is moving through.
 
+    Note:
+        All of the isentropic flow relations in this module accept either floats or NumPy arrays, and broadcast over their inputs (e.g. an array of Mach numbers with a single gamma).
+        Floats in give floats out, arrays in give arrays out.
+
     Args:
-        M (float): Mach number
-        gamma (float): Ratio of specific heats cp/cv
+        M (float or array): Mach number
+        gamma (float or array): Ratio of specific heats cp/cv
 
     Returns:
-        float: Non-dimensional mass flow rate
+        float or array: Non-dimensional mass flow rate
     """
-    '''gamma is the ratio of specific heats, M is the Mach number '''
+    M = np.asarray(M, dtype = 'float')
+    gamma = np.asarray(gamma, dtype = 'float')
+    _check_mach(M)
+    _check_gamma(gamma)
+
     return gamma/(gamma-1)**0.5 * M * (1+ M**2 * (gamma-1)/2)**(-0.5*(gamma+1)/(gamma-1))
 
 def p0(p, M, gamma):
     """Get stagnation pressure from static pressure and Mach number
 
     Args:
-        p (float): Pressure (Pa)
-        M (float): Mach number
-        gamma (float): Ratio of specific heats cp/cv
+        p (float or array): Pressure (Pa)
+        M (float or array): Mach number
+        gamma (float or array): Ratio of specific heats cp/cv
 
     Returns:
-        float: Stagnation pressure (Pa)
+        float or array: Stagnation pressure (Pa)
     """
+    M = np.asarray(M, dtype = 'float')
+    gamma = np.asarray(gamma, dtype = 'float')
+    _check_mach(M)
+    _check_gamma(gamma)
+
     return p*(1 + M**2 * (gamma-1)/2)**(gamma/(gamma-1))
 
 def T0(T, M, gamma):
     """Get the stangation temperature from the static temperature and Mach number
 
     Args:
-        T (float): Temperature (K)
-        M (float): Mach number
-        gamma (float): Ratio of specific heats cp/cv
+        T (float or array): Temperature (K)
+        M (float or array): Mach number
+        gamma (float or array): Ratio of specific heats cp/cv
 
     Returns:
-        float: Stagnation temperature (K)
+        float or array: Stagnation temperature (K)
     """
+    M = np.asarray(M, dtype = 'float')
+    gamma = np.asarray(gamma, dtype = 'float')
+    _check_mach(M)
+    _check_gamma(gamma)
+
     return T*(1+ M**2 * (gamma-1)/2)
 
 def M_from_p(p, p0, gamma):
     """Mach number from static pressure and stagnation pressure.
 
     Args:
-        p (float): Static pressure (Pa)
-        p0 (float): Stagnation pressure (Pa)
-        gamma (float): Ratio of specific heats cp/cv
+        p (float or array): Static pressure (Pa)
+        p0 (float or array): Stagnation pressure (Pa)
+        gamma (float or array): Ratio of specific heats cp/cv
 
     Returns:
-        float: Mach number
+        float or array: Mach number
     """
+    p = np.asarray(p, dtype = 'float')
+    p0 = np.asarray(p0, dtype = 'float')
+    gamma = np.asarray(gamma, dtype = 'float')
+    _check_gamma(gamma)
+
+    if np.any(p <= 0) or np.any(p > p0):
+        raise ValueError(f"Static pressures must be positive and no greater than the stagnation pressure. You tried to input p = {p} with p0 = {p0}.")
+
     return ( (2/(gamma-1)) * ( (p/p0)**((gamma-1)/(-gamma)) - 1 ) )**0.5
 
 def T(T0, M, gamma):
     """Get local temperature from the Mach number and stagnation temperature.
 
     Args:
-        T0 (float): Stagnation temperature (K)
-        M (float): Local Mach number
-        gamma (float): Ratio of specific heats cp/cv
+        T0 (float or array): Stagnation temperature (K)
+        M (float or array): Local Mach number
+        gamma (float or array): Ratio of specific heats cp/cv
 
     Returns:
-        float: Temperature (K)
+        float or array: Temperature (K)
     """
+    M = np.asarray(M, dtype = 'float')
+    gamma = np.asarray(gamma, dtype = 'float')
+    _check_mach(M)
+    _check_gamma(gamma)
+
     return T0*(1 + (gamma-1)/2 * M**2)**(-1)
 
 def p(p0, M, gamma):
     """Get local pressure from the Mach number and stagnation pressure.
 
     Args:
-        p0 (float): Stagnation pressure (Pa)
-        M (float): Local Mach number
-        gamma (float): Ratio of specific heats cp/cv
+        p0 (float or array): Stagnation pressure (Pa)
+        M (float or array): Local Mach number
+        gamma (float or array): Ratio of specific heats cp/cv
 
     Returns:
-        float: Pressure (Pa)
+        float or array: Pressure (Pa)
     """
+    M = np.asarray(M, dtype = 'float')
+    gamma = np.asarray(gamma, dtype = 'float')
+    _check_mach(M)
+    _check_gamma(gamma)
+
     return p0*(1 + (gamma-1)/2 * M**2)**(-gamma/(gamma-1))
 
+def dm_bar_dM(M, gamma):
+    """Derivative of the non-dimensional mass flow rate, m_bar, with respect to Mach number. Equal to zero at the throat (M = 1).
+
+    Args:
+        M (float or array): Mach number
+        gamma (float or array): Ratio of specific heats cp/cv
+
+    Returns:
+        float or array: d(m_bar)/dM
+    """
+    M = np.asarray(M, dtype = 'float')
+    gamma = np.asarray(gamma, dtype = 'float')
+
+    return gamma/(gamma-1)**0.5 * (1 - M**2) * (1+ M**2 * (gamma-1)/2)**(-0.5*(gamma+1)/(gamma-1) - 1)
+
+M_BAR_TABLE_POINTS = 2000   #Number of points in each m_bar inverse table
+M_BAR_TOLERANCE = 1e-12     #Relative tolerance on m_bar that M_from_m_bar() refines its answers to
+M_MAX = 300                 #Largest supersonic Mach number that M_from_m_bar() will return
+
+_m_bar_tables = {}          #Cache of m_bar inverse tables, with keys (gamma, supersonic)
+
+def m_bar_inverse_table(gamma, supersonic):
+    """Get a monotone lookup table of Mach number against m_bar, for one branch of the area-Mach relation.
+    Tables are only built the first time they are requested for a given (gamma, supersonic), and are cached after that.
+
+    The subsonic table is stored against m_bar, and the supersonic table against log(m_bar) (m_bar falls off like a power of M for large M, so this keeps the interpolation accurate).
+    Both tables are clustered towards M = 1, where the inverse has a square-root singularity.
+
+    Args:
+        gamma (float): Ratio of specific heats cp/cv
+        supersonic (bool): If True, get the table for the supersonic branch (M >= 1). If False, get the subsonic branch (0 <= M <= 1).
+
+    Returns:
+        array, array: Interpolation abscissae (increasing, either m_bar or log(m_bar)), and the corresponding Mach numbers.
+    """
+    key = (float(gamma), bool(supersonic))
+
+    if key not in _m_bar_tables:
+        s = np.linspace(0, 1, M_BAR_TABLE_POINTS)
+
+        if supersonic:
+            Ms = 1 + (M_MAX - 1)*np.expm1(8*s**2)/np.expm1(8)       #Very dense near M = 1, sparse at high Mach numbers
+            abscissae = np.log(m_bar(Ms, gamma))[::-1]
+            Ms = Ms[::-1]
+        else:
+            Ms = 1 - (1 - s)**2                                     #Clustered towards M = 1
+            abscissae = m_bar(Ms, gamma)
+
+        _m_bar_tables[key] = (abscissae, Ms)
+
+    return _m_bar_tables[key]
+
+def M_from_m_bar(m_bar_value, gamma, supersonic = False, max_iterations = 10):
+    """Invert the area-Mach relation, i.e. get the Mach number that gives a certain non-dimensional mass flow rate, m_bar.
+    An initial guess is interpolated from m_bar_inverse_table(), and then refined with a few Newton iterations until m_bar is matched to a relative tolerance of M_BAR_TOLERANCE.
+    Any points that are still outside the tolerance after max_iterations are solved by bracketing instead, and a ValueError is raised if even that cannot meet it.
+
+    Args:
+        m_bar_value (float or array): Non-dimensional mass flow rate, mdot * sqrt(cp*T0)/(A*p0)
+        gamma (float): Ratio of specific heats cp/cv
+        supersonic (bool or array): If True, the supersonic solution is returned (M >= 1). If False, the subsonic one is returned (M <= 1). Can be an array of bools, to pick the branch for each element of 'm_bar_value'. Defaults to False.
+        max_iterations (int, optional): Maximum number of Newton iterations. Defaults to 10.
+
+    Returns:
+        float or array: Mach number
+    """
+    _check_gamma(gamma)
+    m_bar_value, supersonic = np.broadcast_arrays(np.asarray(m_bar_value, dtype = 'float'), np.asarray(supersonic, dtype = 'bool'))
+
+    if np.any(m_bar_value <= 0) or np.any(m_bar_value > m_bar(1, gamma)*(1 + M_BAR_TOLERANCE)):
+        raise ValueError(f"m_bar must be greater than zero and no greater than its value at the throat ({m_bar(1, gamma)}). You tried to input {m_bar_value}.")
+
+    #The throat value of m_bar is a maximum, so clip any rounding errors at the throat to it
+    target = np.minimum(m_bar_value, m_bar(1, gamma))
+
+    #Initial guess from the lookup tables
+    Mach = np.empty(target.shape)
+
+    sub_abscissae, sub_Ms = m_bar_inverse_table(gamma, supersonic = False)
+    sup_abscissae, sup_Ms = m_bar_inverse_table(gamma, supersonic = True)
+
+    Mach[~supersonic] = np.interp(target[~supersonic], sub_abscissae, sub_Ms)
+    Mach[supersonic] = np.interp(np.log(target[supersonic]), sup_abscissae, sup_Ms)
+
+    #Newton iterations, keeping each guess on the correct branch
+    lower = np.where(supersonic, 1.0, 0.0)
+    upper = np.where(supersonic, M_MAX, 1.0)
+
+    for i in range(max_iterations):
+        residual = m_bar(Mach, gamma) - target
+        unconverged = np.abs(residual) > M_BAR_TOLERANCE*target
+
+        if not np.any(unconverged):
+            break
+
+        #The derivative is zero at M = 1, but the table guess is already very close to the answer there, so leave those points alone.
+        gradient = dm_bar_dM(Mach, gamma)
+        step = np.divide(residual, gradient, out = np.zeros(Mach.shape), where = unconverged & (gradient != 0))
+        Mach = np.clip(Mach - step, lower, upper)
+
+    #Fall back to bracketing on the correct branch for any points that Newton didn't converge (e.g. if max_iterations is too small)
+    unconverged = np.abs(m_bar(Mach, gamma) - target) > M_BAR_TOLERANCE*target
+
+    if np.any(unconverged):
+        import scipy.optimize
+
+        Mach = Mach.reshape(-1)
+        for i in np.flatnonzero(unconverged):
+            def func_to_solve(M):
+                return m_bar(M, gamma) - target.flat[i]
+
+            if func_to_solve(lower.flat[i])*func_to_solve(upper.flat[i]) <= 0:
+                Mach[i] = scipy.optimize.brentq(func_to_solve, lower.flat[i], upper.flat[i], xtol = 1e-15, rtol = 4*np.finfo(float).eps)
+
+        Mach = Mach.reshape(target.shape)
+
+        residual = np.abs(m_bar(Mach, gamma) - target)
+        if np.any(residual > M_BAR_TOLERANCE*target):
+            raise ValueError(f"M_from_m_bar() could not match m_bar to a relative tolerance of {M_BAR_TOLERANCE} (largest relative error {np.max(residual/target)}). "
+                             f"On the supersonic branch, m_bar must be greater than its value at M = {M_MAX} ({m_bar(M_MAX, gamma)}).")
+
+    if Mach.ndim == 0:
+        return float(Mach)
+
+    return Mach
+
 
 
 def estimate_apogee(dry_mass, propellant_mass, engine, cross_sectional_area, drag_coefficient = 0.75, dt = 0.2, show_plot = False):
@@ -143,13 +339,8 @@ def estimate_apogee(dry_mass, propellant_mass, engine, cross_sectional_area, dra
 
     #Rate of change of the state array (f = [alt, vel])  
     def fdot(fn, t):          
-        #The ambiance atmosphere model only goes up to 81020 m
-        if fn[0] < 81020:
-            density_amb = ambiance.Atmosphere(fn[0]).density[0]       
-            p_amb = ambiance.Atmosphere(fn[0]).pressure[0] 
-        else:
-            density_amb = 0
-            p_amb = 0
+        #The atmosphere model only goes up to 81020 m, above which the pressure and density are zero
+        p_amb, density_amb = bamboo.atmosphere.pressure_and_density(fn[0])
 
         #Calculate acceleration
         if t < burn_time:
@@ -190,6 +381,8 @@ def estimate_apogee(dry_mass, propellant_mass, engine, cross_sectional_area, dra
         t = t + dt
 
     if show_plot == True:
+        import matplotlib.pyplot as plt
+
         fig, axs = plt.subplots()
         axs.plot(np.linspace(0, t, len(alts)), alts)
         axs.set_xlabel("Time (s)")
@@ -201,6 +394,26 @@ def estimate_apogee(dry_mass, propellant_mass, engine, cross_sectional_area, dra
 
 
 
+def _apogee_for_area_ratio(engine, area_ratio, dry_mass, propellant_mass, cross_sectional_area, drag_coefficient, dt):
+    """Apogee of a vehicle powered by a copy of 'engine' with a different nozzle exit area, for Engine.optimise_for_apogee(). The engine itself is not modified. 
+    Defined at the module level so that it can be run in other processes.
+
+    Returns:
+        float: Apogee (m), or NaN if the flow separated in the nozzle during the flight.
+    """
+    test_engine = copy.copy(engine)
+    nozzle = engine.nozzle
+    test_engine.nozzle = Nozzle(nozzle.At, area_ratio*nozzle.At, nozzle.type, getattr(nozzle, "length_fraction", 0.8), getattr(nozzle, "cone_angle", 15))     #Replacing the nozzle also gives the copy its own flow cache
+
+    try:
+        if dt is None:
+            return bamboo.trajectory.simulate(dry_mass, propellant_mass, test_engine, cross_sectional_area, drag_coefficient).apogee
+        else:
+            return estimate_apogee(dry_mass, propellant_mass, test_engine, cross_sectional_area, drag_coefficient, dt)
+
+    except ValueError:
+        return np.nan
+
 def rao_theta_n(area_ratio, length_fraction = 0.8):
     """Returns the contour angle at the inflection point of the bell nozzle, by interpolating data.   
     Data obtained by using http://www.graphreader.com/ on the graph in Reference [1].
@@ -297,6 +510,7 @@ def show_conical_shape(A1, At, A2, div_half_angle = 15, conv_half_angle=45):
         div_half_angle (float, optional): Cone half angle for the diverging section (deg). Defaults to 15.
         conv_half_angle (float, optional): Cone half angle for the converging section (deg). Defaults to 45.
     """
+    import matplotlib.pyplot as plt
 
     #Convert angles to radians
     div_half_angle = div_half_angle*np.pi/180
@@ -434,38 +648,46 @@ class Nozzle:
         """Returns the distance between the nozzle contour and the centreline, given the axial distance 'x' downstream from the throat. Based on Reference [1] page 5.
 
         Args:
-            x (float): Distance along the centreline from the throat (m)
+            x (float or array): Distance along the centreline from the throat (m)
 
         Returns:
-            float: Distance between the nozzle centreline and the contour (m)
+            float or array: Distance between the nozzle centreline and the contour (m)
         """
-        if x < 0:
+        x = np.asarray(x, dtype = 'float')
+
+        if np.any(x < 0):
             raise ValueError(f"x must be greater than zero. You tried to input {x}.")
 
-        elif self.type == "rao" and x <= self.length:
+        elif np.any(x > self.length):
+            raise ValueError(f"x is beyond the end of the nozzle, which is only {self.length} m long. You tried to input {x}.")
+
+        y = np.empty(x.shape)
+
+        if self.type == "rao":
             #Circular throat section
-            if x < self.Nx:
-                theta = -np.arccos(x/(0.382*self.Rt)) #Take the negative, because we want an answer in the range [-90 to 0 deg], but numpy gives us the one in the range [0 to 180 deg]
-                return 0.382*self.Rt*np.sin(theta) + 0.382*self.Rt + self.Rt
-            
+            throat = x < self.Nx
+            theta = -np.arccos(x[throat]/(0.382*self.Rt)) #Take the negative, because we want an answer in the range [-90 to 0 deg], but numpy gives us the one in the range [0 to 180 deg]
+            y[throat] = 0.382*self.Rt*np.sin(theta) + 0.382*self.Rt + self.Rt
+
             #Parabolic section.
-            else:
-                return ((4*self.a*(x-self.c) + self.b**2)**0.5 - self.b)/(2*self.a)   #Rearranging the quadratic on page 2 of Reference [3] to solve for y
+            y[~throat] = ((4*self.a*(x[~throat]-self.c) + self.b**2)**0.5 - self.b)/(2*self.a)   #Rearranging the quadratic on page 2 of Reference [3] to solve for y
 
-        elif self.type == "cone" and x <= self.length:
-            return self.Rt + self.dydx*x
+        elif self.type == "cone":
+            y[...] = self.Rt + self.dydx*x
 
-        else:
-            raise ValueError(f"x is beyond the end of the nozzle, which is only {self.length} m long. You tried to input {x}.")
+        if y.ndim == 0:
+            return float(y)
+
+        return y
 
     def A(self, x):
         """Returns the nozzle area given the axial distance 'x' downstream from the throat. Based on Reference [1] page 5.
 
         Args:
-            x (float): Distance along the centreline from the throat (m)
+            x (float or array): Distance along the centreline from the throat (m)
 
         Returns:
-            float: Nozzle cross sectional area (m^2) at the given value of x.
+            float or array: Nozzle cross sectional area (m^2) at the given value of x.
         """
         return np.pi*self.y(x)**2   #pi*R^2
 
@@ -475,12 +697,11 @@ class Nozzle:
         Args:
             number_of_points (int, optional): Numbers of discrete points to plot. Defaults to 1000.
         """
+        import matplotlib.pyplot as plt
+
         if self.type == "rao":
             x = np.linspace(0, self.Ex, number_of_points)
-            y = np.zeros(len(x))
-
-            for i in range(len(x)):
-                y[i] = self.y(x[i])
+            y = self.y(x)
 
             fig, axs = plt.subplots()
             axs.plot(x, y, color="blue")
@@ -584,6 +805,100 @@ class EngineGeometry:
                 self.x_min = self.x_chamber_end - self.chamber_length
                 self.x_max = nozzle.length
 
+            #x positions that the inner_wall_thickness values are stretched across
+            self.inner_wall_thickness_xs = np.linspace(self.x_min, self.x_max, len(self.inner_wall_thickness))
+
+class FlowState:
+    """Struct-of-arrays container for the exhaust gas freestream properties at a set of axial positions. Returned by Engine.flow_state().
+
+    Args:
+        x (array): Axial positions (m)
+        M (array): Mach number
+        T (array): Temperature (K)
+        p (array): Pressure (Pa)
+        rho (array): Density (kg/m^3)
+        v (array): Velocity (m/s)
+        A (array): Flow cross sectional area (m^2)
+    """
+    def __init__(self, x, M, T, p, rho, v, A):
+        self.x = x
+        self.M = M
+        self.T = T
+        self.p = p
+        self.rho = rho
+        self.v = v
+        self.A = A
+
+        #Make everything read-only, since these arrays are shared with the Engine's cache
+        for array in (self.x, self.M, self.T, self.p, self.rho, self.v, self.A):
+            array.flags.writeable = False
+
+    def __len__(self):
+        return len(self.x)
+
+class ExitState:
+    """Exhaust gas properties at the nozzle exit plane, which are needed for thrust and separation calculations. Returned by Engine.exit_state.
+
+    Args:
+        M (float): Mach number
+        T (float): Temperature (K)
+        p (float): Pressure (Pa)
+        rho (float): Density (kg/m^3)
+        v (float): Velocity (m/s)
+        separation_p_amb (float): Ambient pressure above which the flow separates in the nozzle (Pa)
+    """
+    def __init__(self, M, T, p, rho, v, separation_p_amb):
+        self.M = M
+        self.T = T
+        self.p = p
+        self.rho = rho
+        self.v = v
+        self.separation_p_amb = separation_p_amb
+
+    def __repr__(self):
+        return f"ExitState(M = {self.M}, T = {self.T} K, p = {self.p} Pa, v = {self.v} m/s, separation_p_amb = {self.separation_p_amb} Pa)"
+
+class EngineMesh:
+    """Discretised engine geometry, which can be shared between all of the analyses on an Engine so that the geometry only needs to be worked out once. Created with Engine.discretise().
+
+    Note:
+        Stations run from the nozzle exit (x_max) to the front of the combustion chamber (x_min), which is the direction that the coolant is marched in.
+
+    Args:
+        x (array): Axial position of each station (m).
+        radii (dict): Radius up to each layer of the engine at every station (m), in the format returned by Engine.layers().
+        wall_thickness (array): Inner wall thickness at each station (m).
+        ablative_thickness (array, optional): Ablative thickness at each station (m). Defaults to None (no ablative).
+        channel_area (array, optional): Coolant channel flow area at each station (m^2). Defaults to None (no cooling jacket).
+        channel_D (array, optional): Coolant channel effective (hydraulic) diameter at each station (m). Defaults to None (no cooling jacket).
+        channel_length (array, optional): Coolant path length between each station and the next (m). Defaults to None (no cooling jacket).
+
+    Attributes:
+        x (array): Axial position of each station (m).
+        dx (array): Axial distance between each station and the next, so that dx[i] = abs(x[i+1] - x[i]) (m). Has one less element than x.
+        radii (dict): Radius up to each layer of the engine at every station (m).
+        wall_thickness (array): Inner wall thickness at each station (m).
+        ablative_thickness (array or None): Ablative thickness at each station (m).
+        channel_area (array or None): Coolant channel flow area at each station (m^2).
+        channel_D (array or None): Coolant channel effective diameter at each station (m).
+        channel_length (array or None): Coolant path length between each station and the next (m). Has one less element than x.
+    """
+    def __init__(self, x, radii, wall_thickness, ablative_thickness = None, channel_area = None, channel_D = None, channel_length = None):
+        self.x = np.ascontiguousarray(x, dtype = 'float')
+        self.dx = np.abs(np.diff(self.x))
+        self.radii = {key : np.ascontiguousarray(value, dtype = 'float') for key, value in radii.items()}
+        self.wall_thickness = np.ascontiguousarray(wall_thickness, dtype = 'float')
+        self.ablative_thickness = ablative_thickness
+        self.channel_area = channel_area
+        self.channel_D = channel_D
+        self.channel_length = channel_length
+
+    def __len__(self):
+        return len(self.x)
+
+    def __repr__(self):
+        return f"<bamboo.main.EngineMesh> with {len(self)} stations between x = {self.x[0]} m and x = {self.x[-1]} m"
+
 class Engine:
     """Class for representing a liquid rocket engine.
 
@@ -596,7 +911,11 @@ class Engine:
         c_star (float): C* for the engine (m/s).
         geometry (EngineGeometry): EngineGeometry object (if added).
     """
+    MAX_CACHED_FLOW_STATES = 16     #Maximum number of discretisations that Engine.flow_state() will remember
+
     def __init__(self, perfect_gas, chamber_conditions, nozzle):
+        self._flow_states = {}
+        self._exit_state = None
         self.perfect_gas = perfect_gas
         self.chamber_conditions = chamber_conditions
         self.nozzle = nozzle
@@ -613,102 +932,172 @@ class Engine:
         if self.nozzle.At > max_throat_area:
             raise ValueError(f"The nozzle throat is not choked. You need to reduce the throat area to at least {max_throat_area} m^2")
 
+    #Changing any of these invalidates the cached flow states
+    @property
+    def perfect_gas(self):
+        return self._perfect_gas
+
+    @perfect_gas.setter
+    def perfect_gas(self, value):
+        self._perfect_gas = value
+        self.clear_flow_cache()
+
+    @property
+    def chamber_conditions(self):
+        return self._chamber_conditions
+
+    @chamber_conditions.setter
+    def chamber_conditions(self, value):
+        self._chamber_conditions = value
+        self.clear_flow_cache()
+
+    @property
+    def nozzle(self):
+        return self._nozzle
+
+    @nozzle.setter
+    def nozzle(self, value):
+        self._nozzle = value
+        self.clear_flow_cache()
+
+    @property
+    def geometry(self):
+        try:
+            return self._geometry
+        except AttributeError:
+            raise AttributeError("'Engine' object has no attribute 'geometry'. You need to add geometry with the 'Engine.add_geometry()' function.")
+
+    @geometry.setter
+    def geometry(self, value):
+        self._geometry = value
+        self.clear_flow_cache()
+
+    def clear_flow_cache(self):
+        """Forget all the flow states stored by Engine.flow_state(), and the stored Engine.exit_state. This happens automatically when the nozzle, perfect_gas, chamber_conditions or geometry are replaced, 
+        but you will need to call it yourself if you modify one of those objects in-place (e.g. by changing chamber_conditions.p0).
+        """
+        self._flow_states = {}
+        self._exit_state = None
+
     #Engine geometry functions
     def y(self, x, up_to = 'contour'):
         """Get y position up to a specified part of the engine (e.g. inner contour, ablative inner or outer wall, etc.)
 
         Args:
-            x (float): x position (m). x = 0 is the throat, x > 0 is the nozzle diverging section.
+            x (float or array): x position (m). x = 0 is the throat, x > 0 is the nozzle diverging section.
             up_to (str): The engine component you want the radius up to. Options include 'contour', 'ablative in', 'ablative out', 'wall in', 'wall out'. Defaults to 'contour'.
 
         Returns:
-            float: Radius up to the given component (m).
+            float or array: Radius up to the given component (m).
         """
         if up_to == 'contour':
-            #In the diverging section of the nozzle
-            if x >= 0:
-                return self.nozzle.y(x)
+            return self._contour(x)
 
-            #Converging section and combustion chamber
-            else:
-                try:
-                    self.geometry
-                except AttributeError:
-                    raise AttributeError("Geometry is not defined for x < 0. You need to add geometry with the 'Engine.add_geometry()' function.")
-
-                if self.geometry.style == "auto":
-                    if self.nozzle.type == "rao":
-                        #Curved converging section
-                        if x < 0 and x > self.geometry.x_curved_converging_start:
-                            theta = -np.arccos(x/(1.5*self.nozzle.Rt))
-                            return 1.5*self.nozzle.Rt*np.sin(theta) + 1.5*self.nozzle.Rt + self.nozzle.Rt
-
-                        #Before the curved part of the converging section
-                        elif x <= self.geometry.x_curved_converging_start:
-
-                            #Inside the chamber
-                            if x < self.geometry.x_chamber_end and x >= self.geometry.x_min:
-                                return self.geometry.chamber_radius
-
-                            #Inside the converging section
-                            elif x >= self.geometry.x_chamber_end:
-                                return np.interp(x, 
-                                                [self.geometry.x_chamber_end, self.geometry.x_curved_converging_start], 
-                                                [self.geometry.chamber_radius, self.geometry.y_curved_converging_start])
-
-                            #Outside of the engine
-                            else:
-                                raise ValueError(f"x is beyond the front of the engine. You tried to input {x} but the minimum value you're allowed is {self.geometry.x_chamber_end - self.geometry.chamber_length}")
-                    
-                    elif self.nozzle.type == "cone":
-                        #If between the end of the chamber and the throat
-                        if x < 0 and x >= self.geometry.x_chamber_end:
-                            #Use a 45 degree converging section
-                            return self.nozzle.Rt + self.geometry.dydx_conv*x
-
-                        #If in the chamber
-                        elif x >= self.geometry.x_min and x < self.geometry.x_chamber_end:
-                            return self.geometry.chamber_radius
-
-                        else:
-                            raise ValueError(f"x is beyond the front of the engine. You tried to input {x} but the minimum value you're allowed is {self.geometry.x_min}")
-                    
-
-        elif up_to == 'ablative in':
+        elif up_to in ['ablative in', 'ablative out']:
             if self.has_ablative == False:
                 raise AttributeError("There is no ablative attached to this engine")
             else:
-                return self.y(x)
-        
-        elif up_to == 'ablative out':
-            if self.has_ablative == False:
-                raise AttributeError("There is no ablative attached to this engine")
-            else:
-                return self.y(x) + self.thickness(x, layer = 'ablative')
-        
-        elif up_to == 'wall in':
-            if self.has_ablative:
-                return self.y(x, up_to = 'ablative out')
-            else:
-                return self.y(x)
-        
-        elif up_to == 'wall out':
-            if self.has_ablative:
-                return self.y(x, up_to = 'ablative out') + self.thickness(x, layer = 'wall')
-            else:
-                return self.y(x) + self.thickness(x, layer = 'wall')
+                return self.layers(x)[up_to]
+
+        elif up_to in ['wall in', 'wall out']:
+            return self.layers(x)[up_to]
 
         else:
             raise ValueError(f"'{up_to}' is not a valid part of the engine. Try 'contour', 'ablative in', 'ablative out', 'wall in' or 'wall out'")
 
+    def _contour(self, x):
+        """Radius of the engine contour, evaluated piecewise over each section of the engine (nozzle, curved or conical converging section, and chamber).
+        """
+        x = np.asarray(x, dtype = 'float')
+        y = np.empty(x.shape)
+
+        #In the diverging section of the nozzle
+        diverging = x >= 0
+        y[diverging] = self.nozzle.y(x[diverging])
+
+        #Converging section and combustion chamber
+        if np.any(~diverging):
+            try:
+                self.geometry
+            except AttributeError:
+                raise AttributeError("Geometry is not defined for x < 0. You need to add geometry with the 'Engine.add_geometry()' function.")
+
+            if np.any(x < self.geometry.x_min):
+                raise ValueError(f"x is beyond the front of the engine. You tried to input {x} but the minimum value you're allowed is {self.geometry.x_min}")
+
+            if self.geometry.style == "auto":
+                chamber = ~diverging & (x < self.geometry.x_chamber_end)
+                y[chamber] = self.geometry.chamber_radius
+
+                if self.nozzle.type == "rao":
+                    #Curved converging section
+                    curved = ~diverging & (x > self.geometry.x_curved_converging_start)
+                    theta = -np.arccos(x[curved]/(1.5*self.nozzle.Rt))
+                    y[curved] = 1.5*self.nozzle.Rt*np.sin(theta) + 1.5*self.nozzle.Rt + self.nozzle.Rt
+
+                    #Straight converging section, between the chamber and the curved part
+                    straight = ~diverging & ~curved & ~chamber
+                    y[straight] = np.interp(x[straight], 
+                                            [self.geometry.x_chamber_end, self.geometry.x_curved_converging_start], 
+                                            [self.geometry.chamber_radius, self.geometry.y_curved_converging_start])
+
+                elif self.nozzle.type == "cone":
+                    #Use a 45 degree converging section between the end of the chamber and the throat
+                    converging = ~diverging & ~chamber
+                    y[converging] = self.nozzle.Rt + self.geometry.dydx_conv*x[converging]
+
+        if y.ndim == 0:
+            return float(y)
+
+        return y
+
+    def layers(self, x):
+        """Get the radius up to every layer of the engine, all in a single pass. This is much faster than calling Engine.y() separately for each layer.
+
+        Args:
+            x (float or array): x position (m). x = 0 is the throat, x > 0 is the nozzle diverging section.
+
+        Returns:
+            dict: Radii (m), with the keys 'contour', 'wall in' and 'wall out', as well as 'ablative in' and 'ablative out' if there is an ablative, and 'jacket out' (the outside of the coolant channels) if there is a cooling jacket.
+        """
+        contour = self._contour(x)
+        wall_thickness = self.thickness(x, layer = 'wall')
+        radii = {'contour' : contour}
+
+        if self.has_ablative:
+            radii['ablative in'] = contour
+            radii['ablative out'] = contour + self.thickness(x, layer = 'ablative')
+            radii['wall in'] = radii['ablative out']
+        else:
+            radii['wall in'] = contour
+
+        radii['wall out'] = radii['wall in'] + wall_thickness
+
+        if self.has_cooling_jacket:
+            x = np.asarray(x, dtype = 'float')
+            in_jacket = (self.cooling_jacket.xs[0] <= x) & (x <= self.cooling_jacket.xs[1])
+
+            if self.cooling_jacket.configuration == 'vertical':
+                channel_height = self.cooling_jacket.channel_height
+            else:
+                #Same convention as Engine.plot_geometry() - a rectangle with the channel's effective diameter and flow area
+                channel_height = self.cooling_jacket.A()/self.cooling_jacket.D()
+
+            radii['jacket out'] = radii['wall out'] + np.where(in_jacket, channel_height, 0.0)
+
+            if np.ndim(radii['jacket out']) == 0:
+                radii['jacket out'] = float(radii['jacket out'])
+
+        return radii
+
     def A(self, x):
         """Get the engine cross sectional area at a given x position.
 
         Args:
-            x (float): x position (m). x = 0 is the throat, x > 0 is the nozzle diverging section.
+            x (float or array): x position (m). x = 0 is the throat, x > 0 is the nozzle diverging section.
 
         Returns:
-            float: Cross sectional area (m^2)
+            float or array: Cross sectional area (m^2)
         """
         return np.pi*self.y(x)**2
 
@@ -716,34 +1105,141 @@ class Engine:
         """Get the thickness of the engine wall, or ablative, at a specific point.
 
         Args:
-            x (float): x position (m)
+            x (float or array): x position (m)
             layer (str): 'ablative' or 'wall'
 
         Returns:
-            float: Thickness at the given value of x (m)
+            float or array: Thickness at the given value of x (m)
         """
         if layer == 'wall':
-            #Stretch the wall_thickness array across the engine, and interpolate to get our desired thickness
-            inner_wall_thickness_xs = np.linspace(self.geometry.x_min, self.geometry.x_max, len(self.geometry.inner_wall_thickness))
-            return np.interp(x, inner_wall_thickness_xs, self.geometry.inner_wall_thickness)
+            #Interpolate the wall_thickness array, which is stretched across the engine
+            return np.interp(x, self.geometry.inner_wall_thickness_xs, self.geometry.inner_wall_thickness)
         
         if layer == 'ablative':
             if self.has_ablative == False:
                 raise AttributeError("This engine does not have an ablative attached")
 
+            x = np.asarray(x, dtype = 'float')
+
             #Check if there is ablative in this region of the engine
-            if self.ablative.xs[0] < x < self.ablative.xs[1]:
-                if self.ablative.ablative_thickness == None:
-                    #If self.ablative_thickness == None, fill up the distance between the nozzle contour and the chamber radius with ablative
-                    return self.geometry.chamber_radius - self.y(x)
+            if self.ablative.ablative_thickness is None:
+                #If self.ablative_thickness == None, fill up the distance between the nozzle contour and the chamber radius with ablative
+                thickness = self.geometry.chamber_radius - self._contour(x)
 
-                else:
-                    #Stretch the ablative_thickness array over the range that ablatives are present, and interpolate to get our desired thickness
-                    ablative_thickness_xs = np.linspace(self.ablative.xs[0], self.ablative.xs[1], len(self.ablative.ablative_thickness))
-                    return np.interp(x, ablative_thickness_xs, self.ablative.ablative_thickness)
             else:
-                #If we're outside the region where the ablative is present, return zero thickness.
-                return 0.0
+                #Interpolate the ablative_thickness array, which is stretched over the range that ablatives are present
+                ablative_thickness_xs = np.linspace(self.ablative.xs[0], self.ablative.xs[1], len(self.ablative.ablative_thickness))
+                thickness = np.interp(x, ablative_thickness_xs, self.ablative.ablative_thickness)
+
+            #If we're outside the region where the ablative is present, return zero thickness.
+            thickness = np.where((self.ablative.xs[0] < x) & (x < self.ablative.xs[1]), thickness, 0.0)
+
+            if thickness.ndim == 0:
+                return float(thickness)
+
+            return thickness
+
+    def discretise(self, number_of_points = 1000, spacing = "uniform", clustering = 10, x = None):
+        """Split the engine into discrete stations, and work out all of the geometry at each one. The resulting EngineMesh can be passed to any of the heating, stress 
+        and plotting functions, so that repeated analyses on the same geometry don't need to recalculate it.
+
+        Spacing options:
+            - 'uniform' : Equally spaced stations.
+            - 'throat' : Stations are clustered around the throat, where most of the heat transfer gradients are. The station density falls off over a few throat radii.
+            - 'curvature' : Station density increases with the curvature of the engine contour, so the straight chamber and converging cone are sparse, and the throat arcs are dense.
+
+        Note:
+            If you change the geometry, cooling jacket or ablative after creating a mesh, you will need to create a new one.
+
+        Args:
+            number_of_points (int, optional): Number of stations. Defaults to 1000.
+            spacing (str, optional): How to space out the stations. Options are 'uniform', 'throat' and 'curvature'. Defaults to "uniform".
+            clustering (float, optional): For non-uniform spacings, the ratio between the highest and lowest station densities. Defaults to 10.
+            x (array, optional): Exact station positions to use (m). If given, 'number_of_points' and 'spacing' are ignored. Defaults to None.
+
+        Returns:
+            EngineMesh: The discretised engine. Stations run from the nozzle exit to the front of the chamber.
+        """
+        try:
+            self.geometry
+        except AttributeError:
+            raise AttributeError("Cannot discretise the engine without additional geometry definitions. You need to add geometry with the 'Engine.add_geometry()' function.")
+
+        if x is not None:
+            x = np.sort(np.asarray(x, dtype = 'float'))[::-1]                               #Run from the back end (the nozzle exit) to the front (chamber)
+
+        elif spacing == "uniform":
+            x = np.linspace(self.geometry.x_max, self.geometry.x_min, number_of_points)     #Run from the back end (the nozzle exit) to the front (chamber)
+
+        elif spacing == "throat":
+            def density(x_fine):
+                return 1 + (clustering - 1)*np.exp(-(x_fine/(2*self.nozzle.Rt))**2)
+
+            x = self._equidistribute(density, number_of_points)
+
+        elif spacing == "curvature":
+            def density(x_fine):
+                y = self._contour(x_fine)
+                dydx = np.gradient(y, x_fine)
+                curvature = np.abs(np.gradient(dydx, x_fine))/(1 + dydx**2)**1.5
+
+                #Saturate at a radius of curvature equal to the throat radius, so the corners between straight sections don't take all the stations
+                return 1 + (clustering - 1)*np.minimum(curvature*self.nozzle.Rt, 1)
+
+            x = self._equidistribute(density, number_of_points)
+
+        else:
+            raise ValueError(f"'{spacing}' is not a valid spacing. Try 'uniform', 'throat' or 'curvature'.")
+
+        radii = self.layers(x)
+        mesh = EngineMesh(x = x, radii = radii, wall_thickness = self.thickness(x, layer = 'wall'))
+
+        if self.has_ablative:
+            mesh.ablative_thickness = self.thickness(x, layer = 'ablative')
+
+        if self.has_cooling_jacket:
+            mesh.channel_area = np.broadcast_to(self.cooling_jacket.A(y = radii['wall in']), x.shape).copy()
+            mesh.channel_D = np.broadcast_to(self.cooling_jacket.D(y = radii['wall in']), x.shape).copy()
+            mesh.channel_length = self._channel_length(x, radii['wall out'])
+
+        return mesh
+
+    def _equidistribute(self, density, number_of_points):
+        """Place stations so that each interval contains an equal integral of a station 'density' function. Returns them running from x_max to x_min.
+        """
+        x_fine = np.linspace(self.geometry.x_min, self.geometry.x_max, max(20*number_of_points, 10000))
+        f = density(x_fine)
+
+        #Cumulative integral of the density (trapezium rule), normalised to run from 0 to 1
+        cumulative = np.concatenate([[0], np.cumsum((f[1:] + f[:-1])/2 * np.diff(x_fine))])
+        cumulative = cumulative/cumulative[-1]
+
+        x = np.interp(np.linspace(1, 0, number_of_points), cumulative, x_fine)
+        x[0], x[-1] = self.geometry.x_max, self.geometry.x_min     #Remove any rounding errors at the ends
+
+        return x
+
+    def refine_mesh(self, mesh, values, tolerance):
+        """Error-controlled mesh refinement. A new station is added halfway along every interval where 'values' (e.g. q_dot from a heating analysis) changes by more than 'tolerance', 
+        as a fraction of the largest magnitude in 'values'.
+
+        Args:
+            mesh (EngineMesh): Mesh to refine.
+            values (array): A result at each station of the mesh. NaNs are ignored.
+            tolerance (float): Largest allowable change in 'values' between neighbouring stations, as a fraction of max(abs(values)).
+
+        Returns:
+            EngineMesh or None: The refined mesh, or None if no intervals needed refining.
+        """
+        values = np.asarray(values, dtype = 'float')
+        change = np.abs(np.diff(values))
+        too_coarse = np.nan_to_num(change, nan = 0.0) > tolerance*np.nanmax(np.abs(values))
+
+        if not np.any(too_coarse):
+            return None
+
+        midpoints = (mesh.x[:-1][too_coarse] + mesh.x[1:][too_coarse])/2
+        return self.discretise(x = np.concatenate([mesh.x, midpoints]))
 
     #Thermodynamic properties as a function of position
     def M(self, x):
@@ -761,15 +1257,30 @@ class Engine:
 
         #If we're not at the throat:
         else:
-            def func_to_solve(Mach):
-                return self.chamber_conditions.mdot*(self.perfect_gas.cp*self.chamber_conditions.T0)**0.5 / (self.A(x)*self.chamber_conditions.p0) - m_bar(Mach, self.perfect_gas.gamma)
-            
-            if x > 0:
-                Mach = scipy.optimize.root_scalar(func_to_solve, bracket = [1,300], x0 = 1).root
-            else:
-                Mach = scipy.optimize.root_scalar(func_to_solve, bracket = [0,1], x0 = 0.5).root
+            m_bar_value = self.chamber_conditions.mdot*(self.perfect_gas.cp*self.chamber_conditions.T0)**0.5 / (self.A(x)*self.chamber_conditions.p0)
+            return M_from_m_bar(m_bar_value, self.perfect_gas.gamma, supersonic = x > 0)
 
-            return Mach
+    def M_array(self, xs):
+        """Get the exhaust gas Mach number at an array of positions, all in one go. Equivalent to calling Engine.M() at each x, but uses a single vectorised inversion of the area-Mach relation.
+
+        Args:
+            xs (array): Axial positions along the engine (m). Throat is at x = 0.
+
+        Returns:
+            array: Mach number of the freestream at each x.
+        """
+        xs = np.asarray(xs, dtype = 'float')
+
+        return self._M_from_A(xs, self.A(xs))
+
+    def _M_from_A(self, xs, A):
+        """Vectorised Mach number calculation, for when the flow areas 'A' at the positions 'xs' are already known.
+        """
+        m_bar_value = self.chamber_conditions.mdot*(self.perfect_gas.cp*self.chamber_conditions.T0)**0.5 / (A*self.chamber_conditions.p0)
+        Mach = M_from_m_bar(m_bar_value, self.perfect_gas.gamma, supersonic = xs > 0)
+
+        #M = 1 by definition at the throat
+        return np.where(xs == 0, 1.0, Mach)
 
     def T(self, x):
         """Get temperature at a position along the nozzle.
@@ -805,8 +1316,60 @@ class Engine:
         #p = rhoRT for an ideal gas, so rho = p/RT
         return self.p(x)/(self.T(x)*self.perfect_gas.R)
 
+    def flow_state(self, xs):
+        """Get all of the exhaust gas freestream properties at an array of positions. Everything is computed at once (with a single Mach number inversion), 
+        and the result is remembered, so asking for the same discretisation again is free.
+
+        Args:
+            xs (array): Axial positions along the engine (m). Throat is at x = 0.
+
+        Returns:
+            FlowState: Container with the attributes x, M, T, p, rho, v and A, which are arrays with one element per x.
+        """
+        xs = np.array(xs, dtype = 'float')
+        key = (xs.shape, xs.tobytes())
+
+        if key not in self._flow_states:
+            gamma = self.perfect_gas.gamma
+            A = self.A(xs)
+            Mach = self._M_from_A(xs, A)
+            temperature = T(self.chamber_conditions.T0, Mach, gamma)
+            pressure = p(self.chamber_conditions.p0, Mach, gamma)
+
+            #Forget the oldest flow state if we're storing too many
+            if len(self._flow_states) >= self.MAX_CACHED_FLOW_STATES:
+                del self._flow_states[next(iter(self._flow_states))]
+
+            self._flow_states[key] = FlowState(x = xs,
+                                               M = Mach, 
+                                               T = temperature, 
+                                               p = pressure, 
+                                               rho = pressure/(temperature*self.perfect_gas.R), 
+                                               v = Mach*(gamma*self.perfect_gas.R*temperature)**0.5, 
+                                               A = A)
+
+        return self._flow_states[key]
+
     
     #Thrust and performance functions
+    @property
+    def exit_state(self):
+        """ExitState: Exhaust gas properties at the nozzle exit plane, and the ambient pressure at which separation starts. Calculated the first time it's needed, and then 
+        stored until the nozzle, perfect_gas or chamber_conditions are replaced (or Engine.clear_flow_cache() is called)."""
+        if self._exit_state is None:
+            flow = self.flow_state([self.nozzle.length])
+            pc = self.chamber_conditions.p0
+
+            #Separation occurs when P_wall/P_amb = 0.583 * (P_amb/P_chamber)^(0.195). It will first occur when P_e = P_wall satisfies this equation, since P_e is the lowest pressure in the nozzle.
+            self._exit_state = ExitState(M = float(flow.M[0]),
+                                         T = float(flow.T[0]),
+                                         p = float(flow.p[0]),
+                                         rho = float(flow.rho[0]),
+                                         v = float(flow.v[0]),
+                                         separation_p_amb = ((flow.p[0]*pc**0.195)/0.583)**(1/1.195))
+
+        return self._exit_state
+
     def check_separation(self, p_amb):
         """Approximate check for nozzle separation. Based off page 17 of Reference [2].  
         separation occurs when P_wall/P_amb = 0.583 * (P_amb/P_chamber)^(0.195)
@@ -817,23 +1380,19 @@ class Engine:
         Returns:
             bool or float: Returns the position x (m) from the throat at which separation occurs, if it does occur. If not, it returns False.
         """
-        
-        #Get the value of P_wall/P_amb requried for separation
-        separation_pressure_ratio = 0.583 * (p_amb/self.chamber_conditions.p0)**0.195
-
-        #separation can't occur if there's a vacuum outside:
-        if p_amb == 0:
+        #separation can't occur if there's a vacuum outside, or if the ambient pressure is below the value needed for separation at the exit (where the pressure is lowest)
+        if p_amb == 0 or p_amb <= self.exit_state.separation_p_amb:
             return False
 
-        #Check for separation by comparing to the lowest pressure in the nozzle (which will be at exit):
-        elif self.p(self.nozzle.length)/p_amb < separation_pressure_ratio:
-            def func_to_solve(x):
-                return self.p(x)/p_amb - separation_pressure_ratio  #Should equal zero at the separation point
-            
-            return scipy.optimize.root_scalar(func_to_solve, bracket = [0, self.nozzle.length], x0 = 0).root    #Find the separation position. 
-            
-        else:
-            return False
+        #Find where in the nozzle the separation occurs
+        import scipy.optimize
+
+        separation_pressure_ratio = 0.583 * (p_amb/self.chamber_conditions.p0)**0.195
+
+        def func_to_solve(x):
+            return self.p(x)/p_amb - separation_pressure_ratio  #Should equal zero at the separation point
+        
+        return scipy.optimize.root_scalar(func_to_solve, bracket = [0, self.nozzle.length], x0 = 0).root    #Find the separation position. 
 
     def separation_p_amb(self):
         """Approximate way of getting the ambient pressure at which nozzle wall separation occurs. Based off page 17 of Reference [2].  
@@ -843,9 +1402,7 @@ class Engine:
         Returns:
             float: Ambient pressure at which separation first occurs (Pa)
         """
-        pc = self.chamber_conditions.p0
-        pe = self.p(self.nozzle.length)
-        return ((pe*pc**0.195)/0.583)**(1/1.195)
+        return self.exit_state.separation_p_amb
 
     def separation_Ae(self, p_amb):
         """Approximate way of getting the exit area at which nozzle wall separation occurs. Based off page 17 of Reference [2].  
@@ -859,84 +1416,161 @@ class Engine:
         #Get the exit area that gives this wall pressure at the exit.
         return get_exit_area(self.perfect_gas, self.chamber_conditions, separation_wall_pressure)
 
-    def thrust(self, p_amb):
-        """Returns the thrust of the engine for a given ambient pressure.
+    def thrust(self, p_amb, return_separation = False):
+        """Returns the thrust of the engine for a given ambient pressure, or an array of ambient pressures. The nozzle exit state is only calculated once, however many pressures are given.
 
         Args:
-            p_amb (float): Ambient pressure (Pa)
+            p_amb (float or array): Ambient pressure (Pa)
+            return_separation (bool, optional): If True, also return a boolean mask which is True where the flow separates in the nozzle. Defaults to False.
 
         Returns:
-            float: Thrust (N)
+            float or array: Thrust (N). Where the flow separates in the nozzle, the thrust is NaN. If 'return_separation' is True, returns (thrust, separated) instead.
+
+        Raises:
+            ValueError: If a single ambient pressure is given (not an array), 'return_separation' is False, and the flow separates in the nozzle.
         """
-        if self.check_separation(p_amb) ==  False:
-            Me = self.M(self.nozzle.length)
-            Te = self.T(self.nozzle.length)
-            pe = self.p(self.nozzle.length)
+        p_amb_array = np.asarray(p_amb, dtype = 'float')
+        exit_state = self.exit_state
 
-            return self.chamber_conditions.mdot*Me*(self.perfect_gas.gamma*self.perfect_gas.R*Te)**0.5 + (pe - p_amb)*self.nozzle.Ae    #Generic equation for rocket thrust
-        
-        else:
+        #Separation first occurs at the exit, and happens at all ambient pressures above separation_p_amb
+        separated = p_amb_array > exit_state.separation_p_amb
+
+        if p_amb_array.ndim == 0 and separated and not return_separation:
             raise ValueError(f"separation occured in the nozzle, at a postion {self.check_separation(p_amb)} m downstream of the throat.")
 
-    def isp(self, p_amb):
-        """Returns the specific impulse for a given ambient pressure.
+        #Generic equation for rocket thrust
+        thrust = self.chamber_conditions.mdot*exit_state.v + (exit_state.p - p_amb_array)*self.nozzle.Ae
+        thrust = np.where(separated, np.nan, thrust)[()]
+
+        if return_separation:
+            return thrust, separated[()]
+
+        return thrust
+
+    def isp(self, p_amb, return_separation = False):
+        """Returns the specific impulse for a given ambient pressure, or an array of ambient pressures.
 
         Args:
-            p_amb (float): Ambient pressure (Pa)
+            p_amb (float or array): Ambient pressure (Pa)
+            return_separation (bool, optional): If True, also return a boolean mask which is True where the flow separates in the nozzle. Defaults to False.
 
         Returns:
-            float: Specific impulse (s)
+            float or array: Specific impulse (s). Where the flow separates in the nozzle, the specific impulse is NaN. If 'return_separation' is True, returns (isp, separated) instead.
+
+        Raises:
+            ValueError: If a single ambient pressure is given (not an array), 'return_separation' is False, and the flow separates in the nozzle.
         """
         global g0
+
+        if return_separation:
+            thrust, separated = self.thrust(p_amb, return_separation = True)
+            return thrust/(g0*self.chamber_conditions.mdot), separated
+
         return self.thrust(p_amb)/(g0*self.chamber_conditions.mdot)
 
-    def optimise_for_apogee(self, dry_mass, propellant_mass, cross_sectional_area, drag_coefficient = 0.75, dt = 0.2, debug=True):
-        """Runs a 1D trajectory simulation, and varies the nozzle area ratio in an attempt to maximise apogee. Replaces the engine's nozzle with the optimised nozzle upon completion.
+    def optimise_for_apogee(self, dry_mass, propellant_mass, cross_sectional_area, drag_coefficient = 0.75, dt = None, debug = True, grid_points = 16, max_workers = 1, xatol = 1e-3):
+        """Runs 1D trajectory simulations, and varies the nozzle area ratio in an attempt to maximise apogee. Replaces the engine's nozzle with the optimised nozzle upon completion
+        (the engine is not modified until then).
+
+        The apogee is first found on a coarse grid of area ratios (which can be run in parallel), and a cubic spline is fitted through the results as a cheap surrogate. The
+        optimum is then polished with a bounded search using exact trajectory simulations, warm started from the maximum of the surrogate and limited to the neighbouring grid points.
+
+        Note:
+            To optimise other design variables at the same time (e.g. chamber pressure, mass flow rate or L*), or to include constraints from the heating analysis, use bamboo.optimise.run_optimisation().
 
         Args:
             dry_mass (float): Dry mass of the launch vehicle (kg)
             propellant_mass (float): Initial mass of propellant inthe vehicle (kg)
             cross_sectional_area (float): Cross section area of the vehicle (used for calculating aerodynamic drag) (m^2)
             drag_coefficient (float, optional): Launch vehicle drag coefficient, assumed constant. Defaults to 0.75.
-            dt (float, optional): Timestep to use in numerical integration. Defaults to 0.2.
+            dt (float, optional): Timestep to use in estimate_apogee(). If None, the adaptive bamboo.trajectory.simulate() is used instead, which is smoother with respect to the area ratio (and so better for optimising). Defaults to None.
             debug (bool, optiona): If True the results of each iteration are printed. If False, nothing is printed.
+            grid_points (int, optional): Number of area ratios in the coarse grid. Defaults to 16.
+            max_workers (int, optional): Number of processes to evaluate the coarse grid with. If 1, everything runs in the current process. If None, uses one process per CPU. Defaults to 1.
+            xatol (float, optional): Absolute tolerance on the area ratio, for the polishing search. Defaults to 1e-3.
 
+        Returns:
+            float: The maximum apogee found (m)
         """
-        test_engine = self
-        At = test_engine.nozzle.At
+        import scipy.optimize
+        import scipy.interpolate
+        import concurrent.futures
+
+        At = self.nozzle.At
         bounds = np.array([1, 100])*At        #Hardcoded area ratio limits
 
         #We need to calculate bounds to avoid causing flow separation in the nozzle
-        Ae_for_sepeation = self.separation_Ae(ambiance.Atmosphere(0).pressure[0])    #Exit area that would cause separation at sea level.
+        Ae_for_sepeation = self.separation_Ae(bamboo.atmosphere.pressure(0))    #Exit area that would cause separation at sea level.
         if Ae_for_sepeation < bounds[1]:
             bounds[1] = Ae_for_sepeation
 
-        #Function to calculate apogee given the nozzle exit area Ae
-        def get_apogee(Ae):
-            #Throat area is fixed, we're simply varying the exit area
-            test_engine.nozzle = Nozzle(At, Ae, test_engine.nozzle.type, test_engine.nozzle.length_fraction)
-            apogee_estimate = estimate_apogee(dry_mass, propellant_mass, test_engine, cross_sectional_area, drag_coefficient, dt)
+        vehicle = (dry_mass, propellant_mass, cross_sectional_area, drag_coefficient, dt)
+
+        #Coarse grid of area ratios, evaluated in parallel if requested
+        area_ratios = np.linspace(bounds[0]/At, bounds[1]/At, grid_points)
+
+        if debug == True:
+            print(f"Starting optimisation with bounds Ae/At = {bounds/At}, using a grid of {grid_points} area ratios")
+
+        if max_workers == 1:
+            apogees = np.array([_apogee_for_area_ratio(self, area_ratio, *vehicle) for area_ratio in area_ratios])
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers = max_workers) as executor:
+                apogees = np.array(list(executor.map(_apogee_for_area_ratio, 
+                                                     [self]*grid_points, 
+                                                     area_ratios, 
+                                                     *[[value]*grid_points for value in vehicle])))
+
+        if debug == True:
+            for area_ratio, apogee in zip(area_ratios, apogees):
+                print(f"Area ratio = {area_ratio}, apogee = {apogee/1000} km")
+
+        #Fit a surrogate through the successful points, and find its maximum
+        valid = np.isfinite(apogees)
+
+        if np.count_nonzero(valid) < 2:
+            raise ValueError("The trajectory simulation failed for almost all of the area ratios in the grid, so the area ratio could not be optimised")
+
+        surrogate = scipy.interpolate.CubicSpline(area_ratios[valid], apogees[valid]) if np.count_nonzero(valid) > 3 else None
+        fine_area_ratios = np.linspace(area_ratios[valid][0], area_ratios[valid][-1], 100*grid_points)
+        fine_apogees = surrogate(fine_area_ratios) if surrogate is not None else np.interp(fine_area_ratios, area_ratios[valid], apogees[valid])
+        surrogate_optimum = fine_area_ratios[np.argmax(fine_apogees)]
+
+        #Polish with exact evaluations, between the grid points either side of the surrogate's optimum
+        index = np.searchsorted(area_ratios, surrogate_optimum)
+        bracket = (area_ratios[max(index - 1, 0)], area_ratios[min(index + 1, grid_points - 1)])
+
+        if debug == True:
+            print(f"Surrogate optimum at area ratio = {surrogate_optimum}, polishing between {bracket[0]} and {bracket[1]}")
+
+        def func_to_minimise(area_ratio):
+            apogee = _apogee_for_area_ratio(self, area_ratio, *vehicle)
 
             if debug == True:
-                print(f"Area ratio = {Ae/At}, apogee = {apogee_estimate/1000} km")
+                print(f"Area ratio = {area_ratio}, apogee = {apogee/1000} km")
 
-            return apogee_estimate
+            return -apogee if np.isfinite(apogee) else np.inf  #Negative of the apogee, since scipy can only minimise
 
-        def func_to_minimise(Ae):
-            return -get_apogee(Ae)  #Just make it the negative of the apogee - so we want to minimise the output of this function (scipy can only minimise, not maximise)
+        if bracket[1] > bracket[0]:
+            polished = scipy.optimize.minimize_scalar(func_to_minimise, bounds = bracket, method = "bounded", options = {"xatol" : xatol})
+            candidates = [(-polished.fun, polished.x)]
+        else:
+            candidates = []
 
-        if debug==True:
-            print(f"Starting optimisation with bounds Ae/At = {bounds/At}")
+        #Keep the best point found, in case the polish didn't improve on the grid
+        best_grid_index = np.nanargmax(np.where(valid, apogees, np.nan))
+        candidates.append((apogees[best_grid_index], area_ratios[best_grid_index]))
+        max_apogee, optimum_area_ratio = max(candidates)
 
-        optimum_Ae = scipy.optimize.minimize_scalar(func_to_minimise, bounds = bounds, method="bounded").x
-        max_apogee = get_apogee(optimum_Ae)
-        self.nozzle = Nozzle(At, optimum_Ae, self.nozzle.type, self.nozzle.length_fraction)
+        self.nozzle = Nozzle(At, optimum_area_ratio*At, self.nozzle.type, getattr(self.nozzle, "length_fraction", 0.8), getattr(self.nozzle, "cone_angle", 15))
 
         print(f"Area ratio optimised with Ae/At = {self.nozzle.Ae/self.nozzle.At}, giving apogee = {max_apogee/1000} km")
 
+        return max_apogee
+
 
     #Plotting functions
-    def plot_geometry(self, number_of_points = 1000, minimal = False, legend = True):
+    def plot_geometry(self, number_of_points = 1000, minimal = False, legend = True, mesh = None):
         """Plots the engine geometry. Note that all spiral cooling jacket geometry is shown with equally spaced rectangles, 
         even if irregularly spaced non-rectangular shapes are used. The rectangles have a width equal to the channel effective diameter,
         and an area equal to the channel flow area.
@@ -946,44 +1580,40 @@ class Engine:
             number_of_points (int, optional): Numbers of discrete points to plot. Defaults to 1000.
             minimal (bool, optional): If True, the engine contour is plotted as a single line. If False, the line's thickness will vary to show wall thickness, and other geometry details will be shown. Defaults to False.
             legend (bool, optional): If True a legend is shown. If False, it isn't. Defaults to True.
+            mesh (EngineMesh, optional): Discretised engine to plot, from Engine.discretise(). If given, 'number_of_points' is ignored. Defaults to None.
         """
+        import matplotlib.pyplot as plt
+        import matplotlib.patches
+
         try:
             self.geometry
         except AttributeError:
             raise AttributeError("Geometry has not been added, so can't run Engine.plot_geometry(). You need to add geometry with the 'Engine.add_geometry()' function.")
         
-        x = np.linspace(self.geometry.x_min, self.geometry.x_max, number_of_points)
+        if mesh is None:
+            mesh = self.discretise(number_of_points)
+
+        #Plot from the front of the engine to the back, so x is increasing
+        x = mesh.x[::-1]
+        radii = {key : value[::-1] for key, value in mesh.radii.items()}
 
         fig, axs = plt.subplots()
 
         #Minimalistic plotting - only show the engine contour, without any extra features
         if minimal:
-            y = np.zeros(len(x))
-            for i in range(len(x)):
-                y[i] = self.y(x[i])
+            y = radii['contour']
 
             axs.plot(x, y, color="blue")
             axs.plot(x, -y, color="blue")
 
         #Normal plotting - show any wall thickness to scale, display any ablatives, and show a representation of the cooling jacket
         else:
-            #Initialise arrays
             if self.has_ablative:
-                ablative_inner = np.zeros(len(x))
-                ablative_outer = np.zeros(len(x))
-
-            wall_inner = np.zeros(len(x))
-            wall_outer = np.zeros(len(x))
-            
-            for i in range(len(x)):
-                if self.has_ablative:
-                    #Get the ablative y values at each x
-                    ablative_inner[i] = self.y(x[i], up_to = 'ablative in')
-                    ablative_outer[i] = self.y(x[i], up_to = 'ablative out')
+                ablative_inner = radii['ablative in']
+                ablative_outer = radii['ablative out']
 
-                #Get the wall y values at each x
-                wall_inner[i] = self.y(x[i], up_to = 'wall in')
-                wall_outer[i] = self.y(x[i], up_to = 'wall out')
+            wall_inner = radii['wall in']
+            wall_outer = radii['wall out']
 
             if self.has_ablative:
                 #Plot the ablative to scale
@@ -1049,13 +1679,12 @@ class Engine:
         Args:
             number_of_points (int, optional): Number of points to discretise the plot into. Defaults to 1000.
         """
-        x = np.linspace(self.geometry.x_min, self.geometry.x_max, number_of_points)
-        y = np.zeros(len(x))
-        T = np.zeros(len(x))
+        import matplotlib.pyplot as plt
 
-        for i in range(len(x)):
-            y[i] = self.geometry.y(x[i])
-            T[i] = self.T(x[i])
+        x = np.linspace(self.geometry.x_min, self.geometry.x_max, number_of_points)
+        flow = self.flow_state(x)
+        y = (flow.A/np.pi)**0.5
+        T = flow.T
 
         fig, ax_shape = plt.subplots()
 
@@ -1076,13 +1705,12 @@ class Engine:
         Args:
             number_of_points (int, optional): Number of points to discretise the plot into. Defaults to 1000.
         """
-        x = np.linspace(self.geometry.x_min, self.geometry.x_max, number_of_points)
-        y = np.zeros(len(x))
-        M = np.zeros(len(x))
+        import matplotlib.pyplot as plt
 
-        for i in range(len(x)):
-            y[i] = self.geometry.y(x[i])
-            M[i] = self.M(x[i])
+        x = np.linspace(self.geometry.x_min, self.geometry.x_max, number_of_points)
+        flow = self.flow_state(x)
+        y = (flow.A/np.pi)**0.5
+        M = flow.M
 
         fig, ax_shape = plt.subplots()
 
@@ -1230,34 +1858,33 @@ class Engine:
             array: Discretised coolant path length array with "number_of_sections" elements. (m).
         """
         discretised_x = np.linspace(self.geometry.x_max, self.geometry.x_min, number_of_sections)
-        axis_length = self.geometry.x_max - self.geometry.x_min     # Axial engine length
-        discretised_length = []
+
+        return list(self._channel_length(discretised_x, self.y(discretised_x, up_to = "wall out")))
+
+    def _channel_length(self, discretised_x, y):
+        """Coolant path length between each pair of neighbouring stations, given the radius to the outside of the wall, 'y', at each station.
+        """
+        number_of_sections = len(discretised_x)
+        dx = np.abs(np.diff(discretised_x))                         # Axial length of each section
 
         if self.cooling_jacket.configuration == "spiral":
             pitch = self.cooling_jacket.channel_width               # No gaps between channels so spiral pitch = width
-            section_turns = axis_length/(pitch*number_of_sections)  # Number of turns per discrete section
+            section_turns = dx/pitch                                # Number of turns per discrete section
 
-            for i in range(number_of_sections-1):              
-                if self.has_ablative is True:
-                    y = self.geometry.chamber_radius
-                else:
-                    y = self.y(discretised_x[i], up_to = "wall out")
-                # Ignore the nozzle contours - jacket has constant radius if an ablative insert is present
-                 
-                radius_avg = (y + self.y(discretised_x[i+1], up_to = 'wall out'))/2
-                discretised_length.append(section_turns * np.sqrt(pitch**2 + (radius_avg*2*np.pi)**2))
-                # Find the average radius for this section and use it to determine the spiral section length
+            # Ignore the nozzle contours - jacket has constant radius if an ablative insert is present
+            if self.has_ablative is True:
+                y_start = np.full(number_of_sections - 1, self.geometry.chamber_radius)
+            else:
+                y_start = y[:-1]
 
-            return discretised_length
+            # Find the average radius for each section and use it to determine the spiral section length
+            radius_avg = (y_start + y[1:])/2
+            return section_turns * np.sqrt(pitch**2 + (radius_avg*2*np.pi)**2)
 
         if self.cooling_jacket.configuration == "vertical":
-            dx = discretised_x[0] - discretised_x[1]
+            dy = np.abs(np.diff(y))
 
-            for i in range(number_of_sections-1):
-                dy = np.abs(self.y(discretised_x[i], up_to = 'wall out') - self.y(discretised_x[i+1], up_to = 'wall out'))
-                discretised_length.append(np.sqrt(dy**2 + dx**2))
-
-            return discretised_length
+            return np.sqrt(dy**2 + dx**2)
 
         else:
             raise AttributeError("Invalid cooling channel configuration")
@@ -1273,14 +1900,13 @@ class Engine:
         Returns:
             float: Dimensionless friction factor
         """
-        mu = self.cooling_jacket.coolant_transport.mu(T=T, p=p)
-        rho = self.cooling_jacket.coolant_transport.rho(T=T, p=p)
+        coolant = self.cooling_jacket.coolant_transport.state(T=T, p=p)
         D = self.cooling_jacket.D(x, y)
-        v = self.cooling_jacket.coolant_velocity(rho, x, y)
+        v = self.cooling_jacket.coolant_velocity(coolant["rho"], x, y)
 
-        reynolds = rho*v*D/mu
+        reynolds = coolant["rho"]*v*D/coolant["mu"]
 
-        return ((0.79*np.log(reynolds)) - 1.64)**(-2)
+        return cool.friction_factor(reynolds)
 
     def Q_coolant(self, T, p, x = None, y = None):
         """Determine dynamic pressure of coolant.
@@ -1417,7 +2043,55 @@ class Engine:
 
         return q_dot, R_gas, R_ablative, R_wall, R_coolant,
 
-    def steady_heating_analysis(self, number_of_points=1000, h_gas_model = "1", h_coolant_model = "1", to_json = "heating_output.json"):
+    def results_metadata(self, analysis, **settings):
+        """Get a summary of the engine and simulation settings, to store alongside simulation results.
+
+        Args:
+            analysis (str): Name of the analysis that produced the results, e.g. 'steady_heating_analysis'.
+            **settings: Settings used for the analysis, e.g. h_gas_model = "1". Must be JSON serialisable.
+
+        Returns:
+            dict: Dictionary of metadata, which can be passed to bamboo.io.save_results().
+        """
+        engine = {"p0" : self.chamber_conditions.p0,
+                  "T0" : self.chamber_conditions.T0,
+                  "mdot" : self.chamber_conditions.mdot,
+                  "gamma" : self.perfect_gas.gamma,
+                  "molecular_weight" : self.perfect_gas.molecular_weight,
+                  "cp" : self.perfect_gas.cp,
+                  "At" : self.nozzle.At,
+                  "Ae" : self.nozzle.Ae,
+                  "nozzle_type" : self.nozzle.type,
+                  "has_cooling_jacket" : self.has_cooling_jacket,
+                  "has_ablative" : self.has_ablative}
+
+        if self.has_cooling_jacket:
+            engine["cooling_jacket"] = {"configuration" : self.cooling_jacket.configuration,
+                                        "inlet_T" : self.cooling_jacket.inlet_T,
+                                        "inlet_p0" : self.cooling_jacket.inlet_p0,
+                                        "mdot_coolant" : self.cooling_jacket.mdot_coolant,
+                                        "coolant_model" : self.cooling_jacket.coolant_transport.model}
+
+        units = {"x" : "m", "t" : "s", "T" : "K", "p" : "Pa", "q_dot" : "W/m", "q_Adot" : "W/m^2", "h" : "W/m^2/K", "R" : "K m/W", 
+                 "mu" : "Pa s", "k" : "W/m/K", "cp" : "J/kg/K", "rho" : "kg/m^3", "v" : "m/s"}
+
+        return {"analysis" : analysis, 
+                "settings" : settings, 
+                "engine" : engine, 
+                "units" : units}
+
+    def _export_results(self, output_dict, to_json, to_npz, metadata):
+        """Save simulation results (a HeatingResult) to a .JSON and/or .npz file, if requested.
+        """
+        if to_json != False and to_json is not None:
+            output_dict.to_json(to_json)
+            print("Exported JSON data to '{}'".format(to_json))
+
+        if to_npz is not None and to_npz != False:
+            bamboo.io.save_results(to_npz, output_dict, metadata = metadata)
+            print("Exported binary data to '{}'".format(to_npz))
+
+    def steady_heating_analysis(self, number_of_points=1000, h_gas_model = "1", h_coolant_model = "1", to_json = "heating_output.json", mesh = None, refine_tolerance = None, max_refinements = 5, to_npz = None, cache = None):
         """Steady state heating analysis. Can be used for regenarative cooling, or combined regenerative and ablative cooling.
 
         Args:
@@ -1425,12 +2099,17 @@ class Engine:
             h_gas_model (str, optional): Equation to use for the gas side convective heat transfer coefficients. Options are '1', '2' and '3'. Defaults to "1".
             h_coolant_model (str, optional): Equation to use for the coolant side convective heat transfer coefficients. Options are '1', '2' and '3'. Defaults to "1".
             to_json (str or bool, optional): Directory to export a .JSON file to, containing simulation results. If False, no .JSON file is saved. Defaults to 'heating_output.json'.
+            mesh (EngineMesh, optional): Discretised engine to use, from Engine.discretise(). If given, 'number_of_points' is ignored. Defaults to None.
+            refine_tolerance (float, optional): If given, the mesh is repeatedly refined with Engine.refine_mesh() until q_dot changes by less than this fraction of its maximum between neighbouring stations. Defaults to None (no refinement).
+            max_refinements (int, optional): Maximum number of refinement passes if using 'refine_tolerance'. Defaults to 5.
+            to_npz (str, optional): File path to export the results to in binary form, using bamboo.io.save_results(), which can be loaded much faster than .JSON files (with bamboo.io.load_results()). Defaults to None (no .npz file is saved).
+            cache (ResultCache, optional): If given, the results are loaded from this bamboo.cache.ResultCache if the same analysis has been run on an identical engine before, and stored in it otherwise. Defaults to None (no caching).
 
         Note:
             h_gas_model = '2' seems to provide questionable results (if it works at all) - use it with caution. h_coolant_model = '2' can raise errors if using the 'force_phase' setting with your coolant TransportProperties object. See the functions h_gas_1(), h_gas_2(), h_coolant_1(), etc.. in the documentation for details on each model.
 
         Returns:
-            dict: Results of the simulation. Contains the following dictionary keys: 
+            HeatingResult: Results of the simulation, which can be used like a dictionary of arrays (see bamboo.results.HeatingResult). Contains the following keys: 
                 - "x" : x positions corresponding to the rest of the data (m)
                 - "T_wall_inner" : Exhaust gas side wall temperature (K)
                 - "T_wall_outer" : Coolant side wall temperature (K)
@@ -1458,31 +2137,86 @@ class Engine:
         if h_gas_model == "2":
             print("WARNING: h_gas_model = '2' seems to provide questionable results (if it works at all) - use it with caution. ")
 
+        #Load the results from the cache if possible, otherwise run the analysis and store them
+        if cache is not None and not cache.bypass:
+            key = cache.key(self, 
+                            "steady_heating_analysis", 
+                            number_of_points = number_of_points if mesh is None else None, 
+                            h_gas_model = h_gas_model, 
+                            h_coolant_model = h_coolant_model, 
+                            mesh = mesh, 
+                            refine_tolerance = refine_tolerance, 
+                            max_refinements = max_refinements if refine_tolerance is not None else None)
+
+            output_dict = cache.get(key)
+
+            if output_dict is None:
+                output_dict = self.steady_heating_analysis(number_of_points = number_of_points, 
+                                                           h_gas_model = h_gas_model, 
+                                                           h_coolant_model = h_coolant_model, 
+                                                           to_json = False, 
+                                                           mesh = mesh, 
+                                                           refine_tolerance = refine_tolerance, 
+                                                           max_refinements = max_refinements)
+                cache.put(key, output_dict)
+
+            self._export_results(output_dict, to_json, to_npz, output_dict.metadata)
+
+            return output_dict
+
+        #Error-controlled mesh refinement, driven by changes in q_dot
+        if refine_tolerance is not None:
+            if mesh is None:
+                mesh = self.discretise(number_of_points)
+
+            for i in range(max_refinements):
+                output_dict = self.steady_heating_analysis(h_gas_model = h_gas_model, h_coolant_model = h_coolant_model, to_json = False, mesh = mesh)
+                refined_mesh = self.refine_mesh(mesh, output_dict["q_dot"], refine_tolerance)
+
+                if refined_mesh is None:
+                    break
+
+                mesh = refined_mesh
+
+            else:
+                output_dict = self.steady_heating_analysis(h_gas_model = h_gas_model, h_coolant_model = h_coolant_model, to_json = False, mesh = mesh)
+
+            output_dict.metadata["settings"]["refine_tolerance"] = refine_tolerance
+            self._export_results(output_dict, to_json, to_npz, output_dict.metadata)
+
+            return output_dict
+
         '''Initialise variables and arrays'''
         #To keep track of any coolant boiling
         boil_off_position = None
         too_low_pressure = False
 
         #Discretisation of the nozzle
-        discretised_x = np.linspace(self.geometry.x_max, self.geometry.x_min, number_of_points) #Run from the back end (the nozzle exit) to the front (chamber)
-        dx = discretised_x[0] - discretised_x[1]
+        if mesh is None:
+            mesh = self.discretise(number_of_points)
 
-        #Calculation of coolant channel length per "section"
-        channel_length = self.channel_geometry(number_of_sections=number_of_points)     #number_of_sections must be equal to number_of_points
+        discretised_x = mesh.x          #Runs from the back end (the nozzle exit) to the front (chamber)
+        flow = self.flow_state(discretised_x)
+
+        #Engine geometry at each x, and the coolant channel length per "section"
+        radii = mesh.radii
+        wall_thickness = mesh.wall_thickness
+        ablative_thickness = mesh.ablative_thickness
+        channel_length = mesh.channel_length
+
+        #The coolant pressure drop uses the channel size at the contour radius (the velocity and heat transfer coefficient use the inner wall radius, as in the mesh)
+        if self.has_cooling_jacket:
+            pressure_channel_area = np.broadcast_to(self.cooling_jacket.A(y = radii['contour']), discretised_x.shape)
+            pressure_channel_D = np.broadcast_to(self.cooling_jacket.D(y = radii['contour']), discretised_x.shape)
 
         #Data arrays to return
         T_wall_inner = np.full(len(discretised_x), float('NaN')) #Gas side wall temperature
         T_wall_outer = np.full(len(discretised_x), float('NaN')) #Coolant side wall temperature
-        T_gas = np.full(len(discretised_x), float('NaN'))        #Freestream gas temperature
         q_dot = np.full(len(discretised_x), float('NaN'))        #Heat transfer rate per unit length
         h_gas = np.full(len(discretised_x), float('NaN'))       #Gas side convective heat transfer coefficient
         R_gas =  np.full(len(discretised_x), float('NaN'))      #Gas side convective thermal resistance
         R_wall = np.full(len(discretised_x), float('NaN'))      #Wall thermal resistance
 
-        mu_gas = np.full(len(discretised_x), float('NaN'))      #Exhaust gas absolute viscosity
-        k_gas = np.full(len(discretised_x), float('NaN'))       #Exhaust gas thermal conductivity
-        Pr_gas = np.full(len(discretised_x), float('NaN'))      #Exhaust gas Prandtl number
-
         #Only relevant if there's a cooling jacket:
         T_coolant = np.full(len(discretised_x), float('NaN'))       #Coolant bulk temperature
         h_coolant = np.full(len(discretised_x), float('NaN'))       #Cooling side convective heat transfer coefficient
@@ -1502,53 +2236,52 @@ class Engine:
         R_ablative = np.full(len(discretised_x), float('NaN'))          #Ablative thermal resistance
 
 
-        '''Main loop'''
+        '''Exhaust gas side - this doesn't depend on the coolant, so can be done for every station at once'''
+        T_gas = np.array(flow.T)        #Freestream gas temperature
+
+        #Exhaust gas transport properties
+        exhaust = self.exhaust_transport.states(T = T_gas, p = flow.p)
+        mu_gas = np.array(exhaust["mu"], dtype = 'float')      #Exhaust gas absolute viscosity
+        k_gas = np.array(exhaust["k"], dtype = 'float')        #Exhaust gas thermal conductivity
+        Pr_gas = np.array(exhaust["Pr"], dtype = 'float')      #Exhaust gas Prandtl number
+
+        #h_gas_1() is also used for the first step of models '2' and '3', since they need the previous wall temperature
+        h_gas_1 = cool.h_gas_1(2*radii['contour'],
+                               flow.M,
+                               T_gas,
+                               flow.rho,
+                               self.perfect_gas.gamma,
+                               self.perfect_gas.R,
+                               mu_gas,
+                               k_gas,
+                               Pr_gas)
+
+        if h_gas_model == "2":
+            mu0 = self.exhaust_transport.mu(T = self.chamber_conditions.T0, p = self.chamber_conditions.p0)       #Stagnation viscosity
+
+        '''Main loop - marches the coolant state along the engine'''
         for i in range(len(discretised_x)):
             x = discretised_x[i]
-            T_gas[i] = self.T(x)
-
-            #Get exhaust gas transport properties
-            mu_gas[i] = self.exhaust_transport.mu(T = T_gas[i], p = self.p(x))
-            k_gas[i] = self.exhaust_transport.k(T = T_gas[i], p = self.p(x))
-            Pr_gas[i] = self.exhaust_transport.Pr(T = T_gas[i], p = self.p(x))
 
             if self.has_cooling_jacket and self.cooling_jacket.xs[0] <= x <= self.cooling_jacket.xs[1]:
                 #Gas side heat transfer coefficient
                 if h_gas_model == "1":
-                    h_gas[i] = cool.h_gas_1(2*self.y(x),
-                                            self.M(x),
-                                            T_gas[i],
-                                            self.rho(x),
-                                            self.perfect_gas.gamma,
-                                            self.perfect_gas.R,
-                                            mu_gas[i],
-                                            k_gas[i],
-                                            Pr_gas[i])
+                    h_gas[i] = h_gas_1[i]
 
                 elif h_gas_model == "2":
                     #We need the previous wall temperature to use h_gas_3. If we're on the first step, then just use h_gas_1()
                     if i == 0:
-                        h_gas[i] = cool.h_gas_1(2*self.y(x),
-                                                self.M(x),
-                                                T_gas[i],
-                                                self.rho(x),
-                                                self.perfect_gas.gamma,
-                                                self.perfect_gas.R,
-                                                mu_gas[i],
-                                                k_gas[i],
-                                                Pr_gas[i])
+                        h_gas[i] = h_gas_1[i]
                     #Use h_gas_2() for all subsequent steps                            
                     else:
-                        gamma = self.perfect_gas.gamma
                         R = self.perfect_gas.R
-                        D = 2*self.y(x)            #Flow diameter
+                        D = 2*radii['contour'][i]            #Flow diameter
 
                         #Freestream properties
-                        p_inf = self.p(x)
+                        p_inf = flow.p[i]
                         T_inf = T_gas[i]
-                        rho_inf = self.rho(x)
-                        M_inf = self.M(x)
-                        v_inf = M_inf * (gamma*R*T_inf)**0.5    #Gas velocity
+                        rho_inf = flow.rho[i]
+                        v_inf = flow.v[i]       #Gas velocity
                         mu_inf = mu_gas[i]
                         Pr_inf = Pr_gas[i]
                         cp_inf = self.perfect_gas.cp
@@ -1558,34 +2291,21 @@ class Engine:
                         mu_am = self.exhaust_transport.mu(T = T_am, p = p_inf)
                         rho_am = p_inf/(R*T_am)                                 #p = rho R T - pressure is roughly uniform across the boundary layer so p_inf ~= p_wall
 
-                        #Stagnation properties
-                        p0 = self.chamber_conditions.p0
-                        T0 = self.chamber_conditions.T0
-                        mu0 = self.exhaust_transport.mu(T =  T0, p = p0)
-
                         h_gas[i] = cool.h_gas_2(D, cp_inf, mu_inf, Pr_inf, rho_inf, v_inf, rho_am, mu_am, mu0)
 
                 elif h_gas_model == "3":
                     #We need the previous wall temperature to use h_gas_3. If we're on the first step, then just use h_gas_1()
                     if i == 0:
-                        h_gas[i] = cool.h_gas_1(2*self.y(x),
-                                                self.M(x),
-                                                T_gas[i],
-                                                self.rho(x),
-                                                self.perfect_gas.gamma,
-                                                self.perfect_gas.R,
-                                                mu_gas[i],
-                                                k_gas[i],
-                                                Pr_gas[i])
+                        h_gas[i] = h_gas_1[i]
 
                     #Use h_gas_3() for all subsequent steps
                     else:
                         h_gas[i] = cool.h_gas_3(self.c_star,
                                                 self.nozzle.At, 
-                                                self.A(x), 
+                                                flow.A[i], 
                                                 self.chamber_conditions.p0, 
                                                 self.chamber_conditions.T0, 
-                                                self.M(x), 
+                                                flow.M[i], 
                                                 T_wall_inner[i-1], 
                                                 mu_gas[i], 
                                                 self.perfect_gas.cp, 
@@ -1599,16 +2319,23 @@ class Engine:
                 if i == 0:
                     T_coolant[i] = self.cooling_jacket.inlet_T
                     p0_coolant[i] = self.cooling_jacket.inlet_p0
-                    p_coolant[i] = p0_coolant[i] - self.Q_coolant(T=T_coolant[i], p=p0_coolant[i], x=x, y=self.y(x))
+
+                    inlet = self.cooling_jacket.coolant_transport.state(T = T_coolant[i], p = p0_coolant[i])
+                    v_inlet = self.cooling_jacket.mdot_coolant/(inlet["rho"]*pressure_channel_area[i])
+                    p_coolant[i] = p0_coolant[i] - inlet["rho"]*v_inlet**2/2
 
                 else:
                     #Increase in coolant temperature, q*dx = mdot*Cp*dT
-                    T_coolant[i] = T_coolant[i-1] + (q_dot[i-1]*dx)/(self.cooling_jacket.mdot_coolant*cp_coolant[i-1]) 
+                    T_coolant[i] = T_coolant[i-1] + (q_dot[i-1]*mesh.dx[i-1])/(self.cooling_jacket.mdot_coolant*cp_coolant[i-1]) 
 
-                    #Pressure drop in coolant channel
-                    friction_factor = self.coolant_friction_factor(T=T_coolant[i], p=p_coolant[i-1], x=x, y=self.y(x))
-                    p0_coolant[i] = p0_coolant[i-1] - self.coolant_p0_drop(friction_factor, dl=channel_length[i-1], T=T_coolant[i], p=p_coolant[i-1], x=x, y=self.y(x))
-                    p_coolant[i] = p0_coolant[i] - self.Q_coolant(T=T_coolant[i], p=p_coolant[i-1], x=x, y=self.y(x)) # Update static pressure of coolant
+                    #Pressure drop in coolant channel - uses the properties at the new temperature but the old pressure, since we don't know the new pressure yet
+                    upstream = self.cooling_jacket.coolant_transport.state(T = T_coolant[i], p = p_coolant[i-1])
+                    v_upstream = self.cooling_jacket.mdot_coolant/(upstream["rho"]*pressure_channel_area[i])
+                    Q_upstream = upstream["rho"]*v_upstream**2/2
+                    friction_factor = cool.friction_factor(upstream["rho"]*v_upstream*pressure_channel_D[i]/upstream["mu"])
+
+                    p0_coolant[i] = p0_coolant[i-1] - friction_factor*channel_length[i-1]*Q_upstream/pressure_channel_D[i]
+                    p_coolant[i] = p0_coolant[i] - Q_upstream       #Update static pressure of coolant
 
                     if too_low_pressure == False and p0_coolant[i] < self.chamber_conditions.p0:
                         too_low_pressure = True
@@ -1618,17 +2345,18 @@ class Engine:
                         raise ValueError("Coolant stagnation pressure dropped below 0 bar - your coolant velocities may be too high.")
 
                 #Update coolant heat capacity, transport properties and velocity
-                Pr_coolant[i] = self.cooling_jacket.coolant_transport.Pr(T = T_coolant[i], p = p_coolant[i])
-                cp_coolant[i] = self.cooling_jacket.coolant_transport.cp(T = T_coolant[i], p = p_coolant[i])
-                mu_coolant[i] = self.cooling_jacket.coolant_transport.mu(T = T_coolant[i], p = p_coolant[i])
-                k_coolant[i] = self.cooling_jacket.coolant_transport.k(T = T_coolant[i], p = p_coolant[i])
-                rho_coolant[i] = self.cooling_jacket.coolant_transport.rho(T = T_coolant[i], p = p_coolant[i])
-                v_coolant[i] = self.cooling_jacket.coolant_velocity(rho_coolant[i], x=x, y = self.y(x, up_to = "wall in"))
+                coolant = self.cooling_jacket.coolant_transport.state(T = T_coolant[i], p = p_coolant[i])
+                Pr_coolant[i] = coolant["Pr"]
+                cp_coolant[i] = coolant["cp"]
+                mu_coolant[i] = coolant["mu"]
+                k_coolant[i] = coolant["k"]
+                rho_coolant[i] = coolant["rho"]
+                v_coolant[i] = self.cooling_jacket.mdot_coolant/(rho_coolant[i]*mesh.channel_area[i])     #mdot = rho*V*A
 
                 #Coolant side heat transfer coefficient
                 if h_coolant_model == "1":
-                    h_coolant[i] = cool.h_coolant_1(self.cooling_jacket.A(x=x, y=self.y(x=x, up_to = "wall in")), 
-                                                    self.cooling_jacket.D(x=x, y=self.y(x=x, up_to = "wall in")), 
+                    h_coolant[i] = cool.h_coolant_1(mesh.channel_area[i], 
+                                                    mesh.channel_D[i], 
                                                     self.cooling_jacket.mdot_coolant, 
                                                     mu_coolant[i], 
                                                     k_coolant[i], 
@@ -1640,7 +2368,7 @@ class Engine:
                     if i == 0:
                         h_coolant[i] = cool.h_coolant_3(rho_coolant[i], 
                                                         v_coolant[i], 
-                                                        self.cooling_jacket.D(x=x, y=self.y(x=x, up_to = "wall in")), 
+                                                        mesh.channel_D[i], 
                                                         mu_coolant[i], 
                                                         Pr_coolant[i], 
                                                         k_coolant[i])
@@ -1649,7 +2377,7 @@ class Engine:
                     else:
                         h_coolant[i] = cool.h_coolant_2(rho_coolant[i], 
                                                         v_coolant[i], 
-                                                        self.cooling_jacket.D(x=x, y=self.y(x=x, up_to = "wall in")), 
+                                                        mesh.channel_D[i], 
                                                         mu_coolant[i], 
                                                         self.cooling_jacket.coolant_transport.mu(T = T_wall_outer[i-1], p = p_coolant[i]), 
                                                         Pr_coolant[i], 
@@ -1658,7 +2386,7 @@ class Engine:
                 elif h_coolant_model == "3":
                     h_coolant[i] = cool.h_coolant_3(rho_coolant[i], 
                                                     v_coolant[i], 
-                                                    self.cooling_jacket.D(x=x, y=self.y(x=x, up_to = "wall in")), 
+                                                    mesh.channel_D[i], 
                                                     mu_coolant[i], 
                                                     Pr_coolant[i], 
                                                     k_coolant[i])
@@ -1667,22 +2395,22 @@ class Engine:
                     raise AttributeError(f"Could not find the h_coolant_model '{h_coolant_model}'")
                 
                 #Check for coolant boil off 
-                if boil_off_position == None and self.cooling_jacket.coolant_transport.check_liquid(T = T_coolant[i], p = p_coolant[i]) == False:
+                if boil_off_position == None and coolant["liquid"] == False:
                     print(f"WARNING: Coolant boiled off at x = {x} m")
                     boil_off_position = x
 
                 #Get thermal circuit properties
                 if self.has_ablative and self.ablative.xs[0] <= x <= self.ablative.xs[1]:
                     #Thermal circuit
-                    q_dot[i], R_gas[i], R_ablative[i], R_wall[i], R_coolant[i] = self.regen_ablative_thermal_circuit(self.y(x), 
+                    q_dot[i], R_gas[i], R_ablative[i], R_wall[i], R_coolant[i] = self.regen_ablative_thermal_circuit(radii['contour'][i], 
                                                                                                             h_gas[i], 
                                                                                                             h_coolant[i], 
                                                                                                             self.ablative.wall_material, 
-                                                                                                            self.thickness(x, layer = 'wall'), 
+                                                                                                            wall_thickness[i], 
                                                                                                             T_gas[i], 
                                                                                                             T_coolant[i], 
                                                                                                             self.ablative.ablative_material, 
-                                                                                                            self.thickness(x, layer = 'ablative'))
+                                                                                                            ablative_thickness[i])
                     
                     #Calculate wall temperatures using the thermal circuit idea
                     T_ablative_inner[i] = T_gas[i] - q_dot[i]*R_gas[i]
@@ -1690,11 +2418,11 @@ class Engine:
                     T_wall_outer[i] = T_wall_inner[i] - q_dot[i]*R_wall[i]
                 
                 else:
-                    q_dot[i], R_gas[i], R_wall[i], R_coolant[i] = self.regen_thermal_circuit(self.y(x), 
+                    q_dot[i], R_gas[i], R_wall[i], R_coolant[i] = self.regen_thermal_circuit(radii['contour'][i], 
                                                                                     h_gas[i], 
                                                                                     h_coolant[i], 
                                                                                     self.cooling_jacket.inner_wall, 
-                                                                                    self.thickness(x, layer = 'wall'), 
+                                                                                    wall_thickness[i], 
                                                                                     T_gas[i], 
                                                                                     T_coolant[i])
 
@@ -1709,56 +2437,73 @@ class Engine:
         if h_coolant_model == '2' and self.cooling_jacket.coolant_transport.check_liquid(T = np.amax(T_wall_outer[i]), p = p_coolant[-1]) == False:
             print("Coolant temperature at the wall was above its boiling point when using the Sieder-Tate equation (h_coolant_model = '2') - results should be used with caution.")
 
-        #Dictionary containing results
-        output_dict = {"x" : list(discretised_x),
-                "q_dot" : list(q_dot),
-                "T_ablative_inner": list(T_ablative_inner),
-                "T_wall_inner" : list(T_wall_inner),
-                "T_wall_outer" : list(T_wall_outer),
-                "T_coolant" : list(T_coolant),
-                "T_gas" : list(T_gas),
-                "h_gas" : list(h_gas),
-                "h_coolant" : list(h_coolant),
-                "R_gas" : list(R_gas),
-                "R_ablative" : list(R_ablative),
-                "R_wall" : list(R_wall),
-                "R_coolant" : list(R_coolant),
-                "p_coolant" : list(p_coolant),
-                "p0_coolant" : list(p0_coolant),
-                "mu_gas" : list(mu_gas),
-                "k_gas" : list(k_gas),
-                "Pr_gas" : list(Pr_gas),
-                "Pr_coolant" : list(Pr_coolant),
-                "mu_coolant" : list(mu_coolant),
-                "k_coolant" : list(k_coolant),
-                "cp_coolant" : list(cp_coolant),
-                "rho_coolant" : list(rho_coolant),
-                "v_coolant" : list(v_coolant),
-                "boil_off_position" : boil_off_position}
-
-        #Export a .JSON file if required
-        if to_json != False:
-            with open(to_json, "w+") as write_file:
-                json.dump(output_dict, write_file)
-                print("Exported JSON data to '{}'".format(to_json))
+        #Results, which can be used like a dictionary
+        fields = {"q_dot" : q_dot,
+                  "T_ablative_inner": T_ablative_inner,
+                  "T_wall_inner" : T_wall_inner,
+                  "T_wall_outer" : T_wall_outer,
+                  "T_coolant" : T_coolant,
+                  "T_gas" : T_gas,
+                  "h_gas" : h_gas,
+                  "h_coolant" : h_coolant,
+                  "R_gas" : R_gas,
+                  "R_ablative" : R_ablative,
+                  "R_wall" : R_wall,
+                  "R_coolant" : R_coolant,
+                  "p_coolant" : p_coolant,
+                  "p0_coolant" : p0_coolant,
+                  "mu_gas" : mu_gas,
+                  "k_gas" : k_gas,
+                  "Pr_gas" : Pr_gas,
+                  "Pr_coolant" : Pr_coolant,
+                  "mu_coolant" : mu_coolant,
+                  "k_coolant" : k_coolant,
+                  "cp_coolant" : cp_coolant,
+                  "rho_coolant" : rho_coolant,
+                  "v_coolant" : v_coolant}
+
+        metadata = self.results_metadata("steady_heating_analysis", 
+                                         h_gas_model = h_gas_model, 
+                                         h_coolant_model = h_coolant_model, 
+                                         number_of_points = len(discretised_x))
+
+        output_dict = bamboo.results.HeatingResult(x = discretised_x, 
+                                                   fields = fields, 
+                                                   extras = {"boil_off_position" : boil_off_position}, 
+                                                   metadata = metadata)
+
+        #Export a .JSON or .npz file if required
+        self._export_results(output_dict, to_json, to_npz, metadata)
 
         return output_dict
 
-    def transient_heating_analysis(self, number_of_points=1000, dt = 0.1, t_max = 100, wall_starting_T = 298.15, h_gas_model = "1", to_json = "heating_output.json"):
-        """This is used exclusive for pure ablative cooling, without any regenerative cooling jacket.
-
-        Note:
-            This function is outdated and does not incorporate many new features that have been added to Bamboo.
+    def transient_heating_steps(self, number_of_points=1000, dt = 0.1, t_max = 100, wall_starting_T = 298.15, h_gas_model = "1", mesh = None, method = "implicit",
+                                adaptive = False, tolerance = 0.1, events = None):
+        """Generator that runs the transient heating analysis one time step at a time, yielding the state of the engine at each step. Only the current step is held 
+        in memory. See Engine.transient_heating_analysis() for a description of the model.
 
         Args:
-            number_of_points (int, optional): [description]. Defaults to 1000.
-            dt (float, optional): Timestep (s). Defaults to 0.1.
+            number_of_points (int, optional): Number of discrete points to split the engine into. Defaults to 1000.
+            dt (float, optional): Timestep (s). If 'adaptive' is True, this is the first timestep. Defaults to 0.1.
             t_max (float, optional): Maximum time to run to (s). Defaults to 100
             wall_starting_T (float, optional): Starting temperature for the wall (K). Defaults to 298.15.
-            h_gas_model (str, optional): [description]. Defaults to "1".
-            to_json (str, optional): [description]. Defaults to "heating_output.json".
-
-
+            h_gas_model (str, optional): Equation to use for the gas side convective heat transfer coefficients. Options are '1', '2' and '3'. Models '2' and '3' use the ablative surface temperature from the previous time step. Defaults to "1".
+            mesh (EngineMesh, optional): Discretised engine to use, from Engine.discretise(). If given, 'number_of_points' is ignored. Defaults to None.
+            method (str, optional): Time integration method. 'explicit' is forward Euler, which is only stable for timesteps shorter than the thermal time constant of the wall. 
+                                    'implicit' is backward Euler and 'crank-nicolson' is the trapezium rule, which are both unconditionally stable ('crank-nicolson' is more accurate, 
+                                    but can oscillate if the timestep is much longer than the time constant). Defaults to "implicit".
+            adaptive (bool, optional): If True, the timestep is adjusted to keep the estimated error in wall temperature per step below 'tolerance', and the simulation runs up to and including t_max. 
+                                       The error is estimated from the difference between the 'implicit' and 'crank-nicolson' steps, so an implicit method is required. Defaults to False.
+            tolerance (float, optional): Maximum estimated error in wall temperature per step for adaptive stepping (K). Defaults to 0.1.
+            events (list, optional): Functions of the form event(t, state) that return a float, where 'state' is a dictionary containing the arrays 'T_wall', 'T_ablative_inner', 
+                                     'T_ablative_outer', 'T_gas', 'q_dot', 'h_gas' and 'dT_dt' (the rate of change of wall temperature). An event occurs when the return value changes sign, and its time is 
+                                     found by linear interpolation. Like scipy.integrate.solve_ivp(), event functions can have a 'terminal' attribute (if True, the simulation stops at the end of the 
+                                     step where the event occurred) and a 'direction' attribute (1 or -1 to only detect rising or falling zero crossings). See bamboo.cooling.steady_state_event(), 
+                                     bamboo.cooling.wall_temperature_event() and bamboo.cooling.time_event(). Defaults to None.
+
+        Yields:
+            dict: The state at each time step, containing the time 't' (s), the axial positions 'x' (m), the arrays 'T_wall', 'T_ablative_inner', 'T_ablative_outer', 'T_gas', 
+            'q_dot', 'h_gas' and 'dT_dt' with one value per station, and 'events' - a list of (event_index, event_time) for any events that occurred during the step.
         """
         try:
             self.geometry
@@ -1773,147 +2518,361 @@ class Engine:
         try:
             self.ablative
         except AttributeError:
-            raise AttributeError("Cannot run heating analysis without an exhaust gas transport properties model. You need to add one with the 'Engine.add_exhaust_transport()' function.")
+            raise AttributeError("Cannot run transient heating analysis without an ablative. You need to add one with the 'Engine.add_ablative()' function.")
 
-        print("Starting transient heating analysis")
+        if method not in ["explicit", "implicit", "crank-nicolson"]:
+            raise ValueError(f"'{method}' is not a valid method. Try 'explicit', 'implicit' or 'crank-nicolson'.")
+
+        if h_gas_model not in ["1", "2", "3"]:
+            raise AttributeError(f"Could not find the h_gas_model '{h_gas_model}'")
+
+        if adaptive and method == "explicit":
+            raise ValueError("Adaptive time stepping requires method = 'implicit' or 'crank-nicolson'")
+
+        if events is None:
+            events = []
 
         '''Initialise variables and arrays'''
         #Discretisation of the nozzle
-        discretised_x = np.linspace(self.geometry.x_max, self.geometry.x_min, number_of_points) #Run from the back end (the nozzle exit) to the front (chamber)
-        discretised_t = np.arange(0, t_max, dt)
-        dx = discretised_x[0] - discretised_x[1]
+        if mesh is None:
+            mesh = self.discretise(number_of_points)
+
+        discretised_x = mesh.x          #Runs from the back end (the nozzle exit) to the front (chamber)
+        flow = self.flow_state(discretised_x)
+        contour = mesh.radii['contour']
+        ablative_thickness = mesh.ablative_thickness
+        wall_material = self.ablative.wall_material
+
+        '''Things that don't change with time'''
+        #Freestream gas temperature and exhaust transport properties
+        T_gas = np.array(flow.T)
+        exhaust = self.exhaust_transport.states(T = T_gas, p = flow.p)
+        mu_gas = np.array(exhaust["mu"], dtype = 'float')
+        k_gas = np.array(exhaust["k"], dtype = 'float')
+        Pr_gas = np.array(exhaust["Pr"], dtype = 'float')
+
+        if h_gas_model == "1":
+            h_gas_constant = cool.h_gas_1(2*contour,
+                                          flow.M,
+                                          T_gas,
+                                          flow.rho,
+                                          self.perfect_gas.gamma,
+                                          self.perfect_gas.R,
+                                          mu_gas,
+                                          k_gas,
+                                          Pr_gas)
+
+        elif h_gas_model == "2":
+            mu0 = self.exhaust_transport.mu(T = self.chamber_conditions.T0, p = self.chamber_conditions.p0)       #Stagnation viscosity
+
+        #Heat capacity of the wall behind the ablative, per unit length
+        r_wall_in = contour + ablative_thickness
+        r_wall_out = r_wall_in + mesh.wall_thickness
+        heat_capacity = wall_material.c * wall_material.rho * np.pi * (r_wall_out**2 - r_wall_in**2)
 
-        #Discretised liner thickness
-        liner = self.map_thickness_profile(self.geometry.inner_wall_thickness, number_of_points)
+        '''Main loop'''
+        t = 0.0
+        T = np.full(len(discretised_x), float(wall_starting_T))    #Current wall temperature
+        T_surface = T                   #Estimate of the ablative surface temperature, for the h_gas models that need one
+        number_of_steps = len(np.arange(0, t_max, dt))              #Only used for fixed time steps
+        step_index = 0
+        t_previous = t                  #Time of the previous step, for locating events
+        previous_event_values = None
+
+        while True:
+            #Gas side heat transfer coefficient
+            if h_gas_model == "1":
+                h = h_gas_constant
+
+            elif h_gas_model == "2":
+                #Properties at arithmetic mean of T_wall and T_inf
+                T_am = (T_gas + T_surface) / 2
+                mu_am = np.array(self.exhaust_transport.states(T = T_am, p = flow.p)["mu"], dtype = 'float')
+                rho_am = flow.p/(self.perfect_gas.R*T_am)               #p = rho R T - pressure is roughly uniform across the boundary layer so p_inf ~= p_wall
+
+                h = cool.h_gas_2(2*contour, self.perfect_gas.cp, mu_gas, Pr_gas, flow.rho, flow.v, rho_am, mu_am, mu0)
+
+            elif h_gas_model == "3":
+                h = cool.h_gas_3(self.c_star,
+                                 self.nozzle.At, 
+                                 flow.A, 
+                                 self.chamber_conditions.p0, 
+                                 self.chamber_conditions.T0, 
+                                 flow.M, 
+                                 T_surface, 
+                                 mu_gas, 
+                                 self.perfect_gas.cp, 
+                                 self.perfect_gas.gamma, 
+                                 Pr_gas)
+
+            #Get thermal circuit properties
+            q, R_gas, R_ablative = self.ablative_thermal_circuit(contour, 
+                                                                 h, 
+                                                                 self.ablative.ablative_material, 
+                                                                 ablative_thickness, 
+                                                                 T_gas, 
+                                                                 T)
+
+            #Calculate wall temperatures
+            T_inner = T_gas - q*R_gas
+            T_outer = T_inner - q*R_ablative
+            T_surface = T_inner
+
+            state = {"t" : t,
+                     "x" : discretised_x,
+                     "T_wall" : T, 
+                     "T_ablative_inner" : T_inner, 
+                     "T_ablative_outer" : T_outer, 
+                     "T_gas" : T_gas,
+                     "q_dot" : q, 
+                     "h_gas" : np.broadcast_to(h, T.shape), 
+                     "dT_dt" : q/heat_capacity,
+                     "events" : []}
+
+            #Check for events
+            if len(events) > 0:
+                event_values = [event(t, state) for event in events]
+                stop = False
+
+                if previous_event_values is not None:
+                    for k in range(len(events)):
+                        old_value, new_value = previous_event_values[k], event_values[k]
+                        direction = getattr(events[k], "direction", 0)
+
+                        rising = old_value < 0 <= new_value
+                        falling = old_value > 0 >= new_value
+
+                        if (rising and direction >= 0) or (falling and direction <= 0):
+                            state["events"].append((k, float(t_previous + (t - t_previous) * old_value/(old_value - new_value))))
+
+                            if getattr(events[k], "terminal", False):
+                                stop = True
+
+                if stop:
+                    yield state
+                    return
+
+                previous_event_values = event_values
+
+            yield state
+
+            #Step the wall temperature forward in time. With h_gas fixed over the step, dT_wall/dt = (T_gas - T_wall)/(R*C), where R*C is the thermal time constant.
+            time_constant = (R_gas + R_ablative)*heat_capacity
+            t_previous = t
+
+            if adaptive:
+                if t >= t_max:
+                    return
+
+                while True:
+                    step = min(dt, t_max - t)
+                    a = step/time_constant
+
+                    T_implicit = (T + a*T_gas)/(1 + a)
+                    T_crank_nicolson = ((1 - a/2)*T + a*T_gas)/(1 + a/2)
+                    error = np.amax(np.abs(T_crank_nicolson - T_implicit))
+
+                    #Local error of the implicit step scales with step**2
+                    factor = 0.9*(tolerance/error)**0.5 if error > 0 else 5
+
+                    if error <= tolerance:
+                        dt = step*min(factor, 5)
+                        break
+                    else:
+                        dt = step*max(factor, 0.2)
 
-        #Temperatures and heat transfer rates - everything is a 2D array, with indexes [time_index, space_index]
-        T_wall = np.zeros([len(discretised_t), len(discretised_x)]) 
-        T_ablative_inner = np.zeros([len(discretised_t), len(discretised_x)]) 
-        T_ablative_outer = np.zeros([len(discretised_t), len(discretised_x)]) 
-        T_gas = np.zeros([len(discretised_t), len(discretised_x)]) 
-        q_dot = np.zeros([len(discretised_t), len(discretised_x)]) 
-        h_gas = np.zeros([len(discretised_t), len(discretised_x)]) 
+                T = T_implicit if method == "implicit" else T_crank_nicolson
 
-        '''Main loop'''
-        for i in range(len(discretised_t)):
-            if i%50 == 0:
-                print(f"{100*i/len(discretised_t)}% complete")
+                #Avoid ending up a tiny distance short of t_max due to rounding errors
+                t = t_max if step == t_max - t else t + step
 
-            for j in range(len(discretised_x)):
-                t = discretised_t[i]
-                x = discretised_x[j]
+            else:
+                step_index += 1
 
-                #Freestream gas temperature 
-                T_gas[i, j] = self.T(x)
+                if step_index >= number_of_steps:
+                    return
 
-                #Ablative thickness (currently a placeholder for custom thicknesses)
-                ablative_thickness = self.geometry.chamber_radius - self.y(x)
+                a = dt/time_constant
 
-                #Gas side heat transfer coefficient
-                if h_gas_model == "1":
-                    h_gas[i, j] = cool.h_gas_1(2*self.y(x),
-                                            self.M(x),
-                                            T_gas[i, j],
-                                            self.rho(x),
-                                            self.perfect_gas.gamma,
-                                            self.perfect_gas.R,
-                                            self.exhaust_transport.mu(T = T_gas[i, j], p = self.p(x)),
-                                            self.exhaust_transport.k(T = T_gas[i, j], p = self.p(x)),
-                                            self.exhaust_transport.Pr(T = T_gas[i, j], p = self.p(x)))
+                if method == "explicit":
+                    T = T + a*(T_gas - T)
 
-                elif h_gas_model == "2":
-                    gamma = self.perfect_gas.gamma
-                    R = self.perfect_gas.R
-                    D = 2*self.y(x)            #Flow diameter
-
-                    #Freestream properties
-                    p_inf = self.p(x)
-                    T_inf = T_gas[i, j]
-                    rho_inf = self.rho(x)
-                    M_inf = self.M(x)
-                    v_inf = M_inf * (gamma*R*T_inf)**0.5    #Gas velocity
-                    mu_inf = self.exhaust_transport.mu(T = T_gas[i, j], p = p_inf)
-                    Pr_inf = self.exhaust_transport.Pr(T = T_gas[i, j], p = p_inf)
-                    cp_inf = self.perfect_gas.cp
-
-                    #Properties at arithmetic mean of T_wall and T_inf
-                    T_am = (T_inf + T_ablative_inner[i, j-1]) / 2
-                    mu_am = self.exhaust_transport.mu(T = T_am, p = p_inf)
-                    rho_am = p_inf/(R*T_am)                                 #p = rho R T - pressure is roughly uniform across the boundary layer so p_inf ~= p_wall
-
-                    #Stagnation properties
-                    p0 = self.chamber_conditions.p0
-                    T0 = self.chamber_conditions.T0
-                    mu0 = self.exhaust_transport.mu(T =  T0, p = p0)
-
-                    h_gas[i, j] = cool.h_gas_2(D, cp_inf, mu_inf, Pr_inf, rho_inf, v_inf, rho_am, mu_am, mu0)
+                elif method == "implicit":
+                    T = (T + a*T_gas)/(1 + a)
 
-                elif h_gas_model == "3":
-                    h_gas[i, j] = cool.h_gas_3(self.c_star,
-                                            self.nozzle.At, 
-                                            self.A(x), 
-                                            self.chamber_conditions.p0, 
-                                            self.chamber_conditions.T0, 
-                                            self.M(x), 
-                                            T_ablative_inner[i, j-1], 
-                                            self.exhaust_transport.mu(T = T_gas[i, j], p = self.p(x)), 
-                                            self.perfect_gas.cp, 
-                                            self.perfect_gas.gamma, 
-                                            self.exhaust_transport.Pr(T = T_gas[i, j], p = self.p(x)))
+                elif method == "crank-nicolson":
+                    T = ((1 - a/2)*T + a*T_gas)/(1 + a/2)
 
-                else:
-                    raise AttributeError(f"Could not find the h_gas_model '{h_gas_model}'")
+                t = step_index*dt
 
-                #Get thermal circuit properties
-                q_dot[i, j], R_gas, R_ablative = self.ablative_thermal_circuit(self.y(x), 
-                                                                                   h_gas[i, j], 
-                                                                                   self.ablative.ablative_material, 
-                                                                                   ablative_thickness, 
-                                                                                   T_gas[i, j], 
-                                                                                   T_wall[i-1, j])
-
-                #Calculate wall temperatures
-                T_ablative_inner[i, j] = T_gas[i, j] - q_dot[i, j]*R_gas
-                T_ablative_outer[i, j] = T_ablative_inner[i, j] - q_dot[i, j]*R_ablative
-
-                #Find the rise in wall temperature - assume only radial heat transfer
-                if i == 0:
-                    T_wall[i, j] = wall_starting_T
+    def transient_heating_analysis(self, number_of_points=1000, dt = 0.1, t_max = 100, wall_starting_T = 298.15, h_gas_model = "1", to_json = "heating_output.json", mesh = None, method = "implicit",
+                                   adaptive = False, tolerance = 0.1, events = None, stride = 1, to_directory = None, to_npz = None, cache = None):
+        """This is used exclusive for pure ablative cooling, without any regenerative cooling jacket. 
+        
+        Each station is treated as a ring of wall behind the ablative, which is heated through the gas side convective resistance and ablative conductive resistance 
+        (heat transfer is radial only). All of the stations are stepped forward in time at once. To process the results one step at a time instead of storing them, 
+        use Engine.transient_heating_steps().
 
-                else:
-                    dV = np.pi*((self.y(x) + ablative_thickness + self.ablative.wall_thickness)**2 - (self.y(x) + ablative_thickness)**2)*dx         #Volume of wall
-                    dm = dV*self.ablative.wall_material.rho                                    #Mass of wall
+        Note:
+            This function is outdated and does not incorporate many new features that have been added to Bamboo.
+
+        Args:
+            number_of_points (int, optional): Number of discrete points to split the engine into. Defaults to 1000.
+            dt (float, optional): Timestep (s). If 'adaptive' is True, this is the first timestep. Defaults to 0.1.
+            t_max (float, optional): Maximum time to run to (s). Defaults to 100
+            wall_starting_T (float, optional): Starting temperature for the wall (K). Defaults to 298.15.
+            h_gas_model (str, optional): Equation to use for the gas side convective heat transfer coefficients. Options are '1', '2' and '3'. Models '2' and '3' use the ablative surface temperature from the previous time step. Defaults to "1".
+            to_json (str, optional): Directory to export a .JSON file to, containing simulation results. If False, no .JSON file is saved. Ignored if 'to_directory' is given. Defaults to "heating_output.json".
+            mesh (EngineMesh, optional): Discretised engine to use, from Engine.discretise(). If given, 'number_of_points' is ignored. Defaults to None.
+            method (str, optional): Time integration method. 'explicit' is forward Euler, which is only stable for timesteps shorter than the thermal time constant of the wall. 
+                                    'implicit' is backward Euler and 'crank-nicolson' is the trapezium rule, which are both unconditionally stable ('crank-nicolson' is more accurate, 
+                                    but can oscillate if the timestep is much longer than the time constant). Defaults to "implicit".
+            adaptive (bool, optional): If True, the timestep is adjusted to keep the estimated error in wall temperature per step below 'tolerance', and the simulation runs up to and including t_max. 
+                                       The error is estimated from the difference between the 'implicit' and 'crank-nicolson' steps, so an implicit method is required. Defaults to False.
+            tolerance (float, optional): Maximum estimated error in wall temperature per step for adaptive stepping (K). Defaults to 0.1.
+            events (list, optional): Functions of the form event(t, state) that return a float, where 'state' is a dictionary containing the arrays 'T_wall', 'T_ablative_inner', 
+                                     'T_ablative_outer', 'T_gas', 'q_dot', 'h_gas' and 'dT_dt' (the rate of change of wall temperature). An event occurs when the return value changes sign, and its time is 
+                                     found by linear interpolation. Like scipy.integrate.solve_ivp(), event functions can have a 'terminal' attribute (if True, the simulation stops at the end of the 
+                                     step where the event occurred) and a 'direction' attribute (1 or -1 to only detect rising or falling zero crossings). See bamboo.cooling.steady_state_event(), 
+                                     bamboo.cooling.wall_temperature_event() and bamboo.cooling.time_event(). Defaults to None.
+            stride (int, optional): Only store every 'stride'th time step (the last step is always stored). Defaults to 1.
+            to_directory (str, optional): If given, time steps are written to .npy files in this directory as the simulation runs instead of being stored in memory, 
+                                          using bamboo.io.StreamWriter. The results are then returned as memory-mapped arrays. Defaults to None.
+            to_npz (str, optional): File path to export the results to in binary form, using bamboo.io.save_results(). Ignored if 'to_directory' is given. Defaults to None (no .npz file is saved).
+            cache (ResultCache, optional): If given, the results are loaded from this bamboo.cache.ResultCache if the same analysis has been run on an identical engine before, and stored in it otherwise. 
+                                           Event functions are identified by their name and the variables they use from enclosing scopes. Ignored if 'to_directory' is given. Defaults to None (no caching).
+
+        Returns:
+            HeatingResult: Results of the simulation, which can be used like a dictionary of arrays (see bamboo.results.HeatingResult). 'x' and 't' are 1D arrays, 't_events' contains a list of 
+            event times for each event function, and every other key contains a 2D array with indexes [time_index, space_index]. If 'to_directory' is given, the arrays are read-only and memory-mapped.
+        """
+        if stride < 1:
+            raise ValueError("stride must be at least 1")
+
+        #Load the results from the cache if possible, otherwise run the analysis and store them
+        if cache is not None and not cache.bypass and to_directory is None:
+            key = cache.key(self, 
+                            "transient_heating_analysis", 
+                            number_of_points = number_of_points if mesh is None else None, 
+                            dt = dt, 
+                            t_max = t_max, 
+                            wall_starting_T = wall_starting_T, 
+                            h_gas_model = h_gas_model, 
+                            mesh = mesh, 
+                            method = method, 
+                            adaptive = adaptive, 
+                            tolerance = tolerance, 
+                            events = events, 
+                            stride = stride)
+
+            output_dict = cache.get(key)
+
+            if output_dict is None:
+                output_dict = self.transient_heating_analysis(number_of_points = number_of_points, 
+                                                              dt = dt, 
+                                                              t_max = t_max, 
+                                                              wall_starting_T = wall_starting_T, 
+                                                              h_gas_model = h_gas_model, 
+                                                              to_json = False, 
+                                                              mesh = mesh, 
+                                                              method = method, 
+                                                              adaptive = adaptive, 
+                                                              tolerance = tolerance, 
+                                                              events = events, 
+                                                              stride = stride)
+                cache.put(key, output_dict)
+
+            self._export_results(output_dict, to_json, to_npz, output_dict.metadata)
+
+            return output_dict
+
+        print("Starting transient heating analysis")
 
-                    #q_dot*dx*dt = m*c*dT
-                    T_wall[i, j] = T_wall[i-1, j] + q_dot[i, j]*dx*dt/(self.ablative.wall_material.c*dm)
+        if mesh is None:
+            mesh = self.discretise(number_of_points)
+
+        fields = ["T_wall", "T_ablative_inner", "T_ablative_outer", "T_gas", "q_dot", "h_gas"]
+        t_events = [[] for event in (events if events is not None else [])]
+
+        if to_directory is not None:
+            writer = bamboo.io.StreamWriter(to_directory, mesh.x, fields)
+            store = writer.write
+        else:
+            results = {field : [] for field in fields}
+            discretised_t = []
+
+            def store(t, state):
+                discretised_t.append(t)
+                for field in fields:
+                    results[field].append(state[field])
+
+        '''Main loop'''
+        try:
+            for i, state in enumerate(self.transient_heating_steps(dt = dt, 
+                                                                   t_max = t_max, 
+                                                                   wall_starting_T = wall_starting_T, 
+                                                                   h_gas_model = h_gas_model, 
+                                                                   mesh = mesh, 
+                                                                   method = method, 
+                                                                   adaptive = adaptive, 
+                                                                   tolerance = tolerance, 
+                                                                   events = events)):
+                for k, t_event in state["events"]:
+                    t_events[k].append(t_event)
+
+                stored = (i % stride == 0)
+
+                if stored:
+                    store(state["t"], state)
+
+            #Always keep the final state
+            if not stored:
+                store(state["t"], state)
+
+        finally:
+            if to_directory is not None:
+                writer.close()
 
         '''Return results'''
-        #Dictionary containing results
-        output_dict = {"x" : list(discretised_x),
-                        "t" : list(discretised_t),
-                        "T_wall" : list(T_wall),
-                        "T_ablative_inner" : list(T_ablative_inner),
-                        "T_ablative_outer" : list(T_ablative_outer),
-                        "T_gas" : list(T_gas),
-                        "q_dot" : list(q_dot),
-                        "h_gas" : list(h_gas)}
-
-        #Export a .JSON file if required
-        if to_json != False:
-            with open(to_json, "w+") as write_file:
-                json.dump(output_dict, write_file)
-                print("Exported JSON data to '{}'".format(to_json))
+        metadata = self.results_metadata("transient_heating_analysis", 
+                                         h_gas_model = h_gas_model, 
+                                         method = method, 
+                                         adaptive = adaptive, 
+                                         tolerance = tolerance,
+                                         dt = dt,
+                                         t_max = t_max, 
+                                         stride = stride,
+                                         wall_starting_T = wall_starting_T, 
+                                         number_of_points = len(mesh))
+
+        if to_directory is not None:
+            stream = bamboo.io.load_stream(to_directory)
+            return bamboo.results.HeatingResult(x = stream["x"], 
+                                                t = stream["t"], 
+                                                fields = {field : stream[field] for field in fields}, 
+                                                extras = {"t_events" : t_events}, 
+                                                metadata = metadata)
+
+        #Results, which can be used like a dictionary
+        output_dict = bamboo.results.HeatingResult(x = mesh.x, 
+                                                   t = np.array(discretised_t), 
+                                                   fields = {field : np.array(results[field]) for field in fields}, 
+                                                   extras = {"t_events" : t_events}, 
+                                                   metadata = metadata)
+
+        #Export a .JSON or .npz file if required
+        self._export_results(output_dict, to_json, to_npz, metadata)
 
         return output_dict
 
-
-    def run_stress_analysis(self, heating_result, condition="steady", **kwargs):
+    def run_stress_analysis(self, heating_result, condition="steady", mesh = None, **kwargs):
         """Perform stress analysis on the liner, using a cooling result.
            Results should be taken only as a first approximation of some key stresses.
 
         Args:
             heating_result (dict): Requires a heating analysis result to compute stress.
             condition (str, optional): Engine state for analysis. Options are "steady", or "transient". Defaults to "steady".
+            mesh (EngineMesh, optional): The discretised engine that was used for the heating analysis. Must have the same x positions as the heating result. If not given, a mesh is created at the heating result's x positions. Defaults to None.
 
         Keyword Args:
             T_amb (float, optional): For transient analysis, the ambient temperature can be overriden from the default, 283 K.
@@ -1931,7 +2890,16 @@ class Engine:
                 - "stress_inner_IE" : (transient only) Stress induced in inner liner as it is heated but constrained by cold outer liner (Pa).
                 - "stress_outer_IE : (transient only) Stress induced in outer liner by expanding inner liner (Pa).
         """
-        length = len(heating_result["x"])
+        x = np.asarray(heating_result["x"], dtype = 'float')
+        length = len(x)
+
+        #The geometry must be taken at the same stations as the heating result, which aren't necessarily uniformly spaced (e.g. spacing = "throat" or a refined mesh)
+        if mesh is None:
+            mesh = self.discretise(x = x)
+
+        elif len(mesh) != length or not np.allclose(mesh.x, x):
+            raise ValueError("The mesh given to Engine.run_stress_analysis() does not have the same x positions as the heating result. Pass the mesh that was used for the heating analysis, or mesh = None.")
+
         wall_stress = np.zeros(length)
         wall_deltaT = np.zeros(length)
         tadjusted_yield = np.zeros(length)
@@ -1940,11 +2908,15 @@ class Engine:
 
         E1 = self.cooling_jacket.inner_wall.E
         E2 = self.cooling_jacket.outer_wall.E
-        t1_hoop = self.map_thickness_profile(self.geometry.inner_wall_thickness, length)
+        t1_hoop = mesh.wall_thickness
         t1 = t1_hoop + self.cooling_jacket.channel_height*self.cooling_jacket.blockage_ratio
         # The blockage ratio is used to scale the contribution of the ribs to the
         # effective total thickness of the inner liner (wider ribs = greater blockage ratio)
-        t2 = self.map_thickness_profile(self.geometry.outer_wall_thickness, length)
+        # The outer wall thickness is stretched along the stations in the same way as map_thickness_profile(), but by distance rather than by
+        # index, so that it is still correct if the stations are not equally spaced
+        outer_wall_thickness = np.atleast_1d(self.geometry.outer_wall_thickness)
+        position_fraction = (x - x[0])/(x[-1] - x[0])
+        t2 = np.interp(position_fraction*(len(outer_wall_thickness) - 1), np.arange(len(outer_wall_thickness)), outer_wall_thickness)
 
         # Geometry calculations used for non-thermal stresses;
         # if there is an ablative, the inner liner radius will be
@@ -1958,9 +2930,9 @@ class Engine:
             R2 = R1 + t1/2 + t2/2
             R1_hoop = [self.geometry.chamber_radius]*length
         else:
-            R1 = self.geometry.y(x, up_to="wall in") + t1/2
+            R1 = mesh.radii["wall in"] + t1/2
             R2 = R1 + t1/2 + t2/2
-            R1_hoop = self.geometry.y(x, up_to="wall in")
+            R1_hoop = mesh.radii["wall in"]
         
         if condition == "steady":
             for i in range(length):
@@ -2039,8 +3011,7 @@ class Engine:
 
                 # Now determine the startup inner liner hoop stress
                 # Array for the pressure inside the engine along its length, after ignition.
-                discretised_x = np.linspace(self.geometry.x_max, self.geometry.x_min, length)
-                engine_pressure = [self.p(discretised_x[i]) for i in range(length)]
+                engine_pressure = self.flow_state(mesh.x).p
                 sigma_inner_hoop = (np.array(heating_result["p_coolant"]) - \
                                     engine_pressure) * R1_hoop/t1_hoop
 
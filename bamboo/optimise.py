@@ -0,0 +1,571 @@
+"""Module for optimising engine designs with several design variables at once (e.g. nozzle area ratio, chamber pressure, mass flow rate and chamber L*), against an
+objective such as apogee, specific impulse or maximum wall temperature, subject to constraints such as "no flow separation" and "no coolant boil off".
+
+The optimiser is scipy's differential evolution. Each generation of candidate designs is evaluated as a batch on a process pool, every candidate is remembered so
+it is never evaluated twice, and heating analyses can also be stored on disk with a bamboo.cache.ResultCache so they are reused between optimisation runs.
+
+Design variables:
+    - "area_ratio" : Nozzle area ratio Ae/At.
+    - "p0" : Chamber stagnation pressure (Pa).
+    - "mdot" : Propellant mass flow rate (kg/s).
+    - "chamber_length" : Combustion chamber length (m).
+    - "L_star" : Characteristic length of the chamber, L* = (chamber volume)/At (m). Only the cylindrical part of the chamber is counted, so chamber_length = L* At / chamber_area.
+    - Anything accepted by bamboo.sweep.apply_parameters(), e.g. "mdot_coolant", "inner_wall_thickness" or "chamber_conditions.T0".
+    - Anything else can be given a 'setter' function, e.g. to change the exhaust gas properties with the mixture ratio (bamboo does not calculate combustion chemistry itself).
+
+    The throat is always resized for choked flow at the new chamber conditions (like Nozzle.from_engine_components()), and the chamber geometry and cooling jacket are
+    rebuilt around the new nozzle.
+
+Example:
+    >>> import bamboo.optimise
+    >>> result = bamboo.optimise.run_optimisation(engine,
+    ...                                           bounds = {"area_ratio" : [3, 8], "p0" : [20e5, 40e5], "L_star" : [1.0, 2.0]},
+    ...                                           objective = bamboo.optimise.apogee,
+    ...                                           constraints = [bamboo.optimise.no_separation, bamboo.optimise.no_boil_off, bamboo.optimise.Limit(bamboo.optimise.T_wall_inner_max, maximum = 800)],
+    ...                                           vehicle = {"dry_mass" : 60, "propellant_mass" : 50, "cross_sectional_area" : 0.03})
+    >>> result.design
+"""
+
+import os
+import copy
+import time
+import concurrent.futures
+import numpy as np
+
+import bamboo.main
+import bamboo.sweep
+import bamboo.atmosphere
+import bamboo.trajectory
+import bamboo.results
+
+#Design variables that build_engine() handles itself. Any other name is passed to bamboo.sweep.apply_parameters(), unless it has a setter function.
+DESIGN_VARIABLES = ["area_ratio", "p0", "mdot", "chamber_length", "L_star"]
+
+#Score given to designs which break a constraint (or fail to evaluate). Objective values must be much smaller than this.
+PENALTY = 1e10
+
+def build_engine(engine, design, setters = None):
+    """Create a copy of an Engine with a set of design variables applied. The engine itself is not modified.
+
+    The changes are applied in this order: chamber pressure and mass flow rate, then any other parameters (using bamboo.sweep.apply_parameters()), then the setter functions,
+    and finally the nozzle, chamber geometry and cooling jacket are rebuilt (with any cooling jacket parameters applied at the same time, so the jacket is only built once,
+    around the new geometry). So setters can use the new chamber pressure, and the throat is sized for whatever the setters do to the gas.
+
+    Args:
+        engine (Engine): Base engine
+        design (dict): Value of each design variable, e.g. {"area_ratio" : 5, "p0" : 30e5}
+        setters (dict, optional): Functions to apply design variables that bamboo doesn't know about, called as setter(engine, value) and keyed by the name of the design variable. They should modify the engine in place. Defaults to None.
+
+    Returns:
+        Engine: The new engine
+    """
+    setters = {} if setters is None else setters
+    variant = copy.deepcopy(engine)
+
+    #Chamber conditions
+    chamber_conditions = variant.chamber_conditions
+    variant.chamber_conditions = bamboo.main.ChamberConditions(p0 = design.get("p0", chamber_conditions.p0),
+                                                               T0 = chamber_conditions.T0,
+                                                               mdot = design.get("mdot", chamber_conditions.mdot))
+
+    #Everything else, apart from the nozzle, chamber geometry and cooling jacket which are rebuilt afterwards
+    other_parameters = {name : value for name, value in design.items() if name not in DESIGN_VARIABLES and name not in setters}
+    jacket_changes = {name : value for name, value in other_parameters.items() if name in bamboo.sweep.JACKET_PARAMETERS}
+
+    if len(jacket_changes) > 0 and not variant.has_cooling_jacket:
+        raise ValueError(f"Cannot change the cooling jacket parameters {list(jacket_changes)} on an engine without a cooling jacket")
+
+    bamboo.sweep.apply_parameters(variant, {name : value for name, value in other_parameters.items() if name not in jacket_changes}, check_choked = False)
+
+    for name, setter in setters.items():
+        if name in design:
+            setter(variant, design[name])
+
+    #Nozzle, with the throat sized for choked flow
+    nozzle = variant.nozzle
+    area_ratio = design.get("area_ratio", nozzle.Ae/nozzle.At)
+    At = bamboo.main.get_throat_area(variant.perfect_gas, variant.chamber_conditions)
+
+    variant.nozzle = bamboo.main.Nozzle(At, area_ratio*At, nozzle.type, getattr(nozzle, "length_fraction", 0.8), getattr(nozzle, "cone_angle", 15))
+    variant.c_star = variant.chamber_conditions.p0 * At / variant.chamber_conditions.mdot
+
+    #Chamber geometry and cooling jacket, which depend on the nozzle
+    if hasattr(variant, "geometry"):
+        geometry = variant.geometry
+        chamber_length = design.get("chamber_length", geometry.chamber_length)
+
+        if "L_star" in design:
+            chamber_length = design["L_star"]*At/geometry.chamber_area
+
+        variant.geometry = bamboo.main.EngineGeometry(variant.nozzle,
+                                                      chamber_length,
+                                                      geometry.chamber_area,
+                                                      geometry.inner_wall_thickness,
+                                                      geometry.outer_wall_thickness,
+                                                      geometry.style)
+
+        if variant.has_cooling_jacket:
+            bamboo.sweep._rebuild_cooling_jacket(variant, jacket_changes)
+
+    variant.clear_flow_cache()
+
+    return variant
+
+def current_design(engine, names):
+    """Get the values of a set of design variables for an existing engine, e.g. to start an optimisation from it.
+
+    Args:
+        engine (Engine): Engine to get the values from
+        names (list): Names of the design variables
+
+    Returns:
+        dict: Value of each design variable. Variables which can't be read from the engine (e.g. ones that use setter functions) are left out.
+    """
+    design = {}
+
+    for name in names:
+        if name == "area_ratio":
+            design[name] = engine.nozzle.Ae/engine.nozzle.At
+
+        elif name in ["p0", "mdot"]:
+            design[name] = getattr(engine.chamber_conditions, name)
+
+        elif name == "chamber_length" and hasattr(engine, "geometry"):
+            design[name] = engine.geometry.chamber_length
+
+        elif name == "L_star" and hasattr(engine, "geometry"):
+            design[name] = engine.geometry.chamber_length*engine.geometry.chamber_area/engine.nozzle.At
+
+        elif name in bamboo.sweep.JACKET_PARAMETERS and engine.has_cooling_jacket and np.ndim(getattr(engine.cooling_jacket, name, None)) == 0:
+            design[name] = getattr(engine.cooling_jacket, name, None)
+
+        elif name not in DESIGN_VARIABLES and name not in bamboo.sweep.JACKET_PARAMETERS + bamboo.sweep.GEOMETRY_PARAMETERS:
+            target = engine
+
+            try:
+                for part in name.split("."):
+                    target = getattr(target, part)
+            except AttributeError:
+                continue
+
+            if np.ndim(target) == 0:
+                design[name] = target
+
+    return {name : float(value) for name, value in design.items() if isinstance(value, (int, float, np.number))}
+
+class Evaluation:
+    """An engine built from a design, along with the analyses that the metrics need. The analyses are run the first time they're needed, and then stored,
+    so several metrics can use the same heating analysis or trajectory simulation.
+
+    Args:
+        engine (Engine): Engine built from the design (see build_engine())
+        design (dict): Value of each design variable
+        vehicle (dict, optional): Keyword arguments for bamboo.trajectory.simulate(), other than 'engine' - e.g. {"dry_mass" : 60, "propellant_mass" : 50, "cross_sectional_area" : 0.03}. Only needed for trajectory metrics. Defaults to None.
+        analysis_kwargs (dict, optional): Keyword arguments for Engine.steady_heating_analysis(). .JSON exporting is turned off unless 'to_json' is given. Defaults to None.
+        p_amb (float, optional): Ambient pressure for the thrust, Isp and separation metrics (Pa). Defaults to None (sea level).
+
+    Attributes:
+        engine (Engine): Engine built from the design
+        design (dict): Value of each design variable
+        p_amb (float): Ambient pressure for the thrust, Isp and separation metrics (Pa)
+    """
+    def __init__(self, engine, design, vehicle = None, analysis_kwargs = None, p_amb = None):
+        self.engine = engine
+        self.design = design
+        self.vehicle = vehicle
+        self.analysis_kwargs = {"to_json" : False}
+        self.analysis_kwargs.update(analysis_kwargs if analysis_kwargs is not None else {})
+        self.p_amb = bamboo.atmosphere.pressure(0) if p_amb is None else p_amb
+
+        self._heating = None
+        self._trajectory = None
+
+    @property
+    def heating(self):
+        """HeatingResult: Result of Engine.steady_heating_analysis() for the engine."""
+        if self._heating is None:
+            self._heating = self.engine.steady_heating_analysis(**self.analysis_kwargs)
+
+        return self._heating
+
+    @property
+    def trajectory(self):
+        """TrajectoryResult: Result of bamboo.trajectory.simulate() for the vehicle."""
+        if self._trajectory is None:
+            if self.vehicle is None:
+                raise ValueError("A 'vehicle' must be given to use trajectory metrics (e.g. apogee)")
+
+            self._trajectory = bamboo.trajectory.simulate(engine = self.engine, **self.vehicle)
+
+        return self._trajectory
+
+#Metrics - functions that reduce an Evaluation to a single number
+def apogee(evaluation):
+    """Apogee of the vehicle (m)"""
+    return evaluation.trajectory.apogee
+
+def isp(evaluation):
+    """Specific impulse at the ambient pressure (s)"""
+    return evaluation.engine.isp(evaluation.p_amb)
+
+def thrust(evaluation):
+    """Thrust at the ambient pressure (N)"""
+    return evaluation.engine.thrust(evaluation.p_amb)
+
+def T_wall_inner_max(evaluation):
+    """Maximum exhaust gas side wall temperature (K)"""
+    return bamboo.sweep.T_wall_inner_max(evaluation.heating)
+
+def T_coolant_out(evaluation):
+    """Coolant temperature at the outlet of the cooling jacket (K)"""
+    return bamboo.sweep.T_coolant_out(evaluation.heating)
+
+def p0_coolant_drop(evaluation):
+    """Stagnation pressure drop through the cooling jacket (Pa)"""
+    return bamboo.sweep.p0_coolant_drop(evaluation.heating)
+
+#Constraints - functions that return a margin which must be zero or positive for the design to be acceptable. The margins are relative, so that different
+#constraints can be added together when scoring designs which break them.
+def no_separation(evaluation):
+    """Margin against flow separation in the nozzle at the ambient pressure, (separation ambient pressure)/(ambient pressure) - 1. Since the ambient pressure
+    only drops during a flight, this is enough for the whole trajectory if p_amb is the launch site pressure."""
+    return evaluation.engine.separation_p_amb()/evaluation.p_amb - 1
+
+def coolant_above_chamber_pressure(evaluation):
+    """Margin of the coolant stagnation pressure at the jacket outlet over the chamber pressure, (coolant p0)/(chamber p0) - 1. This must be positive for the coolant
+    to be injected into the chamber."""
+    return np.nanmin(evaluation.heating["p0_coolant"])/evaluation.engine.chamber_conditions.p0 - 1
+
+def no_boil_off(evaluation):
+    """0 if the coolant stays liquid through the cooling jacket, or -1 if it boils."""
+    return 0.0 if evaluation.heating["boil_off_position"] is None else -1.0
+
+class Limit:
+    """Constraint that keeps a metric above a minimum and/or below a maximum, e.g. Limit(T_wall_inner_max, maximum = 800). The margin is relative to the limit.
+
+    Args:
+        metric (callable): Metric to limit. Must be defined at module level if the optimisation uses more than one process.
+        minimum (float, optional): Minimum allowable value. Defaults to None.
+        maximum (float, optional): Maximum allowable value. Defaults to None.
+    """
+    def __init__(self, metric, minimum = None, maximum = None):
+        if minimum is None and maximum is None:
+            raise ValueError("A Limit needs a minimum, a maximum, or both")
+
+        self.metric = metric
+        self.minimum = minimum
+        self.maximum = maximum
+
+        #Used to label the constraint in the results
+        descriptions = []
+        if minimum is not None:
+            descriptions.append(f"{metric.__name__} >= {minimum}")
+        if maximum is not None:
+            descriptions.append(f"{metric.__name__} <= {maximum}")
+
+        self.__name__ = " and ".join(descriptions)
+
+    def __repr__(self):
+        return f"Limit({self.__name__})"
+
+    def __call__(self, evaluation):
+        value = self.metric(evaluation)
+        margins = []
+
+        if self.minimum is not None:
+            margins.append((value - self.minimum)/abs(self.minimum) if self.minimum != 0 else value)
+
+        if self.maximum is not None:
+            margins.append((self.maximum - value)/abs(self.maximum) if self.maximum != 0 else -value)
+
+        return min(margins)
+
+def evaluate(engine, design, objective, constraints = None, metrics = None, vehicle = None, analysis_kwargs = None, setters = None, p_amb = None):
+    """Build and evaluate a single design. Any exception (e.g. an unchoked throat, or the coolant pressure dropping below zero) is caught and returned as the error.
+
+    Args:
+        engine (Engine): Base engine
+        design (dict): Value of each design variable
+        objective (callable): Metric to optimise
+        constraints (list, optional): Constraint functions. Defaults to None.
+        metrics (list, optional): Extra metrics to record, which don't affect the optimisation. Defaults to None.
+        vehicle (dict, optional): See Evaluation. Defaults to None.
+        analysis_kwargs (dict, optional): See Evaluation. Defaults to None.
+        setters (dict, optional): See build_engine(). Defaults to None.
+        p_amb (float, optional): See Evaluation. Defaults to None.
+
+    Returns:
+        dict: {"objective" : value of the objective, "margins" : margin for each constraint, "metrics" : value of each extra metric, "error" : error message or None,
+        "cache_hits" : number of analyses loaded from the ResultCache in analysis_kwargs, "cache_misses" : number of analyses it didn't have}.
+        Constraints and metrics are keyed by their __name__. If a constraint is broken, the objective is NaN and the metrics are left out.
+    """
+    record = {"objective" : np.nan, "margins" : {}, "metrics" : {}, "error" : None, "cache_hits" : 0, "cache_misses" : 0}
+
+    #Count this design's cache hits here, since in a worker process the cache is a copy and the parent's counters never change
+    cache = (analysis_kwargs if analysis_kwargs is not None else {}).get("cache")
+    if cache is not None:
+        hits_before, misses_before = cache.hits, cache.misses
+
+    try:
+        evaluation = Evaluation(build_engine(engine, design, setters), design, vehicle, analysis_kwargs, p_amb)
+
+        #Constraints first - the objective and metrics are only worked out for designs which meet all of them, since designs which don't are never chosen (and
+        #e.g. designs which separate would fail in the trajectory simulation)
+        for constraint in (constraints if constraints is not None else []):
+            record["margins"][constraint.__name__] = float(constraint(evaluation))
+
+        if any(margin < 0 for margin in record["margins"].values()):
+            return record
+
+        record["objective"] = float(objective(evaluation))
+
+        for metric in (metrics if metrics is not None else []):
+            record["metrics"][metric.__name__] = float(metric(evaluation))
+
+    except Exception as error:
+        record["error"] = f"{type(error).__name__}: {error}"
+
+    if cache is not None:
+        record["cache_hits"] = cache.hits - hits_before
+        record["cache_misses"] = cache.misses - misses_before
+
+    return record
+
+def score(record, maximise = True):
+    """Convert the result of evaluate() into a single number to be minimised. Designs which meet every constraint score the objective (negated if maximising). Designs which
+    break a constraint score between PENALTY and 2*PENALTY, increasing with the total amount the margins are broken by, and designs which failed to evaluate (without breaking
+    a constraint first) score 2*PENALTY.
+
+    Args:
+        record (dict): Result of evaluate()
+        maximise (bool, optional): Whether the objective is being maximised. Defaults to True.
+
+    Returns:
+        float: Score
+    """
+    violation = sum(max(-margin, 0.0) for margin in record["margins"].values())
+
+    if not np.isfinite(violation):
+        return 2*PENALTY
+
+    if violation > 0:
+        return PENALTY*(1 + violation/(1 + violation))
+
+    if record["error"] is not None or not np.isfinite(record["objective"]):
+        return 2*PENALTY
+
+    return -record["objective"] if maximise else record["objective"]
+
+#State of each worker process, set once by _initialise_worker() so the engine isn't pickled again for every design
+_worker = {}
+
+def _initialise_worker(engine, settings):
+    _worker["engine"] = engine
+    _worker["settings"] = settings
+
+def _evaluate_in_worker(design):
+    return evaluate(_worker["engine"], design, **_worker["settings"])
+
+class _Evaluator:
+    """Evaluates designs for scipy.optimize.differential_evolution(), remembering every design it has seen. Used as the 'workers' argument, so that each generation
+    is evaluated as one batch on the process pool, with only the new designs being sent to it.
+    """
+    def __init__(self, engine, names, settings, maximise, executor, chunksize, progress):
+        self.engine = engine
+        self.names = names
+        self.settings = settings
+        self.maximise = maximise
+        self.executor = executor
+        self.chunksize = chunksize
+        self.progress = progress
+        self.records = {}       #Keyed by the tuple of design variable values
+        self.repeats = 0        #Number of designs that were found in self.records instead of being evaluated
+        self.start_time = time.time()
+
+    def evaluate_batch(self, xs):
+        keys = list(dict.fromkeys(tuple(float(value) for value in x) for x in xs))
+        new_keys = [key for key in keys if key not in self.records]
+        self.repeats += len(xs) - len(new_keys)
+
+        designs = [dict(zip(self.names, key)) for key in new_keys]
+
+        if self.executor is None:
+            records = [evaluate(self.engine, design, **self.settings) for design in designs]
+        else:
+            records = list(self.executor.map(_evaluate_in_worker, designs, chunksize = self.chunksize))
+
+            #The workers only updated their own copies of the ResultCache
+            cache = (self.settings["analysis_kwargs"] if self.settings["analysis_kwargs"] is not None else {}).get("cache")
+            if cache is not None:
+                cache.hits += sum(record["cache_hits"] for record in records)
+                cache.misses += sum(record["cache_misses"] for record in records)
+
+        self.records.update(zip(new_keys, records))
+
+        if self.progress and len(new_keys) > 0:
+            scores = [score(record, self.maximise) for record in self.records.values()]
+            best = list(self.records.values())[int(np.argmin(scores))]
+            feasible = "" if min(scores) < PENALTY else " (no designs meet the constraints yet)"
+            print(f"Optimisation progress: {len(self.records)} designs evaluated, best objective = {best['objective']:.6g}{feasible}, {time.time() - self.start_time:.1f} s elapsed")
+
+    def __call__(self, x):
+        key = tuple(float(value) for value in x)
+
+        if key not in self.records:
+            self.evaluate_batch([x])
+
+        return score(self.records[key], self.maximise)
+
+    def map(self, function, xs):
+        """Map-like function for differential_evolution(). Evaluates any new designs as a batch, then scores them all from the stored records."""
+        xs = list(xs)
+        self.evaluate_batch(xs)
+
+        return [function(x) for x in xs]
+
+def run_optimisation(engine, bounds, objective = apogee, maximise = True, constraints = None, metrics = None, vehicle = None, analysis_kwargs = None, setters = None, p_amb = None,
+                     cache = None, max_workers = None, chunksize = 1, population_size = 10, max_generations = 50, tol = 1e-3, seed = None, start_from_engine = True, progress = True):
+    """Optimise an engine design using differential evolution (scipy.optimize.differential_evolution()), with several design variables at once.
+
+    Each generation of designs is evaluated as a batch on a concurrent.futures.ProcessPoolExecutor (the base engine is sent to each process once). Every design that is
+    evaluated is remembered, so no design is ever evaluated twice, and if a 'cache' is given the heating analyses are also stored on disk and reused between runs.
+
+    Constraints are handled with penalties (see score()), so designs which break a constraint always rank below those which don't, and designs which break
+    the constraints by less rank above those which break them by more. Designs which fail to evaluate (e.g. if the chamber is narrower than the new throat) rank last.
+
+    Note:
+        The engine, the objective, constraints, metrics and setters, and anything in 'analysis_kwargs' must be picklable when max_workers is not 1 - so functions must be defined
+        at module level (not lambdas). On platforms which start processes with 'spawn' (Windows and macOS), run_optimisation() must be called from inside an 'if __name__ == "__main__":' block.
+
+    Args:
+        engine (Engine): Base engine. It is not modified.
+        bounds (dict): Lower and upper bounds for each design variable, e.g. {"area_ratio" : [3, 8], "p0" : [20e5, 40e5]}. See the module docstring for the design variables available.
+        objective (callable, optional): Metric to optimise, e.g. bamboo.optimise.apogee, isp or T_wall_inner_max. Defaults to apogee.
+        maximise (bool, optional): If True the objective is maximised, if False it is minimised. Defaults to True.
+        constraints (list, optional): Constraint functions, which return a margin that must be zero or positive, e.g. [no_separation, coolant_above_chamber_pressure, no_boil_off, Limit(T_wall_inner_max, maximum = 800)]. Defaults to None.
+        metrics (list, optional): Extra metrics to record for every design, which don't affect the optimisation. Defaults to None.
+        vehicle (dict, optional): Keyword arguments for bamboo.trajectory.simulate(), other than 'engine' - e.g. {"dry_mass" : 60, "propellant_mass" : 50, "cross_sectional_area" : 0.03}. Needed for the apogee metric. Defaults to None.
+        analysis_kwargs (dict, optional): Keyword arguments for Engine.steady_heating_analysis(), e.g. {"number_of_points" : 200}. Defaults to None.
+        setters (dict, optional): Functions to apply design variables that bamboo doesn't know about (e.g. mixture ratio), called as setter(engine, value). See build_engine(). Defaults to None.
+        p_amb (float, optional): Ambient pressure for the thrust, Isp and separation metrics (Pa). Defaults to None (sea level).
+        cache (ResultCache, optional): Cache to store the heating analyses in. Defaults to None.
+        max_workers (int, optional): Number of processes to use. If 1, the designs are evaluated one after another in the current process. Defaults to None (one per CPU).
+        chunksize (int, optional): Number of designs to send to a process at a time. Defaults to 1.
+        population_size (int, optional): Number of designs in each generation, per design variable. Defaults to 10.
+        max_generations (int, optional): Maximum number of generations. Defaults to 50.
+        tol (float, optional): Relative tolerance for convergence, see scipy.optimize.differential_evolution(). Defaults to 1e-3.
+        seed (int, optional): Random seed, for repeatable optimisations. Defaults to None.
+        start_from_engine (bool, optional): If True, the base engine's own design is included in the first generation (if it's within the bounds). Defaults to True.
+        progress (bool, optional): If True, progress is printed after each generation. Defaults to True.
+
+    Returns:
+        OptimisationResult: The best design, the engine built from it, and a table of every design that was evaluated.
+    """
+    import scipy.optimize
+
+    names = list(bounds)
+    lower = np.array([bounds[name][0] for name in names], dtype = float)
+    upper = np.array([bounds[name][1] for name in names], dtype = float)
+
+    if np.any(lower >= upper):
+        raise ValueError("Each design variable's lower bound must be less than its upper bound")
+
+    if analysis_kwargs is not None and analysis_kwargs.get("mesh") is not None:
+        raise ValueError("A 'mesh' can't be given in analysis_kwargs, since each design changes the engine geometry - use 'number_of_points' or 'refine_tolerance' instead")
+
+    if cache is not None:
+        analysis_kwargs = dict(analysis_kwargs if analysis_kwargs is not None else {}, cache = cache)
+
+    settings = {"objective" : objective,
+                "constraints" : constraints,
+                "metrics" : metrics,
+                "vehicle" : vehicle,
+                "analysis_kwargs" : analysis_kwargs,
+                "setters" : setters,
+                "p_amb" : p_amb}
+
+    #Warm start from the base engine, filling in any variables that can't be read from it with the middle of their bounds
+    x0 = None
+    if start_from_engine:
+        design = current_design(engine, names)
+        x0 = np.array([design.get(name, (bounds[name][0] + bounds[name][1])/2) for name in names], dtype = float)
+
+        if np.any(x0 < lower) or np.any(x0 > upper):
+            x0 = None
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    if max_workers == 1:
+        executor = None
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers = max_workers, initializer = _initialise_worker, initargs = (engine, settings))
+
+    evaluator = _Evaluator(engine, names, settings, maximise, executor, chunksize, progress)
+
+    try:
+        optimisation = scipy.optimize.differential_evolution(evaluator,
+                                                             bounds = list(zip(lower, upper)),
+                                                             x0 = x0,
+                                                             popsize = population_size,
+                                                             maxiter = max_generations,
+                                                             tol = tol,
+                                                             seed = seed,
+                                                             polish = False,                #Gradient based polishing doesn't work well with penalties
+                                                             updating = "deferred",         #Needed to evaluate whole generations at once
+                                                             workers = evaluator.map)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    #Pick the best design out of everything that was evaluated
+    keys = list(evaluator.records)
+    records = [evaluator.records[key] for key in keys]
+    scores = np.array([score(record, maximise) for record in records])
+    best = int(np.argmin(scores))
+    best_design = dict(zip(names, keys[best]))
+    best_record = records[best]
+
+    #Table of every design
+    constraint_names = list(dict.fromkeys(name for record in records for name in record["margins"]))
+    metric_names = list(dict.fromkeys(name for record in records for name in record["metrics"]))
+
+    columns = {name : np.array([key[i] for key in keys]) for i, name in enumerate(names)}
+    columns["objective"] = np.array([record["objective"] for record in records])
+    columns["score"] = scores
+    columns["feasible"] = scores < PENALTY
+    columns.update({name : np.array([record["metrics"].get(name, np.nan) for record in records]) for name in metric_names})
+    columns.update({name : np.array([record["margins"].get(name, np.nan) for record in records]) for name in constraint_names})
+
+    metadata = engine.results_metadata("run_optimisation",
+                                       objective = objective.__name__,
+                                       maximise = maximise,
+                                       constraints = constraint_names,
+                                       bounds = {name : [float(lower[i]), float(upper[i])] for i, name in enumerate(names)})
+
+    history = bamboo.results.SweepResult(columns = columns,
+                                         errors = [record["error"] for record in records],
+                                         parameters = names,
+                                         metadata = metadata)
+
+    best_engine = None
+    if best_record["error"] is None:
+        best_engine = build_engine(engine, best_design, setters)
+
+    if progress:
+        print(f"Optimisation finished after {len(records)} designs: {optimisation.message}")
+
+    if scores[best] >= PENALTY:
+        print(f"WARNING: None of the {len(records)} designs evaluated met all of the constraints{' (they all failed to evaluate)' if np.all(scores == 2*PENALTY) else ''}. Check OptimisationResult.history for the margins and errors.")
+
+    return bamboo.results.OptimisationResult(design = best_design,
+                                             objective = best_record["objective"],
+                                             feasible = bool(scores[best] < PENALTY),
+                                             margins = best_record["margins"],
+                                             metrics = best_record["metrics"],
+                                             engine = best_engine,
+                                             history = history,
+                                             evaluations = len(records),
+                                             repeated_designs = evaluator.repeats,
+                                             cache_hits = sum(record["cache_hits"] for record in records),
+                                             message = optimisation.message)
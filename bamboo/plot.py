@@ -6,18 +6,29 @@ import matplotlib.animation as animation
 from matplotlib.collections import LineCollection
 from matplotlib.colors import ListedColormap, BoundaryNorm, LinearSegmentedColormap
 import numpy as np
+import os
+import bamboo.io
+
+def _load(data_dict):
+    """Allow the plotting functions to take a file path (.npz, .json or a streamed results directory) instead of a dictionary of results.
+    """
+    if isinstance(data_dict, (str, os.PathLike)):
+        return bamboo.io.load(data_dict)
+
+    return data_dict
 
 def plot_temperatures(data_dict, **kwargs):
     """Given the output dictionary from an engine cooling analysis, plot the temperatures against position. 
     Note you will have to run matplotlib.pyplot.show() to see the plot.
 
     Args:
-        data_dict (dict): Dictionary contaning the cooling analysis results.
+        data_dict (dict or str): Dictionary contaning the cooling analysis results, or a path to results saved to a file (see bamboo.io.load()).
     
     Keyword Args:
         show_gas (bool): If True, the exhaust gas freestream temperatures will be shown. Defaults to False.
         show_ablative (bool): If False, the ablative temperatures will not be shown. Defaults to True.
     """
+    data_dict = _load(data_dict)
     fig, ax_T = plt.subplots()
     ax_T.plot(data_dict["x"], np.array(data_dict["T_wall_inner"]) - 273.15, label = "Wall (inner)")
     ax_T.plot(data_dict["x"], np.array(data_dict["T_wall_outer"])- 273.15, label = "Wall (outer)")
@@ -47,11 +58,12 @@ def plot_h(data_dict, **kwargs):
     Note you will have to run matplotlib.pyplot.show() to see the plot.
 
     Args:
-        data_dict (dict): Dictionary contaning the cooling analysis results.
+        data_dict (dict or str): Dictionary contaning the cooling analysis results, or a path to results saved to a file (see bamboo.io.load()).
 
     Keyword Args:
         qdot (bool): If True, the heat transfer rate per unit length will also be plotted.
     """
+    data_dict = _load(data_dict)
     h_figs, h_axs = plt.subplots()
     h_axs.plot(data_dict["x"], data_dict["h_gas"], label = "Gas")
     h_axs.plot(data_dict["x"], data_dict["h_coolant"], label = "Coolant", )
@@ -76,9 +88,10 @@ def plot_qdot(data_dict, **kwargs):
     Note you will have to run matplotlib.pyplot.show() to see the plot.
 
     Args:
-        data_dict (dict): Dictionary contaning the cooling analysis results.
+        data_dict (dict or str): Dictionary contaning the cooling analysis results, or a path to results saved to a file (see bamboo.io.load()).
 
     """
+    data_dict = _load(data_dict)
 
     q_figs, q_axs = plt.subplots()
     q_axs.plot(data_dict["x"], data_dict["q_dot"], label = "Heat transfer rate (W/m)", color = 'red')
@@ -96,9 +109,10 @@ def plot_jacket_pressure(data_dict, **kwargs):
     Note you will have to run matplotlib.pyplot.show() to see the plot.
 
     Args:
-        data_dict (dict): Dictionary contaning the cooling analysis results.
+        data_dict (dict or str): Dictionary contaning the cooling analysis results, or a path to results saved to a file (see bamboo.io.load()).
 
     """
+    data_dict = _load(data_dict)
 
     p_figs, p_axs = plt.subplots()
     p_axs.plot(data_dict["x"], np.array(data_dict["p_coolant"])/1e5, label = "Coolant static pressure (bar)")
@@ -115,9 +129,10 @@ def plot_resistances(data_dict, **kwargs):
     """Given the output dictionary from a engine cooling analysis, plot the thermal resistances of all the components.
 
     Args:
-        data_dict (dict): Dictionary contaning the cooling analysis results.
+        data_dict (dict or str): Dictionary contaning the cooling analysis results, or a path to results saved to a file (see bamboo.io.load()).
 
     """
+    data_dict = _load(data_dict)
     figs, axs = plt.subplots()
     axs.plot(data_dict["x"], data_dict["R_gas"], label = "Gas boundary layer")
     axs.plot(data_dict["x"], data_dict["R_wall"], label = "Wall")
@@ -143,9 +158,10 @@ def plot_exhaust_properties(data_dict, **kwargs):
     """Given the output dictionary from a engine cooling analysis, plot the exhaust gas transport properties
 
     Args:
-        data_dict (dict): Dictionary contaning the cooling analysis results.
+        data_dict (dict or str): Dictionary contaning the cooling analysis results, or a path to results saved to a file (see bamboo.io.load()).
 
     """
+    data_dict = _load(data_dict)
     fig, axs = plt.subplots(2,2)
     axs[0,0].plot(data_dict["x"], data_dict["mu_gas"])
     axs[0,0].set_title('Exhaust Gas Absolute Viscosity')
@@ -172,9 +188,10 @@ def plot_coolant_properties(data_dict, **kwargs):
     """Given the output dictionary from a engine cooling analysis, plot the coolant transport properties
 
     Args:
-        data_dict (dict): Dictionary contaning the cooling analysis results.
+        data_dict (dict or str): Dictionary contaning the cooling analysis results, or a path to results saved to a file (see bamboo.io.load()).
 
     """
+    data_dict = _load(data_dict)
     fig, axs = plt.subplots(2,2)
     axs[0,0].plot(data_dict["x"], data_dict["mu_coolant"])
     axs[0,0].set_title('Coolant Viscosity')
@@ -206,12 +223,13 @@ def animate_transient_temperatures(data_dict, speed = 1, **kwargs):
         Transient analysis modelling is currently incomplete.
 
     Args:
-        data_dict ([type]): [description]
+        data_dict (dict or str): Dictionary containing the transient heating analysis results, or a path to results saved to a file (see bamboo.io.load()).
         speed (int, optional): [description]. Defaults to 1.
 
     Returns:
         [type]: [description]
     """
+    data_dict = _load(data_dict)
     xs = data_dict["x"]
     ts = data_dict["t"]
 
@@ -0,0 +1,310 @@
+"""Containers for simulation results.
+"""
+
+import collections.abc
+import json
+import numpy as np
+
+class HeatingResult(collections.abc.Mapping):
+    """Results of a heating analysis, stored as NumPy arrays. Behaves like a read-only dictionary (e.g. result["T_coolant"]), so it can be used anywhere
+    the old dictionary of lists was, but the arrays are not copied into lists unless to_dict() or to_json() is called.
+
+    Indexing with a slice selects a range of x positions rather than indexes, e.g. result[-0.1:0.05] gives the results for -0.1 <= x <= 0.05.
+
+    Args:
+        x (array): Axial positions of the stations (m)
+        fields (dict): Arrays of results, with the stations along the last axis (e.g. [time_index, space_index] for transient results).
+        extras (dict, optional): Any other results, which don't vary with position (e.g. "boil_off_position"). Defaults to None.
+        t (array, optional): Times, for transient results (s). Defaults to None.
+        metadata (dict, optional): Information about the engine and analysis settings, from Engine.results_metadata(). Defaults to None.
+
+    Attributes:
+        x (array): Axial positions of the stations (m)
+        t (array or None): Times, for transient results (s)
+        fields (dict): Arrays of results, with the stations along the last axis.
+        extras (dict): Other results that don't vary with position.
+        metadata (dict): Information about the engine and analysis settings.
+    """
+    __slots__ = ("x", "t", "fields", "extras", "metadata")
+
+    def __init__(self, x, fields, extras = None, t = None, metadata = None):
+        self.x = np.asarray(x)
+        self.t = np.asarray(t) if t is not None else None
+        self.fields = {key : np.asarray(value) for key, value in fields.items()}
+        self.extras = dict(extras) if extras is not None else {}
+        self.metadata = metadata if metadata is not None else {}
+
+        for key, value in self.fields.items():
+            if value.shape[-1:] != self.x.shape:
+                raise ValueError(f"Field '{key}' has shape {value.shape}, but its last axis should match x, which has length {len(self.x)}")
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.step is not None:
+                raise ValueError("HeatingResult slices select a range of x positions, and can't have a step")
+
+            return self.slice_x(key.start, key.stop)
+
+        if key == "x":
+            return self.x
+        elif key == "t" and self.t is not None:
+            return self.t
+        elif key in self.fields:
+            return self.fields[key]
+        else:
+            return self.extras[key]
+
+    def __iter__(self):
+        yield "x"
+
+        if self.t is not None:
+            yield "t"
+
+        yield from self.fields
+        yield from self.extras
+
+    def __len__(self):
+        return 1 + (self.t is not None) + len(self.fields) + len(self.extras)
+
+    def __repr__(self):
+        shape = f"{len(self.t)} times, {len(self.x)} stations" if self.t is not None else f"{len(self.x)} stations"
+        return f"HeatingResult({shape}, fields = {list(self.fields)})"
+
+    def slice_x(self, x_min = None, x_max = None):
+        """Get the results for a range of x positions.
+
+        Args:
+            x_min (float, optional): Minimum x position (m). Defaults to None (no lower limit).
+            x_max (float, optional): Maximum x position (m). Defaults to None (no upper limit).
+
+        Returns:
+            HeatingResult: Results for x_min <= x <= x_max
+        """
+        mask = np.ones(self.x.shape, dtype = bool)
+
+        if x_min is not None:
+            mask &= self.x >= x_min
+
+        if x_max is not None:
+            mask &= self.x <= x_max
+
+        return HeatingResult(x = self.x[mask],
+                             fields = {key : value[..., mask] for key, value in self.fields.items()},
+                             extras = self.extras,
+                             t = self.t,
+                             metadata = self.metadata)
+
+    def to_dict(self):
+        """Convert to a dictionary of lists, in the format that the heating analyses used to return.
+
+        Returns:
+            dict: Dictionary of results
+        """
+        return {key : (value.tolist() if isinstance(value, np.ndarray) else value) for key, value in self.items()}
+
+    def to_json(self, path):
+        """Save the results to a .JSON file.
+
+        Args:
+            path (str): File path to save to
+        """
+        with open(path, "w+") as write_file:
+            json.dump(self.to_dict(), write_file)
+
+class SweepResult(collections.abc.Mapping):
+    """Results of a parameter sweep (from bamboo.sweep.run_sweep()), stored as a table with one row per case. Behaves like a read-only dictionary of columns, e.g. 
+    result["T_wall_inner_max"] gives an array with one value per case.
+
+    Args:
+        columns (dict): Arrays of values for each column, all with one value per case.
+        errors (list): Error message for each case, or None if the case succeeded.
+        parameters (list, optional): Names of the columns which are input parameters (rather than outputs). Defaults to None.
+        metadata (dict, optional): Information about the base engine and analysis settings. Defaults to None.
+
+    Attributes:
+        columns (dict): Arrays of values for each column. Outputs are NaN for cases which failed.
+        errors (array): Error message for each case (e.g. "ValueError: ..."), or None if the case succeeded.
+        parameters (list): Names of the input parameter columns.
+        outputs (list): Names of the output columns.
+        metadata (dict): Information about the base engine and analysis settings.
+    """
+    __slots__ = ("columns", "errors", "parameters", "outputs", "metadata")
+
+    def __init__(self, columns, errors, parameters = None, metadata = None):
+        self.columns = {key : np.asarray(value) for key, value in columns.items()}
+        self.errors = np.asarray(errors, dtype = object)
+        self.parameters = list(parameters) if parameters is not None else []
+        self.outputs = [key for key in self.columns if key not in self.parameters]
+        self.metadata = metadata if metadata is not None else {}
+
+        for key, value in self.columns.items():
+            if value.shape != self.errors.shape:
+                raise ValueError(f"Column '{key}' has shape {value.shape}, but there are {len(self.errors)} cases")
+
+    def __getitem__(self, key):
+        if key == "error":
+            return self.errors
+
+        return self.columns[key]
+
+    def __iter__(self):
+        yield from self.columns
+        yield "error"
+
+    def __len__(self):
+        return len(self.columns) + 1
+
+    def __repr__(self):
+        return f"SweepResult({len(self.errors)} cases, {np.count_nonzero(self.failed)} failed, parameters = {self.parameters}, outputs = {self.outputs})"
+
+    @property
+    def succeeded(self):
+        """array: Boolean mask, True for the cases that ran without raising an exception."""
+        return np.array([error is None for error in self.errors], dtype = bool)
+
+    @property
+    def failed(self):
+        """array: Boolean mask, True for the cases that raised an exception."""
+        return ~self.succeeded
+
+    def row(self, index):
+        """Get all of the values for a single case.
+
+        Args:
+            index (int): Index of the case
+
+        Returns:
+            dict: Value of every column for the case, including "error".
+        """
+        return {key : self[key][index] for key in self}
+
+    def to_dict(self):
+        """Convert to a dictionary of lists.
+
+        Returns:
+            dict: Dictionary of columns
+        """
+        return {key : value.tolist() for key, value in self.items()}
+
+    def to_json(self, path):
+        """Save the table to a .JSON file.
+
+        Args:
+            path (str): File path to save to
+        """
+        with open(path, "w+") as write_file:
+            json.dump(self.to_dict(), write_file)
+
+class TrajectoryResult:
+    """Results of a trajectory simulation from bamboo.trajectory.simulate().
+
+    Args:
+        t (array): Times at the end of each integrator step (s)
+        y (array): State [altitude, velocity] at each time, with shape (2, len(t))
+        solutions (list): List of (t_start, t_end, solution) for each phase of the flight, where solution is the dense output from scipy.integrate.solve_ivp().
+        apogee (float): Maximum altitude (m)
+        apogee_time (float): Time of apogee (s)
+        burn_time (float): Time of engine burnout (s)
+        burnout_altitude (float): Altitude at burnout, or NaN if apogee was reached before burnout (m)
+        burnout_velocity (float): Velocity at burnout, or NaN if apogee was reached before burnout (m/s)
+        evaluations (int): Number of times the equations of motion (and so the engine thrust) were evaluated.
+
+    Attributes:
+        altitude (array): Altitude at each time (m)
+        velocity (array): Velocity at each time (m/s)
+    """
+    def __init__(self, t, y, solutions, apogee, apogee_time, burn_time, burnout_altitude, burnout_velocity, evaluations):
+        self.t = t
+        self.y = y
+        self.altitude = y[0]
+        self.velocity = y[1]
+        self.solutions = solutions
+        self.apogee = apogee
+        self.apogee_time = apogee_time
+        self.burn_time = burn_time
+        self.burnout_altitude = burnout_altitude
+        self.burnout_velocity = burnout_velocity
+        self.evaluations = evaluations
+
+    def __repr__(self):
+        return f"TrajectoryResult(apogee = {self.apogee} m at t = {self.apogee_time} s, burnout at t = {self.burn_time} s, {self.evaluations} evaluations)"
+
+    def state(self, t):
+        """Get the state at any time during the flight, using the integrator's dense output.
+
+        Args:
+            t (float or array): Time (s). Must be between 0 and apogee_time.
+
+        Returns:
+            array: [altitude, velocity], with shape (2,) or (2, len(t))
+        """
+        t = np.asarray(t, dtype = 'float')
+        state = np.full((2,) + t.shape, np.nan)
+
+        for t_start, t_end, solution in self.solutions:
+            in_phase = (t >= t_start) & (t <= t_end)
+
+            if np.any(in_phase):
+                state[:, in_phase] = solution(t[in_phase])
+
+        return state
+
+class BatchTrajectoryResult:
+    """Results of a batch of trajectory simulations from bamboo.trajectory.simulate_batch(). Every attribute is an array with one element per vehicle (with the 
+    same shape as the vehicle parameters that were given).
+
+    Args:
+        apogee (array): Maximum altitude (m)
+        apogee_time (array): Time of apogee (s)
+        max_q (array): Maximum dynamic pressure, 0.5*rho*v^2, during the flight (Pa)
+        burn_time (array): Time of engine burnout (s)
+        burnout_altitude (array): Altitude at burnout, or NaN if apogee was reached before burnout (m)
+        burnout_velocity (array): Velocity at burnout, or NaN if apogee was reached before burnout (m/s)
+        separated (array): True for vehicles where the flow separated in the nozzle. These vehicles have NaN for all of the other results.
+    """
+    def __init__(self, apogee, apogee_time, max_q, burn_time, burnout_altitude, burnout_velocity, separated):
+        self.apogee = apogee
+        self.apogee_time = apogee_time
+        self.max_q = max_q
+        self.burn_time = burn_time
+        self.burnout_altitude = burnout_altitude
+        self.burnout_velocity = burnout_velocity
+        self.separated = separated
+
+    def __len__(self):
+        return self.apogee.size
+
+    def __repr__(self):
+        return f"BatchTrajectoryResult({len(self)} vehicles, {np.count_nonzero(self.separated)} separated)"
+
+class OptimisationResult:
+    """Results of an engine design optimisation from bamboo.optimise.run_optimisation().
+
+    Args:
+        design (dict): Value of each design variable for the best design found.
+        objective (float): Value of the objective for the best design.
+        feasible (bool): True if the best design meets every constraint. If False, no design that was evaluated met all of them.
+        margins (dict): Margin for each constraint, for the best design (zero or positive means the constraint is met).
+        metrics (dict): Value of each extra metric, for the best design.
+        engine (Engine): Engine built from the best design, or None if it failed to evaluate.
+        history (SweepResult): Table of every design that was evaluated, with columns for each design variable, "objective", "score", "feasible", each metric and each constraint margin.
+        evaluations (int): Number of designs that were evaluated.
+        repeated_designs (int): Number of designs requested by the optimiser that had already been evaluated, so were not evaluated again.
+        cache_hits (int): Number of heating analyses that were loaded from the ResultCache instead of being run, counted in every process. Zero if no cache was used.
+        message (str): Reason the optimiser stopped.
+    """
+    def __init__(self, design, objective, feasible, margins, metrics, engine, history, evaluations, repeated_designs, cache_hits, message):
+        self.design = design
+        self.objective = objective
+        self.feasible = feasible
+        self.margins = margins
+        self.metrics = metrics
+        self.engine = engine
+        self.history = history
+        self.evaluations = evaluations
+        self.repeated_designs = repeated_designs
+        self.cache_hits = cache_hits
+        self.message = message
+
+    def __repr__(self):
+        return f"OptimisationResult(objective = {self.objective:.6g}, feasible = {self.feasible}, design = {self.design}, {self.evaluations} evaluations)"
@@ -0,0 +1,290 @@
+"""Module for running parameter sweeps of steady state heating analyses, in parallel across multiple processes.
+
+Example:
+    >>> import bamboo.sweep
+    >>> results = bamboo.sweep.run_sweep(engine, {"mdot_coolant" : [0.8, 1.0, 1.2], "channel_height" : [1e-3, 2e-3]})
+    >>> results["T_wall_inner_max"]
+"""
+
+import os
+import copy
+import itertools
+import time
+import concurrent.futures
+import numpy as np
+
+import bamboo.main
+import bamboo.results
+
+#Parameters that are passed to Engine.add_cooling_jacket() when the cooling jacket is rebuilt
+JACKET_PARAMETERS = ["mdot_coolant", "inlet_T", "inlet_p0", "channel_height", "channel_width", "blockage_ratio", "xs", "coolant_transport", "inner_wall", "outer_wall"]
+
+#Parameters that are stored on the EngineGeometry
+GEOMETRY_PARAMETERS = ["inner_wall_thickness"]
+
+def T_wall_inner_max(result):
+    """Maximum exhaust gas side wall temperature (K)"""
+    return np.max(result["T_wall_inner"])
+
+def T_coolant_out(result):
+    """Coolant temperature at the outlet of the cooling jacket (K)"""
+    return np.nanmax(result["T_coolant"])
+
+def p0_coolant_drop(result):
+    """Stagnation pressure drop through the cooling jacket (Pa)"""
+    return np.nanmax(result["p0_coolant"]) - np.nanmin(result["p0_coolant"])
+
+def q_dot_max(result):
+    """Maximum heat transfer rate per unit length (W/m)"""
+    return np.nanmax(result["q_dot"])
+
+def boil_off_position(result):
+    """x position of any coolant boil off, or NaN if the coolant does not boil (m)"""
+    return np.nan if result["boil_off_position"] is None else result["boil_off_position"]
+
+DEFAULT_OUTPUTS = {"T_wall_inner_max" : T_wall_inner_max,
+                   "T_coolant_out" : T_coolant_out,
+                   "p0_coolant_drop" : p0_coolant_drop,
+                   "q_dot_max" : q_dot_max,
+                   "boil_off_position" : boil_off_position}
+
+def grid(parameters):
+    """Get every combination of a set of parameter values (i.e. a full factorial design).
+
+    Args:
+        parameters (dict): Lists of values for each parameter, e.g. {"mdot_coolant" : [1.0, 1.2], "inlet_p0" : [40e5, 60e5]}
+
+    Returns:
+        list: List of dictionaries, one per case, e.g. [{"mdot_coolant" : 1.0, "inlet_p0" : 40e5}, {"mdot_coolant" : 1.0, "inlet_p0" : 60e5}, ...]
+    """
+    names = list(parameters)
+    return [dict(zip(names, values)) for values in itertools.product(*[parameters[name] for name in names])]
+
+def apply_parameters(engine, case, check_choked = True):
+    """Modify an Engine in place, to apply a set of parameter values.
+
+    Cooling jacket parameters (see JACKET_PARAMETERS) are applied by rebuilding the cooling jacket with Engine.add_cooling_jacket(), so any quantities derived from
+    them (e.g. the flow area of spiral channels) are kept consistent. 'inner_wall_thickness' is applied to the EngineGeometry. Any other parameter name is treated as an attribute
+    path on the engine, e.g. "cooling_jacket.coolant_transport.custom_mu" or "chamber_conditions.p0". Engine.c_star is then recalculated, since it depends on the chamber 
+    conditions and nozzle, and the throat is checked to still be choked like it is when an Engine is created.
+
+    Args:
+        engine (Engine): Engine to modify
+        case (dict): Value of each parameter
+        check_choked (bool, optional): If True, a ValueError is raised if the nozzle throat is no longer choked. Set to False if the throat is going to be resized afterwards. Defaults to True.
+    """
+    jacket_changes = {}
+
+    for name, value in case.items():
+        if name in JACKET_PARAMETERS:
+            jacket_changes[name] = value
+
+        elif name in GEOMETRY_PARAMETERS:
+            thickness = [value] if np.ndim(value) == 0 else list(value)
+            engine.geometry.inner_wall_thickness = thickness
+            engine.geometry.inner_wall_thickness_xs = np.linspace(engine.geometry.x_min, engine.geometry.x_max, len(thickness))
+
+        else:
+            *path, attribute = name.split(".")
+            target = engine
+
+            for part in path:
+                target = getattr(target, part)
+
+            if not hasattr(target, attribute):
+                raise AttributeError(f"'{name}' is not a recognised sweep parameter or engine attribute")
+
+            setattr(target, attribute, value)
+
+    if len(jacket_changes) > 0:
+        _rebuild_cooling_jacket(engine, jacket_changes)
+
+    #Things the Engine works out from its chamber conditions when it's created, which changing them in place doesn't update
+    engine.c_star = engine.chamber_conditions.p0 * engine.nozzle.At / engine.chamber_conditions.mdot
+
+    if check_choked:
+        max_throat_area = bamboo.main.get_throat_area(engine.perfect_gas, engine.chamber_conditions)
+        if engine.nozzle.At > max_throat_area:
+            raise ValueError(f"The nozzle throat is not choked with these parameters. The throat area would need to be reduced to at least {max_throat_area} m^2")
+
+    engine.clear_flow_cache()
+
+def _rebuild_cooling_jacket(engine, changes):
+    """Recreate the engine's cooling jacket with Engine.add_cooling_jacket(), using the existing jacket's settings except for those in 'changes'.
+    """
+    jacket = engine.cooling_jacket
+
+    settings = {"inner_wall" : jacket.inner_wall,
+                "inlet_T" : jacket.inlet_T,
+                "inlet_p0" : jacket.inlet_p0,
+                "coolant_transport" : jacket.coolant_transport,
+                "mdot_coolant" : jacket.mdot_coolant,
+                "xs" : jacket.xs,
+                "configuration" : jacket.configuration}
+
+    for key in ["outer_wall", "channel_shape", "channel_width", "channel_height", "blockage_ratio"]:
+        if hasattr(jacket, key):
+            settings[key] = getattr(jacket, key)
+
+    if getattr(jacket, "channel_shape", None) == "custom":
+        settings["custom_flow_area"] = jacket.flow_area
+        settings["custom_effective_diameter"] = jacket.effective_diameter
+
+    settings.update(changes)
+    engine.add_cooling_jacket(**settings)
+
+def run_case(engine, case, analysis_kwargs = None, outputs = None):
+    """Run a single case of a sweep. The engine is copied first, so it is not modified.
+
+    Args:
+        engine (Engine): Base engine
+        case (dict): Value of each parameter, see apply_parameters()
+        analysis_kwargs (dict, optional): Keyword arguments for Engine.steady_heating_analysis(). If a 'mesh' is given, only its x positions are used - the rest of the mesh is rebuilt for the case. Defaults to None.
+        outputs (dict, optional): Functions that reduce a HeatingResult to a single number, keyed by the name of the output. Defaults to None (uses DEFAULT_OUTPUTS).
+
+    Returns:
+        dict: Value of each output
+    """
+    outputs = DEFAULT_OUTPUTS if outputs is None else outputs
+    kwargs = {"to_json" : False}
+    kwargs.update(analysis_kwargs if analysis_kwargs is not None else {})
+
+    variant = copy.deepcopy(engine)
+    apply_parameters(variant, case)
+
+    #A mesh stores radii and channel areas which depend on the parameters, so it is rebuilt for each case at the same x positions
+    if kwargs.get("mesh") is not None:
+        x = kwargs["mesh"].x
+
+        if not (np.isclose(np.max(x), variant.geometry.x_max) and np.isclose(np.min(x), variant.geometry.x_min)):
+            raise ValueError("The parameters change the length of the engine, so the 'mesh' in analysis_kwargs can't be used. Use 'number_of_points' instead.")
+
+        kwargs["mesh"] = variant.discretise(x = x)
+
+    result = variant.steady_heating_analysis(**kwargs)
+
+    return {name : function(result) for name, function in outputs.items()}
+
+#State of each worker process, set once by _initialise_worker() so the engine isn't pickled again for every case
+_worker = {}
+
+def _initialise_worker(engine, analysis_kwargs, outputs):
+    _worker["engine"] = engine
+    _worker["analysis_kwargs"] = analysis_kwargs
+    _worker["outputs"] = outputs
+
+def _run_chunk(chunk, engine = None, analysis_kwargs = None, outputs = None):
+    """Run a list of (index, case) pairs, catching any exceptions so that one failed case doesn't stop the rest of the sweep.
+
+    Returns:
+        list: List of (index, outputs, error) tuples. 'error' is None if the case succeeded, and 'outputs' is None if it failed.
+    """
+    if engine is None:
+        engine = _worker["engine"]
+        analysis_kwargs = _worker["analysis_kwargs"]
+        outputs = _worker["outputs"]
+
+    results = []
+
+    for index, case in chunk:
+        try:
+            results.append((index, run_case(engine, case, analysis_kwargs, outputs), None))
+        except Exception as error:
+            results.append((index, None, f"{type(error).__name__}: {error}"))
+
+    return results
+
+def run_sweep(engine, parameters, analysis_kwargs = None, outputs = None, max_workers = None, chunksize = None, progress = True):
+    """Run Engine.steady_heating_analysis() for every combination of a set of parameters, in parallel using a concurrent.futures.ProcessPoolExecutor.
+
+    The base engine is sent to each worker process once, and each case is run on a copy of it with the parameters applied (see apply_parameters()). Only the
+    outputs (one number per case) are sent back, so the time spent communicating between processes is small compared to the analyses, and the sweep scales
+    with the number of processes as long as there are enough cases to keep them busy.
+
+    Any exception raised by a case (e.g. the ValueError raised if the coolant stagnation pressure drops below zero) is caught and stored in the "error" column,
+    and the outputs for that case are set to NaN.
+
+    Note:
+        The engine, the outputs, and anything in 'analysis_kwargs' must be picklable when max_workers is not 1 - so the output functions must be defined at module level
+        (not lambdas). On platforms which start processes with 'spawn' (Windows and macOS), run_sweep() must be called from inside an 'if __name__ == "__main__":' block.
+
+    Args:
+        engine (Engine): Base engine, with a geometry, exhaust transport model and cooling jacket already added. It is not modified.
+        parameters (dict or list): Either a dictionary of lists of values for each parameter, in which case every combination is run (see grid()), or a list of dictionaries with one per case.
+        analysis_kwargs (dict, optional): Keyword arguments for Engine.steady_heating_analysis(), e.g. {"number_of_points" : 500}. .JSON exporting is turned off unless 'to_json' is given. If a 'mesh' is given, it is rebuilt for each case at the same x positions (so it can't be used with parameters that change the length of the engine). Defaults to None.
+        outputs (dict, optional): Functions that reduce a HeatingResult to a single number, keyed by the name of the output. Defaults to None (uses bamboo.sweep.DEFAULT_OUTPUTS).
+        max_workers (int, optional): Number of processes to use. If 1, the cases are run one after another in the current process. Defaults to None (one per CPU).
+        chunksize (int, optional): Number of cases to send to a process at a time. Defaults to None (splits the cases into about four chunks per process).
+        progress (bool or callable, optional): If True, progress is printed as chunks finish. If callable, it is called as progress(cases_done, total_cases, failed_cases) instead. Defaults to True.
+
+    Returns:
+        SweepResult: Table of results, with one column per parameter and per output, and an "error" column.
+    """
+    cases = grid(parameters) if isinstance(parameters, dict) else list(parameters)
+    outputs = DEFAULT_OUTPUTS if outputs is None else outputs
+    parameter_names = list(dict.fromkeys(name for case in cases for name in case))
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    if chunksize is None:
+        chunksize = max(1, len(cases) // (4*max_workers))
+
+    indexed_cases = list(enumerate(cases))
+    chunks = [indexed_cases[i:i + chunksize] for i in range(0, len(indexed_cases), chunksize)]
+
+    output_values = {name : np.full(len(cases), np.nan) for name in outputs}
+    errors = [None]*len(cases)
+    done = 0
+    failed = 0
+    start_time = time.time()
+
+    def collect(chunk_results):
+        nonlocal done, failed
+
+        for index, case_outputs, error in chunk_results:
+            if error is None:
+                for name, value in case_outputs.items():
+                    output_values[name][index] = value
+            else:
+                errors[index] = error
+                failed += 1
+
+        done += len(chunk_results)
+
+        if callable(progress):
+            progress(done, len(cases), failed)
+        elif progress:
+            print(f"Sweep progress: {done}/{len(cases)} cases complete ({failed} failed), {time.time() - start_time:.1f} s elapsed")
+
+    if max_workers == 1:
+        for chunk in chunks:
+            collect(_run_chunk(chunk, engine, analysis_kwargs, outputs))
+
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers = max_workers,
+                                                    initializer = _initialise_worker,
+                                                    initargs = (engine, analysis_kwargs, outputs)) as executor:
+
+            futures = [executor.submit(_run_chunk, chunk) for chunk in chunks]
+
+            for future in concurrent.futures.as_completed(futures):
+                collect(future.result())
+
+    columns = {}
+    for name in parameter_names:
+        values = [case.get(name) for case in cases]
+        try:
+            columns[name] = np.asarray(values, dtype = float)
+        except (TypeError, ValueError):
+            columns[name] = np.asarray(values, dtype = object)
+
+    columns.update(output_values)
+
+    #Only keep the settings that can be stored in a .JSON header (e.g. not 'mesh')
+    settings = {key : value for key, value in (analysis_kwargs if analysis_kwargs is not None else {}).items() if isinstance(value, (str, int, float, bool, type(None)))}
+
+    return bamboo.results.SweepResult(columns = columns,
+                                      errors = errors,
+                                      parameters = parameter_names,
+                                      metadata = engine.results_metadata("steady_heating_analysis", **settings))
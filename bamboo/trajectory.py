@@ -0,0 +1,277 @@
+"""1D vertical trajectory simulations of a launch vehicle powered by an Engine, for estimating apogee. Uses an adaptive Runge-Kutta method with dense output
+(scipy.integrate.solve_ivp), so the step size is only as small as it needs to be for the requested tolerances.
+
+Notes:
+    - The state is [altitude, vertical velocity], with everything positive upwards.
+    - Engine burnout is a discontinuity in the thrust and mass flow, so the powered and coasting phases are integrated separately, and the integrator never steps across it.
+    - Apogee is found as the root of the vertical velocity (using the dense output), rather than as the first step where the altitude decreases.
+    - Drag uses a constant drag coefficient, and gravity is constant.
+
+Example:
+    >>> result = bamboo.trajectory.simulate(dry_mass = 60, propellant_mass = 40, engine = engine, cross_sectional_area = 0.03)
+    >>> result.apogee
+"""
+
+import numpy as np
+import bamboo.atmosphere
+import bamboo.results
+
+G0 = 9.80665                #Standard gravitational acceleration (m/s^2)
+
+def derivatives(t, y, engine, dry_mass, propellant_mass, cross_sectional_area, drag_coefficient, engine_on):
+    """Rate of change of the state [altitude, velocity]. Vectorised, so 'y' can either have shape (2,) or (2, k) to evaluate k states at once.
+
+    Args:
+        t (float): Time since ignition (s)
+        y (array): State, [altitude, velocity], in (m, m/s)
+        engine (Engine): Engine powering the vehicle
+        dry_mass (float): Dry mass of the vehicle (kg)
+        propellant_mass (float): Initial propellant mass (kg)
+        cross_sectional_area (float): Cross sectional area used for calculating drag (m^2)
+        drag_coefficient (float): Drag coefficient
+        engine_on (bool): Whether the engine is burning
+
+    Returns:
+        array: [velocity, acceleration], with the same shape as y
+    """
+    altitude, velocity = y[0], y[1]
+    p_amb, density_amb = bamboo.atmosphere.pressure_and_density(altitude)
+
+    #Drag always opposes the velocity
+    drag = 0.5*density_amb*velocity*np.abs(velocity)*drag_coefficient*cross_sectional_area
+
+    if engine_on:
+        mass = dry_mass + propellant_mass - engine.chamber_conditions.mdot*t
+        thrust, separated = engine.thrust(p_amb, return_separation = True)
+
+        if np.any(separated):
+            raise ValueError(f"Flow separation occured in the nozzle at an altitude of {np.min(np.asarray(altitude)[separated])/1000} km")
+    else:
+        mass = dry_mass
+        thrust = 0.0
+
+    acceleration = (thrust - drag)/mass - G0
+
+    return np.array([velocity, acceleration])
+
+def _apogee_event(t, y, *args):
+    return y[1]
+
+_apogee_event.terminal = True
+_apogee_event.direction = -1
+
+def _ground_event(t, y, *args):
+    return y[0]
+
+_ground_event.terminal = True
+_ground_event.direction = -1
+
+def simulate(dry_mass, propellant_mass, engine, cross_sectional_area, drag_coefficient = 0.75, rtol = 1e-8, atol = (1e-3, 1e-6), method = "RK45", max_step = np.inf):
+    """Simulate the flight of a vehicle from launch up to apogee.
+
+    Args:
+        dry_mass (float): Dry mass of the vehicle (kg)
+        propellant_mass (float): Initial propellant mass (kg)
+        engine (Engine): Engine powering the vehicle. The burn time is propellant_mass/mdot.
+        cross_sectional_area (float): Cross sectional area used for calculating drag (m^2)
+        drag_coefficient (float, optional): Drag coefficient, assumed constant. Defaults to 0.75.
+        rtol (float, optional): Relative tolerance for the integrator. Defaults to 1e-8.
+        atol (float or tuple, optional): Absolute tolerance for the integrator, either for both states or as (altitude, velocity) in (m, m/s). Defaults to (1e-3, 1e-6).
+        method (str, optional): Integration method for scipy.integrate.solve_ivp(). Defaults to "RK45" (Dormand-Prince 5(4)).
+        max_step (float, optional): Maximum step size (s). Defaults to np.inf.
+
+    Returns:
+        TrajectoryResult: Results of the simulation, including the apogee and the state at burnout.
+    """
+    import scipy.integrate
+
+    burn_time = propellant_mass/engine.chamber_conditions.mdot
+    events = [_apogee_event, _ground_event]
+    settings = {"method" : method, "rtol" : rtol, "atol" : atol, "max_step" : max_step, "dense_output" : True, "vectorized" : True, "events" : events}
+
+    #Powered phase, which ends at burnout (unless the vehicle never gets off the ground)
+    powered = scipy.integrate.solve_ivp(derivatives,
+                                        (0.0, burn_time),
+                                        [0.0, 0.0],
+                                        args = (engine, dry_mass, propellant_mass, cross_sectional_area, drag_coefficient, True),
+                                        **settings)
+    phases = [powered]
+
+    if powered.status == 1:
+        #Reached a terminal event before burnout
+        burnout = (np.nan, np.nan)
+        end = powered
+
+    else:
+        burnout = (powered.y[0, -1], powered.y[1, -1])
+
+        #Coasting phase, up to apogee. Integrate for long enough that the vehicle must have stopped rising (v = g*t) - the apogee event will stop it first.
+        coast_time = 2*max(powered.y[1, -1], 0.0)/G0 + 10.0
+        coast = scipy.integrate.solve_ivp(derivatives,
+                                          (burn_time, burn_time + coast_time),
+                                          powered.y[:, -1],
+                                          args = (engine, dry_mass, propellant_mass, cross_sectional_area, drag_coefficient, False),
+                                          **settings)
+        phases.append(coast)
+        end = coast
+
+    #Apogee is where the velocity crosses zero. If the vehicle hit the ground or never took off, it's the highest point reached.
+    if len(end.t_events[0]) > 0:
+        apogee_time, apogee = end.t_events[0][0], end.y_events[0][0][0]
+    else:
+        t_all = np.concatenate([phase.t for phase in phases])
+        altitude_all = np.concatenate([phase.y[0] for phase in phases])
+        apogee_time, apogee = t_all[np.argmax(altitude_all)], np.max(altitude_all)
+
+    return bamboo.results.TrajectoryResult(t = np.concatenate([phase.t for phase in phases]),
+                                           y = np.concatenate([phase.y for phase in phases], axis = 1),
+                                           solutions = [(phase.t[0], phase.t[-1], phase.sol) for phase in phases],
+                                           apogee = float(apogee),
+                                           apogee_time = float(apogee_time),
+                                           burn_time = burn_time,
+                                           burnout_altitude = float(burnout[0]),
+                                           burnout_velocity = float(burnout[1]),
+                                           evaluations = sum(phase.nfev for phase in phases))
+
+def _batch_derivatives(t, state, engine_on, engine, dry_mass, propellant_mass, cross_sectional_area, drag_coefficient):
+    """Rate of change of the states of a batch of vehicles, with shape (N, 2). All of the arguments except 'engine' are arrays with one element per vehicle.
+    The thrust for every vehicle with its engine on is found in a single call to Engine.thrust().
+
+    Returns:
+        tuple: (derivative, separated), where derivative has shape (N, 2) and separated is a boolean array that is True where the flow separated in the nozzle.
+    """
+    altitude, velocity = state[:, 0], state[:, 1]
+    p_amb, density_amb = bamboo.atmosphere.pressure_and_density(altitude)
+    drag = 0.5*density_amb*velocity*np.abs(velocity)*drag_coefficient*cross_sectional_area
+
+    thrust = np.zeros(len(state))
+    separated = np.zeros(len(state), dtype = bool)
+
+    if np.any(engine_on):
+        thrust[engine_on], separated[engine_on] = engine.thrust(p_amb[engine_on], return_separation = True)
+
+    mass = np.where(engine_on, dry_mass + propellant_mass - engine.chamber_conditions.mdot*t, dry_mass)
+    acceleration = (np.where(separated, 0.0, thrust) - drag)/mass - G0
+
+    return np.stack([velocity, acceleration], axis = 1), separated
+
+def _hermite_apogee(h, altitude_0, altitude_1, velocity_0, velocity_1):
+    """Find the time and altitude of apogee within a step, using the cubic Hermite interpolant of the altitude (which matches the altitude and velocity
+    at both ends of the step). The velocity must be positive at the start of the step, and zero or negative at the end.
+
+    Returns:
+        tuple: (time since the start of the step, apogee altitude)
+    """
+    m0, m1 = h*velocity_0, h*velocity_1
+
+    #Derivative of the interpolant with respect to s = (t - t_0)/h is a*s^2 + b*s + c
+    a = 6*altitude_0 + 3*m0 - 6*altitude_1 + 3*m1
+    b = -6*altitude_0 - 4*m0 + 6*altitude_1 - 2*m1
+    c = m0
+
+    #The derivative changes sign between s = 0 and s = 1, so there's exactly one root in that interval. Start from linear interpolation in case the quadratic is degenerate.
+    s = velocity_0/(velocity_0 - velocity_1)
+
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        root = np.sqrt(np.maximum(b**2 - 4*a*c, 0.0))
+        for candidate in [(-b + root)/(2*a), (-b - root)/(2*a)]:
+            s = np.where((np.abs(a) > 1e-12*np.abs(b)) & (candidate >= 0) & (candidate <= 1), candidate, s)
+
+    altitude = (2*s**3 - 3*s**2 + 1)*altitude_0 + (s**3 - 2*s**2 + s)*m0 + (-2*s**3 + 3*s**2)*altitude_1 + (s**3 - s**2)*m1
+
+    return s*h, altitude
+
+def simulate_batch(dry_mass, propellant_mass, engine, cross_sectional_area, drag_coefficient = 0.75, dt = 0.05):
+    """Simulate the flights of many vehicles at once, all powered by the same engine, from launch up to apogee. The states of all the vehicles are stored in one (N, 2) array
+    and stepped forward together with the classical Runge-Kutta method, so the thrust for every vehicle is found in one call to Engine.thrust() per stage.
+
+    Each vehicle has its own burnout and apogee handling - the step that reaches burnout is shortened so that it ends exactly at burnout (so no step straddles the 
+    discontinuity), and apogee is found by root finding on the cubic interpolant of the step where the velocity changes sign. Vehicles stop being stepped once 
+    they reach apogee.
+
+    Args:
+        dry_mass (float or array): Dry mass of each vehicle (kg)
+        propellant_mass (float or array): Initial propellant mass of each vehicle (kg). The burn time is propellant_mass/mdot.
+        engine (Engine): Engine powering the vehicles.
+        cross_sectional_area (float or array): Cross sectional area of each vehicle, used for calculating drag (m^2)
+        drag_coefficient (float or array, optional): Drag coefficient of each vehicle, assumed constant. Defaults to 0.75.
+        dt (float, optional): Timestep (s). Defaults to 0.05.
+
+    Returns:
+        BatchTrajectoryResult: Arrays of the apogee, maximum dynamic pressure and burnout conditions for each vehicle. Vehicles whose nozzle flow separated have NaN results.
+    """
+    dry_mass, propellant_mass, cross_sectional_area, drag_coefficient = [np.array(value, dtype = 'float') for value in 
+                                                                         np.broadcast_arrays(dry_mass, propellant_mass, cross_sectional_area, drag_coefficient)]
+    shape = dry_mass.shape
+    dry_mass, propellant_mass, cross_sectional_area, drag_coefficient = dry_mass.ravel(), propellant_mass.ravel(), cross_sectional_area.ravel(), drag_coefficient.ravel()
+    number_of_vehicles = len(dry_mass)
+
+    burn_time = propellant_mass/engine.chamber_conditions.mdot
+    t = np.zeros(number_of_vehicles)
+    state = np.zeros((number_of_vehicles, 2))
+
+    apogee = np.full(number_of_vehicles, np.nan)
+    apogee_time = np.full(number_of_vehicles, np.nan)
+    burnout_altitude = np.full(number_of_vehicles, np.nan)
+    burnout_velocity = np.full(number_of_vehicles, np.nan)
+    max_q = np.zeros(number_of_vehicles)
+    separated = np.zeros(number_of_vehicles, dtype = bool)
+    active = np.ones(number_of_vehicles, dtype = bool)
+
+    while np.any(active):
+        i = np.flatnonzero(active)
+        t_i, y_i = t[i], state[i]
+        args = (engine, dry_mass[i], propellant_mass[i], cross_sectional_area[i], drag_coefficient[i])
+
+        #Shorten the step for vehicles that would otherwise step past burnout
+        engine_on = t_i < burn_time[i]
+        h = np.where(engine_on, np.minimum(dt, burn_time[i] - t_i), dt)
+
+        #Classical Runge-Kutta step
+        k1, separated_1 = _batch_derivatives(t_i, y_i, engine_on, *args)
+        k2, separated_2 = _batch_derivatives(t_i + h/2, y_i + (h/2)[:, np.newaxis]*k1, engine_on, *args)
+        k3, separated_3 = _batch_derivatives(t_i + h/2, y_i + (h/2)[:, np.newaxis]*k2, engine_on, *args)
+        k4, separated_4 = _batch_derivatives(t_i + h, y_i + h[:, np.newaxis]*k3, engine_on, *args)
+
+        y_new = y_i + (h/6)[:, np.newaxis]*(k1 + 2*k2 + 2*k3 + k4)
+        t_new = np.where(engine_on & (h == burn_time[i] - t_i), burn_time[i], t_i + h)
+
+        #Vehicles whose nozzle flow separated are stopped, with NaN results
+        stage_separated = separated_1 | separated_2 | separated_3 | separated_4
+        separated[i[stage_separated]] = True
+
+        #Record the state at burnout
+        burnt_out = engine_on & (t_new >= burn_time[i]) & ~stage_separated
+        burnout_altitude[i[burnt_out]] = y_new[burnt_out, 0]
+        burnout_velocity[i[burnt_out]] = y_new[burnt_out, 1]
+
+        #Maximum dynamic pressure, q = 0.5*rho*v^2
+        q = 0.5*bamboo.atmosphere.density(y_new[:, 0])*y_new[:, 1]**2
+        max_q[i] = np.maximum(max_q[i], q)
+
+        #Vehicles that never leave the ground have their apogee at the starting point
+        no_lift_off = (y_i[:, 1] <= 0) & (y_new[:, 1] <= 0)
+
+        #Apogee, where the velocity changes from positive to zero or negative
+        reached_apogee = (y_i[:, 1] > 0) & (y_new[:, 1] <= 0)
+        step_time, step_apogee = _hermite_apogee(h, y_i[:, 0], y_new[:, 0], y_i[:, 1], y_new[:, 1])
+
+        apogee[i] = np.where(reached_apogee, step_apogee, np.where(no_lift_off, y_i[:, 0], apogee[i]))
+        apogee_time[i] = np.where(reached_apogee, t_i + step_time, np.where(no_lift_off, t_i, apogee_time[i]))
+
+        finished = reached_apogee | no_lift_off | stage_separated
+        active[i[finished]] = False
+
+        t[i] = t_new
+        state[i] = y_new
+
+    for array in (apogee, apogee_time, burnout_altitude, burnout_velocity, max_q):
+        array[separated] = np.nan
+
+    return bamboo.results.BatchTrajectoryResult(apogee = apogee.reshape(shape),
+                                                apogee_time = apogee_time.reshape(shape),
+                                                max_q = max_q.reshape(shape),
+                                                burn_time = burn_time.reshape(shape),
+                                                burnout_altitude = burnout_altitude.reshape(shape),
+                                                burnout_velocity = burnout_velocity.reshape(shape),
+                                                separated = separated.reshape(shape))
@@ -0,0 +1,35 @@
+'''
+Measures how long 'import bamboo' takes in a fresh Python process (which is what each worker in a process pool pays), and how long it takes once the
+slow optional modules (matplotlib, scipy.optimize and ambiance) are loaded as well. bamboo only imports these when they're first used.
+'''
+
+import subprocess
+import sys
+import numpy as np
+
+number_of_runs = 10
+
+'''Code to time in each fresh process'''
+statements = {"import bamboo" : "import bamboo",
+              "import bamboo, bamboo.plot (matplotlib)" : "import bamboo, bamboo.plot",
+              "import bamboo + matplotlib, scipy.optimize and ambiance" : "import bamboo, bamboo.plot, scipy.optimize, ambiance"}
+
+heavy_modules = ["matplotlib", "scipy", "scipy.optimize", "ambiance", "thermo", "CoolProp"]
+
+def time_import(statement):
+    code = f"import time, sys; t = time.perf_counter(); {statement}; t = time.perf_counter() - t; " \
+           f"print(t); print('loaded:' + ','.join(m for m in {heavy_modules} if m in sys.modules))"
+
+    output = subprocess.run([sys.executable, "-c", code], capture_output = True, text = True, check = True).stdout.split("\n")
+    return float(output[-3]), output[-2][len("loaded:"):]
+
+'''Run the benchmark'''
+for name, statement in statements.items():
+    times = []
+
+    for i in range(number_of_runs):
+        t, loaded = time_import(statement)
+        times.append(t)
+
+    print(f"{name}: median {np.median(times)*1000:.0f} ms over {number_of_runs} runs")
+    print(f"    Slow modules loaded: {loaded if loaded != '' else 'none'}")
@@ -0,0 +1,82 @@
+'''
+Optimises the nozzle area ratio, chamber pressure, mixture ratio and L* of a regeneratively cooled engine together, to maximise apogee without flow separation,
+coolant boil off, or the inner wall getting too hot. Each generation of designs is evaluated in parallel, and the heating analyses are cached on disk
+so running the script again is much faster.
+'''
+import bamboo as bam
+import bamboo.cooling as cool
+import bamboo.materials
+import bamboo.optimise
+import bamboo.cache
+
+import numpy as np
+import pypropep as ppp
+import thermo
+
+'''Engine dimensions'''
+Ac = np.pi*0.1**2               #Chamber cross-sectional area (m^2)
+L_star = 1.5                    #L_star = Volume_c/Area_t
+inner_wall_thickness = 2e-3
+
+'''Chamber conditions (starting point for the optimisation)'''
+pc = 15e5               #Chamber pressure (Pa)
+p_tank = 40e5           #Tank / inlet coolant stagnation pressure (Pa) - used for cooling jacket
+mdot = 5.4489           #Mass flow rate (kg/s)
+p_amb = 1.01325e5       #Ambient pressure (Pa). 1.01325e5 is sea level atmospheric.
+OF_ratio = 3.5          #Oxidiser/fuel mass ratio
+
+'''Vehicle'''
+vehicle = {"dry_mass" : 60, "propellant_mass" : 50, "cross_sectional_area" : 0.03}
+
+'''Get combustion properties from pypropep'''
+ppp.init()
+
+def combustion_gas(OF_ratio, pc):
+    e = ppp.Equilibrium()
+    ipa = ppp.PROPELLANTS['ISOPROPYL ALCOHOL']
+    n2o = ppp.PROPELLANTS['NITROUS OXIDE']
+    e.add_propellants_by_mass([(ipa, 1), (n2o, OF_ratio)])
+    e.set_state(P = pc/1e5, type='HP')                      #Adiabatic combustion (enthalpy H is unchanged, P is given)
+
+    perfect_gas = bam.PerfectGas(gamma = e.properties.Isex, cp = 1000*e.properties.Cp)
+    return perfect_gas, e.properties.T
+
+def set_mixture_ratio(engine, value):
+    #Setter for the "OF_ratio" design variable. It's called after the chamber pressure has been changed, so the combustion is calculated at the new pressure.
+    engine.perfect_gas, engine.chamber_conditions.T0 = combustion_gas(value, engine.chamber_conditions.p0)
+
+'''Create the engine object'''
+perfect_gas, Tc = combustion_gas(OF_ratio, pc)
+chamber_conditions = bam.ChamberConditions(pc, Tc, mdot)
+nozzle = bam.Nozzle.from_engine_components(perfect_gas, chamber_conditions, p_amb, type = "rao", length_fraction = 0.8)
+white_dwarf = bam.Engine(perfect_gas, chamber_conditions, nozzle)
+
+white_dwarf.add_geometry(L_star*nozzle.At/Ac, Ac, inner_wall_thickness)
+white_dwarf.add_exhaust_transport(cool.TransportProperties(model = "custom", custom_Pr = 0.8, custom_mu = 9e-5, custom_k = 0.2))
+white_dwarf.add_cooling_jacket(bam.materials.CopperC700, 298.15, p_tank,
+                               cool.TransportProperties(model = "thermo", thermo_object = thermo.chemical.Chemical('isopropanol'), force_phase = 'l'),
+                               mdot/(OF_ratio + 1), configuration = "vertical", channel_height = 0.001, blockage_ratio = 0.5)
+
+'''Run the optimisation'''
+if __name__ == "__main__":
+    result = bamboo.optimise.run_optimisation(white_dwarf,
+                                              bounds = {"area_ratio" : [3, 8], "p0" : [10e5, 30e5], "OF_ratio" : [2.5, 5], "L_star" : [1.0, 2.5]},
+                                              objective = bamboo.optimise.apogee,
+                                              constraints = [bamboo.optimise.no_separation,
+                                                             bamboo.optimise.coolant_above_chamber_pressure,
+                                                             bamboo.optimise.no_boil_off,
+                                                             bamboo.optimise.Limit(bamboo.optimise.T_wall_inner_max, maximum = 900)],
+                                              metrics = [bamboo.optimise.isp, bamboo.optimise.T_wall_inner_max],
+                                              vehicle = vehicle,
+                                              analysis_kwargs = {"number_of_points" : 200},
+                                              setters = {"OF_ratio" : set_mixture_ratio},
+                                              cache = bamboo.cache.ResultCache(),
+                                              seed = 0)
+
+    print(result)
+
+    if result.feasible:
+        print(f"Apogee = {result.objective/1000} km, Isp = {result.metrics['isp']} s, maximum wall temperature = {result.metrics['T_wall_inner_max']} K")
+        print(result.engine.nozzle)
+
+    result.history.to_json("data/optimisation_history.json")
@@ -0,0 +1,38 @@
+"""
+Small engines shared by the tests. They use a custom exhaust transport model and few stations, so the analyses are quick.
+"""
+import numpy as np
+import pytest
+import thermo
+
+import bamboo as bam
+import bamboo.cooling as cool
+import bamboo.materials
+
+def make_engine(cooling_jacket = True, ablative = False):
+    perfect_gas = bam.PerfectGas(gamma = 1.264, molecular_weight = 21.627)
+    chamber_conditions = bam.ChamberConditions(30e5, 2458.89, 5.4489)
+    nozzle = bam.Nozzle.from_engine_components(perfect_gas, chamber_conditions, 1.01325e5)
+    engine = bam.Engine(perfect_gas, chamber_conditions, nozzle)
+
+    engine.add_geometry(0.3, np.pi*0.1**2, 2e-3)
+    engine.add_exhaust_transport(cool.TransportProperties(model = "custom", custom_Pr = 0.8, custom_mu = 9e-5, custom_k = 0.2))
+
+    if cooling_jacket:
+        water = cool.TransportProperties(model = "thermo", thermo_object = thermo.chemical.Chemical('water'), force_phase = 'l')
+        engine.add_cooling_jacket(bam.materials.CopperC700, 298.15, 60e5, water, 1.2, configuration = "vertical", channel_height = 0.001, blockage_ratio = 0.5)
+
+    if ablative:
+        engine.add_ablative(bam.materials.Graphite, bam.materials.CopperC700)
+
+    return engine
+
+@pytest.fixture
+def regen_engine():
+    """Engine with a vertical channel cooling jacket, for the steady heating analysis."""
+    return make_engine()
+
+@pytest.fixture
+def ablative_engine():
+    """Engine with an ablative and no cooling jacket, for the transient heating analysis."""
+    return make_engine(cooling_jacket = False, ablative = True)
@@ -0,0 +1,154 @@
+"""
+Tests for the on-disk result cache, bamboo.cache.ResultCache.
+"""
+import copy
+import os
+
+import numpy as np
+import pytest
+
+import bamboo.cache
+import bamboo.cooling as cool
+
+def test_steady_hit_and_miss(regen_engine, tmp_path):
+    cache = bamboo.cache.ResultCache(tmp_path)
+
+    first = regen_engine.steady_heating_analysis(number_of_points = 30, to_json = False, cache = cache)
+    assert (cache.hits, cache.misses, len(cache)) == (0, 1, 1)
+
+    second = regen_engine.steady_heating_analysis(number_of_points = 30, to_json = False, cache = cache)
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
+
+    assert list(second) == list(first)
+    for key in first:
+        if isinstance(first[key], np.ndarray):
+            assert np.array_equal(second[key], first[key], equal_nan = True), key
+        else:
+            assert second[key] == first[key], key
+
+    assert second.metadata == first.metadata
+
+def test_changes_are_misses(regen_engine, tmp_path):
+    cache = bamboo.cache.ResultCache(tmp_path)
+    regen_engine.steady_heating_analysis(number_of_points = 30, to_json = False, cache = cache)
+
+    #Different settings
+    regen_engine.steady_heating_analysis(number_of_points = 31, to_json = False, cache = cache)
+    assert (cache.hits, cache.misses) == (0, 2)
+
+    #Different engine
+    variant = copy.deepcopy(regen_engine)
+    variant.cooling_jacket.mdot_coolant = 1.1
+    variant.steady_heating_analysis(number_of_points = 30, to_json = False, cache = cache)
+    assert (cache.hits, cache.misses, len(cache)) == (0, 3, 3)
+
+    #Identical copy of the engine
+    copy.deepcopy(regen_engine).steady_heating_analysis(number_of_points = 30, to_json = False, cache = cache)
+    assert (cache.hits, cache.misses) == (1, 3)
+
+def test_bypass(regen_engine, tmp_path):
+    cache = bamboo.cache.ResultCache(tmp_path, bypass = True)
+    regen_engine.steady_heating_analysis(number_of_points = 30, to_json = False, cache = cache)
+    regen_engine.steady_heating_analysis(number_of_points = 30, to_json = False, cache = cache)
+
+    assert (cache.hits, cache.misses, len(cache)) == (0, 0, 0)
+
+def test_transient_events_in_key(ablative_engine, tmp_path):
+    cache = bamboo.cache.ResultCache(tmp_path)
+    settings = {"number_of_points" : 20, "dt" : 0.1, "t_max" : 5, "to_json" : False, "cache" : cache}
+
+    first = ablative_engine.transient_heating_analysis(events = [cool.time_event(2.0)], **settings)
+    second = ablative_engine.transient_heating_analysis(events = [cool.time_event(2.0)], **settings)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert np.array_equal(second["t"], first["t"])
+    assert second["t_events"] == first["t_events"]
+
+    #Same event function, but a different time
+    ablative_engine.transient_heating_analysis(events = [cool.time_event(3.0)], **settings)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_evicts_least_recently_used(regen_engine, tmp_path):
+    cache = bamboo.cache.ResultCache(tmp_path)
+    paths = []
+
+    #Store three results, marking each one as used a second after the last
+    for i, number_of_points in enumerate([20, 21, 22]):
+        regen_engine.steady_heating_analysis(number_of_points = number_of_points, to_json = False, cache = cache)
+        new_path, = [entry.path for entry in cache._entries() if entry.path not in paths]
+        os.utime(new_path, (1e9 + i, 1e9 + i))
+        paths.append(new_path)
+
+    cache.max_size = cache.size() - 1
+    cache.evict()
+
+    assert len(cache) == 2
+    assert not os.path.exists(paths[0])
+    assert os.path.exists(paths[1]) and os.path.exists(paths[2])
+
+def test_evict_tolerates_deleted_results(regen_engine, tmp_path, monkeypatch):
+    cache = bamboo.cache.ResultCache(tmp_path)
+    regen_engine.steady_heating_analysis(number_of_points = 20, to_json = False, cache = cache)
+    regen_engine.steady_heating_analysis(number_of_points = 21, to_json = False, cache = cache)
+
+    #Another process deletes a result after the directory has been listed
+    entries = cache._entries()
+    os.remove(entries[0].path)
+    monkeypatch.setattr(cache, "_entries", lambda : entries)
+
+    assert cache.size() == entries[1].stat().st_size
+
+    cache.max_size = 1
+    cache.evict()
+
+    assert not os.path.exists(entries[1].path)
+
+@pytest.mark.parametrize("contents", [b"", b"PK\x03\x04 truncated"])
+def test_corrupt_result_is_a_miss(regen_engine, tmp_path, contents):
+    cache = bamboo.cache.ResultCache(tmp_path)
+    first = regen_engine.steady_heating_analysis(number_of_points = 20, to_json = False, cache = cache)
+
+    #E.g. a process that was killed while another one was reading the file
+    path, = [entry.path for entry in cache._entries()]
+    with open(path, "wb") as file:
+        file.write(contents)
+
+    second = regen_engine.steady_heating_analysis(number_of_points = 20, to_json = False, cache = cache)
+
+    assert (cache.hits, cache.misses, len(cache)) == (0, 2, 1)
+    assert np.array_equal(second["T_wall_inner"], first["T_wall_inner"])
+
+    #The result was stored again
+    regen_engine.steady_heating_analysis(number_of_points = 20, to_json = False, cache = cache)
+    assert cache.hits == 1
+
+def test_clear(regen_engine, tmp_path):
+    cache = bamboo.cache.ResultCache(tmp_path)
+    regen_engine.steady_heating_analysis(number_of_points = 20, to_json = False, cache = cache)
+    cache.clear()
+
+    assert (cache.hits, cache.misses, len(cache), cache.size()) == (0, 0, 0, 0)
+
+def test_max_size_must_be_positive(tmp_path):
+    with pytest.raises(ValueError):
+        bamboo.cache.ResultCache(tmp_path, max_size = 0)
+
+def test_event_code_and_defaults_in_key(ablative_engine, tmp_path):
+    cache = bamboo.cache.ResultCache(tmp_path)
+    settings = {"number_of_points" : 20, "dt" : 0.1, "t_max" : 5, "to_json" : False, "cache" : cache}
+
+    #Lambdas in the same scope have the same name, so they must be told apart by their code and default arguments
+    events = [lambda t, state: np.amax(state["T_wall"]) - 1000, 
+              lambda t, state: np.amax(state["T_wall"]) - 2000,
+              lambda t, state, T_limit = 1000: np.amax(state["T_wall"]) - T_limit,
+              lambda t, state, T_limit = 2000: np.amax(state["T_wall"]) - T_limit]
+
+    fingerprints = [bamboo.cache.fingerprint(event) for event in events]
+    assert all(fingerprints[i] != fingerprints[j] for i in range(len(events)) for j in range(i))
+
+    results = [ablative_engine.transient_heating_analysis(events = [event], **settings) for event in events]
+    assert (cache.hits, cache.misses, len(cache)) == (0, 4, 4)
+    assert results[0]["t_events"] != results[1]["t_events"]
+
+    #A new but identical lambda is still a hit
+    ablative_engine.transient_heating_analysis(events = [lambda t, state: np.amax(state["T_wall"]) - 1000], **settings)
+    assert cache.hits == 1
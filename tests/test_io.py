@@ -0,0 +1,111 @@
+"""
+Tests for saving and loading results with bamboo.io.
+"""
+import numpy as np
+import pytest
+
+import bamboo.io
+
+TRANSIENT_SETTINGS = {"number_of_points" : 20, "dt" : 0.1, "t_max" : 2, "to_json" : False}
+
+def test_stream_writer_round_trip(tmp_path):
+    x = np.linspace(-0.2, 0.1, 7)
+
+    with bamboo.io.StreamWriter(tmp_path, x, ["T_wall", "q_dot"]) as writer:
+        for i in range(5):
+            writer.write(0.1*i, {"T_wall" : 300 + i*x, "q_dot" : i, "unused" : None})
+
+    stream = bamboo.io.load_stream(tmp_path)
+
+    assert np.array_equal(stream["x"], x)
+    assert np.allclose(stream["t"], 0.1*np.arange(5))
+    assert np.allclose(stream["T_wall"], 300 + np.arange(5)[:, np.newaxis]*x)
+    assert np.array_equal(stream["q_dot"], np.repeat(np.arange(5.0)[:, np.newaxis], len(x), axis = 1))
+    assert isinstance(stream["T_wall"], np.memmap)
+
+def test_streamed_transient_matches_in_memory(ablative_engine, tmp_path):
+    in_memory = ablative_engine.transient_heating_analysis(**TRANSIENT_SETTINGS)
+    streamed = ablative_engine.transient_heating_analysis(to_directory = str(tmp_path), **TRANSIENT_SETTINGS)
+
+    assert set(streamed.keys()) == set(in_memory.keys())
+
+    for key in in_memory:
+        if key != "t_events":
+            assert np.array_equal(streamed[key], in_memory[key]), key
+
+    assert not streamed["T_wall"].flags.writeable
+
+def test_stride(ablative_engine):
+    every_step = ablative_engine.transient_heating_analysis(**TRANSIENT_SETTINGS)
+    strided = ablative_engine.transient_heating_analysis(stride = 3, **TRANSIENT_SETTINGS)
+
+    #Every third step, plus the last one
+    indexes = list(range(0, len(every_step["t"]), 3)) + [len(every_step["t"]) - 1]
+
+    assert np.array_equal(strided["t"], every_step["t"][indexes])
+    assert np.array_equal(strided["T_wall"], every_step["T_wall"][indexes])
+
+def test_transient_steps_generator(ablative_engine):
+    result = ablative_engine.transient_heating_analysis(**TRANSIENT_SETTINGS)
+    settings = {key : value for key, value in TRANSIENT_SETTINGS.items() if key != "to_json"}
+    steps = list(ablative_engine.transient_heating_steps(**settings))
+
+    assert len(steps) == len(result["t"])
+
+    for i in [0, len(steps) - 1]:
+        assert steps[i]["t"] == pytest.approx(result["t"][i])
+        assert np.array_equal(steps[i]["T_wall"], result["T_wall"][i])
+        assert np.array_equal(steps[i]["x"], result["x"])
+
+def test_save_results_round_trip(tmp_path):
+    path = str(tmp_path / "results.npz")
+    results = {"x" : np.linspace(0, 1, 5), 
+               "T_wall" : np.arange(10.0).reshape(2, 5), 
+               "n" : [1, 2, 3],
+               "boil_off_position" : None, 
+               "p0" : np.float64(3e6),
+               "t_events" : [[0.5], []]}
+
+    bamboo.io.save_results(path, results, metadata = {"engine" : "test"})
+
+    for mmap in [True, False]:
+        loaded = bamboo.io.load_results(path, mmap = mmap)
+
+        assert np.array_equal(loaded["x"], results["x"])
+        assert np.array_equal(loaded["T_wall"], results["T_wall"])
+        assert np.array_equal(loaded["n"], results["n"])
+        assert loaded["boil_off_position"] is None
+        assert loaded["p0"] == 3e6
+        assert loaded["t_events"] == [[0.5], []]
+        assert loaded["metadata"] == {"engine" : "test"}
+        assert isinstance(loaded["T_wall"], np.memmap) == mmap
+
+def test_load_npz_compressed(tmp_path):
+    path = str(tmp_path / "compressed.npz")
+    np.savez_compressed(path, a = np.arange(4.0), b = np.eye(3))
+
+    loaded = bamboo.io.load_npz(path)
+
+    assert np.array_equal(loaded["a"], np.arange(4.0))
+    assert np.array_equal(loaded["b"], np.eye(3))
+
+def test_load_results_rejects_other_files(tmp_path):
+    path = str(tmp_path / "plain.npz")
+    bamboo.io.save_npz(path, a = np.arange(4.0))
+
+    with pytest.raises(ValueError):
+        bamboo.io.load_results(path)
+
+def test_steady_heating_to_npz(regen_engine, tmp_path):
+    path = str(tmp_path / "steady.npz")
+    result = regen_engine.steady_heating_analysis(number_of_points = 50, to_json = False, to_npz = path)
+
+    loaded = bamboo.io.load(path)
+
+    for key in result:
+        if isinstance(result[key], np.ndarray):
+            assert np.array_equal(loaded[key], result[key], equal_nan = True), key
+        else:
+            assert loaded[key] == result[key], key
+
+    assert loaded["metadata"] == result.metadata
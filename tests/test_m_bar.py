@@ -0,0 +1,78 @@
+"""
+Tests for the tabulated m_bar inverse, M_from_m_bar(), against the per-point root solves it replaced.
+"""
+import numpy as np
+import pytest
+import scipy.optimize
+
+import bamboo.main
+
+#Gammas which aren't used anywhere else, so their lookup tables are built fresh by each test
+GAMMAS = [1.1137, 1.2291, 1.3373, 1.4, 1.6667]
+
+def reference_M(m_bar_value, gamma, supersonic):
+    #Same bracketed root solve that Engine.M() used before the lookup tables
+    def func_to_solve(Mach):
+        return m_bar_value - bamboo.main.m_bar(Mach, gamma)
+
+    if supersonic:
+        return scipy.optimize.root_scalar(func_to_solve, bracket = [1, 300], x0 = 1, xtol = 1e-14).root
+    else:
+        return scipy.optimize.root_scalar(func_to_solve, bracket = [0, 1], x0 = 0.5, xtol = 1e-14).root
+
+@pytest.mark.parametrize("gamma", GAMMAS)
+@pytest.mark.parametrize("supersonic", [False, True])
+def test_matches_root_scalar(gamma, supersonic):
+    bamboo.main._m_bar_tables.pop((gamma, supersonic), None)
+
+    Ms = np.linspace(1.02, 8, 50) if supersonic else np.linspace(0.02, 0.98, 50)
+    targets = bamboo.main.m_bar(Ms, gamma)
+
+    Mach = bamboo.main.M_from_m_bar(targets, gamma, supersonic = supersonic)
+    reference = np.array([reference_M(target, gamma, supersonic) for target in targets])
+
+    assert (gamma, supersonic) in bamboo.main._m_bar_tables
+    assert np.allclose(Mach, reference, rtol = 1e-9, atol = 0)
+    assert np.all(np.abs(bamboo.main.m_bar(Mach, gamma) - targets) <= bamboo.main.M_BAR_TOLERANCE*targets)
+
+@pytest.mark.parametrize("gamma", GAMMAS)
+def test_near_throat(gamma):
+    Ms = 1 + np.array([-1e-3, -1e-5, 0, 1e-5, 1e-3])
+    targets = bamboo.main.m_bar(Ms, gamma)
+
+    Mach = bamboo.main.M_from_m_bar(targets, gamma, supersonic = Ms >= 1)
+
+    assert np.all(np.abs(bamboo.main.m_bar(Mach, gamma) - targets) <= bamboo.main.M_BAR_TOLERANCE*targets)
+    assert np.all(Mach[Ms < 1] <= 1) and np.all(Mach[Ms > 1] >= 1)
+
+@pytest.mark.parametrize("supersonic", [False, True])
+def test_falls_back_to_bracketing(supersonic):
+    gamma = 1.2291
+    Ms = np.array([1.5, 3.0, 6.0]) if supersonic else np.array([0.1, 0.5, 0.9])
+    targets = bamboo.main.m_bar(Ms, gamma)
+
+    #With no Newton iterations, every point has to be solved by bracketing
+    Mach = bamboo.main.M_from_m_bar(targets, gamma, supersonic = supersonic, max_iterations = 0)
+
+    assert np.allclose(Mach, Ms, rtol = 1e-9, atol = 0)
+
+def test_scalar_in_scalar_out():
+    Mach = bamboo.main.M_from_m_bar(bamboo.main.m_bar(2.5, 1.3373), 1.3373, supersonic = True)
+
+    assert isinstance(Mach, float)
+    assert Mach == pytest.approx(2.5, rel = 1e-9)
+
+def test_raises_if_tolerance_cannot_be_met():
+    gamma = 1.4
+    #Only reachable above M_MAX, so neither Newton nor bracketing on [1, M_MAX] can match it
+    target = 0.5*bamboo.main.m_bar(bamboo.main.M_MAX, gamma)
+
+    with pytest.raises(ValueError):
+        bamboo.main.M_from_m_bar(target, gamma, supersonic = True)
+
+def test_raises_outside_range():
+    with pytest.raises(ValueError):
+        bamboo.main.M_from_m_bar(1.01*bamboo.main.m_bar(1, 1.4), 1.4)
+
+    with pytest.raises(ValueError):
+        bamboo.main.M_from_m_bar(0, 1.4)
@@ -0,0 +1,104 @@
+"""
+Tests for discretising engines with Engine.discretise() and Engine.refine_mesh(), and using non-uniform meshes in the stress analysis.
+"""
+import numpy as np
+import pytest
+
+import bamboo.sweep
+import bamboo.materials
+from conftest import make_engine
+
+@pytest.fixture(scope = "module")
+def engine():
+    return make_engine()
+
+def test_given_stations(engine):
+    x = np.array([0.0, engine.geometry.x_max, -0.1, engine.geometry.x_min, 0.05])
+    mesh = engine.discretise(x = x)
+
+    #Sorted to run from the nozzle exit to the front of the chamber
+    assert np.array_equal(mesh.x, np.sort(x)[::-1])
+    assert np.array_equal(mesh.dx, -np.diff(mesh.x))
+    assert np.allclose(mesh.radii["wall in"], [engine.y(value) for value in mesh.x])
+    assert len(mesh.channel_length) == len(mesh) - 1
+
+    #Reproduces a mesh from its own stations
+    uniform = engine.discretise(30)
+    copied = engine.discretise(x = uniform.x)
+
+    assert np.array_equal(copied.x, uniform.x)
+    assert np.array_equal(copied.channel_area, uniform.channel_area)
+    assert np.array_equal(copied.channel_length, uniform.channel_length)
+
+    for key in uniform.radii:
+        assert np.array_equal(copied.radii[key], uniform.radii[key]), key
+
+@pytest.mark.parametrize("spacing", ["throat", "curvature"])
+def test_clustered_spacings(engine, spacing):
+    uniform = engine.discretise(40)
+    mesh = engine.discretise(40, spacing = spacing, clustering = 10)
+
+    assert len(mesh) == 40
+    assert (mesh.x[0], mesh.x[-1]) == (engine.geometry.x_max, engine.geometry.x_min)
+    assert np.all(np.diff(mesh.x) < 0)
+
+    #More stations around the throat than with uniform spacing, and the smallest spacing is there
+    near_throat = lambda x : np.sum(np.abs(x) < 2*engine.nozzle.Rt)
+    midpoints = (mesh.x[1:] + mesh.x[:-1])/2
+
+    assert near_throat(mesh.x) > 1.5*near_throat(uniform.x)
+    assert abs(midpoints[np.argmin(mesh.dx)]) < 2*engine.nozzle.Rt
+    assert np.max(mesh.dx)/np.min(mesh.dx) == pytest.approx(10, rel = 0.25)
+
+def test_invalid_spacing(engine):
+    with pytest.raises(ValueError):
+        engine.discretise(40, spacing = "random")
+
+def test_refine_mesh(engine):
+    mesh = engine.discretise(20)
+    heating = engine.steady_heating_analysis(mesh = mesh, to_json = False)
+    refined = engine.refine_mesh(mesh, heating["q_dot"], 0.05)
+
+    #Only intervals where q_dot changes too much are split, at their midpoints
+    too_coarse = np.abs(np.diff(heating["q_dot"])) > 0.05*np.max(np.abs(heating["q_dot"]))
+    new_stations = np.setdiff1d(refined.x, mesh.x)
+
+    assert 0 < np.sum(too_coarse) < len(mesh) - 1
+    assert len(refined) == len(mesh) + np.sum(too_coarse)
+    assert np.all(np.isin(mesh.x, refined.x))
+    assert np.allclose(np.sort(new_stations), np.sort((mesh.x[:-1] + mesh.x[1:])[too_coarse]/2))
+
+    assert engine.refine_mesh(mesh, heating["q_dot"], 1.0) is None
+
+@pytest.fixture(scope = "module")
+def stress_engine():
+    engine = make_engine()
+    bamboo.sweep.apply_parameters(engine, {"outer_wall" : bamboo.materials.StainlessSteel304})
+    engine.geometry.outer_wall_thickness = [2e-3, 4e-3]
+
+    return engine
+
+def test_stress_analysis_with_non_uniform_mesh(stress_engine):
+    mesh = stress_engine.discretise(40, spacing = "throat")
+    heating = stress_engine.steady_heating_analysis(mesh = mesh, to_json = False)
+
+    #The geometry is taken at the heating result's stations, whether or not the mesh is given
+    stresses = stress_engine.run_stress_analysis(heating)
+    with_mesh = stress_engine.run_stress_analysis(heating, mesh = mesh)
+
+    for key in stresses:
+        assert np.array_equal(stresses[key], with_mesh[key]), key
+
+    #Work back to the outer wall thickness from its hoop stress, sigma = p R2/t2, which should be stretched along the engine by distance
+    p = np.asarray(heating["p_coolant"])
+    t1 = mesh.wall_thickness + stress_engine.cooling_jacket.channel_height*stress_engine.cooling_jacket.blockage_ratio
+    t2 = p*(mesh.radii["wall in"] + t1)/(stresses["stress_outer_hoop"] - p/2)
+
+    assert np.allclose(t2, np.interp(mesh.x, [mesh.x[-1], mesh.x[0]], [4e-3, 2e-3]))
+    assert np.allclose(stresses["stress_inner_hoop_steady"], p*mesh.radii["wall in"]/mesh.wall_thickness)
+
+def test_stress_analysis_mesh_must_match(stress_engine):
+    heating = stress_engine.steady_heating_analysis(mesh = stress_engine.discretise(40, spacing = "throat"), to_json = False)
+
+    with pytest.raises(ValueError):
+        stress_engine.run_stress_analysis(heating, mesh = stress_engine.discretise(40))
@@ -0,0 +1,165 @@
+"""
+Tests for the design optimiser, bamboo.optimise.
+"""
+import numpy as np
+import pytest
+
+import bamboo.main
+import bamboo.atmosphere
+import bamboo.optimise as opt
+
+def test_build_engine_resizes_throat(regen_engine):
+    variant = opt.build_engine(regen_engine, {"p0" : 40e5, "mdot" : 6.0, "area_ratio" : 5})
+    At = bamboo.main.get_throat_area(variant.perfect_gas, variant.chamber_conditions)
+
+    #Throat sized for choked flow at the new chamber conditions
+    assert variant.nozzle.At == pytest.approx(At)
+    assert variant.nozzle.Ae/variant.nozzle.At == pytest.approx(5)
+    assert variant.c_star == pytest.approx(40e5*At/6.0)
+
+    #The geometry and jacket are rebuilt around the new nozzle
+    assert variant.geometry is not regen_engine.geometry
+    assert variant.cooling_jacket is not regen_engine.cooling_jacket
+    assert variant.cooling_jacket.mdot_coolant == regen_engine.cooling_jacket.mdot_coolant
+
+def test_build_engine_leaves_base_engine_unmodified(regen_engine):
+    nozzle, geometry, jacket = regen_engine.nozzle, regen_engine.geometry, regen_engine.cooling_jacket
+    At, chamber_length = nozzle.At, geometry.chamber_length
+
+    opt.build_engine(regen_engine, {"p0" : 40e5, "area_ratio" : 5, "chamber_length" : 0.2, "mdot_coolant" : 0.9})
+
+    assert regen_engine.chamber_conditions.p0 == 30e5
+    assert (regen_engine.nozzle, regen_engine.geometry, regen_engine.cooling_jacket) == (nozzle, geometry, jacket)
+    assert (nozzle.At, geometry.chamber_length, jacket.mdot_coolant) == (At, chamber_length, 1.2)
+
+def test_build_engine_chamber_length(regen_engine):
+    variant = opt.build_engine(regen_engine, {"chamber_length" : 0.2})
+    assert variant.geometry.chamber_length == pytest.approx(0.2)
+
+    #L* is the chamber volume over the throat area, using the new throat
+    variant = opt.build_engine(regen_engine, {"p0" : 40e5, "L_star" : 1.5})
+    assert variant.geometry.chamber_length == pytest.approx(1.5*variant.nozzle.At/variant.geometry.chamber_area)
+    assert variant.nozzle.At < regen_engine.nozzle.At
+
+def test_build_engine_parameters_and_setters(regen_engine, ablative_engine):
+    def set_gamma(engine, value):
+        engine.perfect_gas = bamboo.main.PerfectGas(gamma = value, molecular_weight = engine.perfect_gas.molecular_weight)
+
+    variant = opt.build_engine(regen_engine, {"gamma" : 1.3, "mdot_coolant" : 0.9, "exhaust_transport.custom_mu" : 1e-4}, setters = {"gamma" : set_gamma})
+
+    assert variant.perfect_gas.gamma == 1.3
+    assert variant.nozzle.At == pytest.approx(bamboo.main.get_throat_area(variant.perfect_gas, variant.chamber_conditions))
+    assert variant.cooling_jacket.mdot_coolant == 0.9
+    assert variant.exhaust_transport.custom_mu == 1e-4
+
+    with pytest.raises(ValueError):
+        opt.build_engine(ablative_engine, {"mdot_coolant" : 0.9})
+
+def test_current_design_round_trip(regen_engine):
+    design = {"area_ratio" : 4.0, "p0" : 35e5, "mdot" : 5.0, "L_star" : 1.5, "mdot_coolant" : 1.0, "cooling_jacket.inlet_T" : 300.0}
+    variant = opt.build_engine(regen_engine, design)
+
+    assert opt.current_design(variant, list(design)) == pytest.approx(design)
+
+    #Variables that can't be read from the engine are left out
+    assert opt.current_design(variant, ["mixture_ratio", "inner_wall_thickness"]) == {}
+
+def record(objective = 1.0, margins = None, error = None):
+    return {"objective" : objective, "margins" : {} if margins is None else margins, "metrics" : {}, "error" : error, "cache_hits" : 0, "cache_misses" : 0}
+
+def test_score_ordering():
+    assert opt.score(record(100.0)) == -100.0
+    assert opt.score(record(100.0), maximise = False) == 100.0
+    assert opt.score(record(100.0, {"a" : 0.0, "b" : 0.5})) == -100.0
+
+    feasible = opt.score(record(-1e6))
+    slightly_broken = opt.score(record(np.nan, {"a" : -0.1, "b" : 0.5}))
+    badly_broken = opt.score(record(np.nan, {"a" : -0.1, "b" : -10}))
+    failed = opt.score(record(np.nan, error = "ValueError: Failed"))
+
+    assert feasible < opt.PENALTY <= slightly_broken < badly_broken < failed == 2*opt.PENALTY
+
+    #A broken constraint ranks above a failure, even if the evaluation failed afterwards
+    assert opt.score(record(np.nan, {"a" : -100}, error = "ValueError: Failed")) < failed
+    assert opt.score(record(np.nan, {"a" : np.nan})) == failed
+    assert opt.score(record(np.inf)) == failed
+
+def value(evaluation):
+    return evaluation
+
+def test_limit_margins():
+    assert opt.Limit(value, minimum = 100)(150) == pytest.approx(0.5)
+    assert opt.Limit(value, maximum = 200)(150) == pytest.approx(0.25)
+    assert opt.Limit(value, maximum = 100)(150) == pytest.approx(-0.5)
+    assert opt.Limit(value, minimum = 100, maximum = 200)(190) == pytest.approx(0.05)
+
+    #Margins are absolute for limits of zero
+    assert opt.Limit(value, minimum = 0)(-2) == -2
+    assert opt.Limit(value, maximum = 0)(-2) == 2
+
+    assert opt.Limit(value, minimum = 100, maximum = 200).__name__ == "value >= 100 and value <= 200"
+
+    with pytest.raises(ValueError):
+        opt.Limit(value)
+
+def test_repeated_designs_are_not_evaluated(regen_engine):
+    settings = {"objective" : opt.isp, "constraints" : None, "metrics" : None, "vehicle" : None, "analysis_kwargs" : None, "setters" : None, "p_amb" : None}
+    evaluator = opt._Evaluator(regen_engine, ["area_ratio"], settings, True, None, 1, False)
+
+    scores = evaluator.map(evaluator, [[4.0], [5.0], [4.0]])
+    evaluator.map(evaluator, [[5.0], [6.0]])
+
+    assert scores[0] == scores[2] < 0
+    assert len(evaluator.records) == 3
+    assert evaluator.repeats == 2
+
+BOUNDS = {"area_ratio" : [2, 8], "p0" : [25e5, 35e5]}
+
+def test_run_optimisation(regen_engine):
+    calls = []
+
+    def separation(evaluation):
+        calls.append(evaluation.design)
+        return opt.no_separation(evaluation)
+
+    limit = opt.Limit(opt.thrust, maximum = 11700)
+    result = opt.run_optimisation(regen_engine, BOUNDS, objective = opt.isp, constraints = [separation, limit], metrics = [opt.thrust],
+                                  max_workers = 1, population_size = 3, max_generations = 2, seed = 0, progress = False)
+    history = result.history
+
+    #Every design the optimiser asked for is either evaluated once or found in the stored records
+    assert result.evaluations == len(calls) == len(history["objective"])
+    assert result.evaluations + result.repeated_designs == 3*len(BOUNDS)*3
+    assert len(set(zip(history["area_ratio"], history["p0"]))) == result.evaluations
+
+    assert list(history.columns) == ["area_ratio", "p0", "objective", "score", "feasible", "thrust", "separation", limit.__name__]
+    assert history.parameters == ["area_ratio", "p0"]
+    assert np.array_equal(history["feasible"], (history[limit.__name__] >= 0) & (history["separation"] >= 0))
+    assert 0 < np.sum(history["feasible"]) < result.evaluations
+
+    #The best design is the best feasible one in the history, and the engine is built from it
+    assert result.feasible
+    assert result.objective == np.max(history["objective"][history["feasible"]])
+    assert result.margins[limit.__name__] >= 0
+    assert all(BOUNDS[name][0] <= result.design[name] <= BOUNDS[name][1] for name in BOUNDS)
+    assert result.engine.isp(bamboo.atmosphere.pressure(0)) == pytest.approx(result.objective)
+
+    #Seeded runs are repeatable
+    repeat = opt.run_optimisation(regen_engine, BOUNDS, objective = opt.isp, constraints = [opt.no_separation, limit], metrics = [opt.thrust],
+                                  max_workers = 1, population_size = 3, max_generations = 2, seed = 0, progress = False)
+    assert repeat.design == result.design
+
+def test_run_optimisation_heating_objective(regen_engine):
+    result = opt.run_optimisation(regen_engine, {"mdot_coolant" : [0.8, 1.4]}, objective = opt.T_wall_inner_max, maximise = False, analysis_kwargs = {"number_of_points" : 30},
+                                  max_workers = 1, population_size = 3, max_generations = 2, seed = 0, progress = False)
+
+    #More coolant gives a cooler wall
+    assert result.objective == np.min(result.history["objective"])
+    assert result.design["mdot_coolant"] == np.max(result.history["mdot_coolant"])
+
+def test_run_optimisation_errors(regen_engine):
+    with pytest.raises(ValueError):
+        opt.run_optimisation(regen_engine, {"area_ratio" : [5, 3]}, objective = opt.isp, max_workers = 1, progress = False)
+
+    with pytest.raises(ValueError):
+        opt.run_optimisation(regen_engine, {"mdot_coolant" : [0.8, 1.4]}, analysis_kwargs = {"mesh" : regen_engine.discretise(30)}, max_workers = 1, progress = False)
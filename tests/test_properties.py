@@ -0,0 +1,197 @@
+"""
+Tests for TransportProperties and its PropertyCache, in bamboo.cooling.
+"""
+import copy
+import pickle
+
+import numpy as np
+import pytest
+import thermo
+
+import bamboo.cooling as cool
+
+def custom(k = 0.1, cache = None):
+    return cool.TransportProperties(model = "custom", custom_Pr = 0.8, custom_mu = 9e-5, custom_k = k, cache = cache)
+
+def test_shared_cache_keeps_fluids_apart():
+    cache = cool.PropertyCache()
+    water = cool.TransportProperties(model = "thermo", thermo_object = thermo.chemical.Chemical('water'), force_phase = 'l', cache = cache)
+    ethanol = cool.TransportProperties(model = "thermo", thermo_object = thermo.chemical.Chemical('ethanol'), force_phase = 'l', cache = cache)
+
+    water_state = water.state(T = 300, p = 10e5)
+    ethanol_state = ethanol.state(T = 300, p = 10e5)
+
+    assert (cache.hits, cache.misses, len(cache)) == (0, 2, 2)
+    assert ethanol_state["rho"] != pytest.approx(water_state["rho"], rel = 0.05)
+    assert ethanol_state == cool.TransportProperties(model = "thermo", thermo_object = thermo.chemical.Chemical('ethanol'), force_phase = 'l').state(T = 300, p = 10e5)
+
+    assert water.state(T = 300, p = 10e5) == water_state
+    assert cache.hits == 1
+
+def test_shared_cache_custom_models():
+    cache = cool.PropertyCache()
+    first, second = custom(0.1), custom(0.2)
+    first.cache = second.cache = cache
+
+    assert first.state(T = 300, p = 1e5)["k"] == 0.1
+    assert second.state(T = 300, p = 1e5)["k"] == 0.2
+
+def test_copies_share_cached_states():
+    properties = custom(0.1)
+    properties.cache = cool.PropertyCache()
+    properties.state(T = 300, p = 1e5)
+
+    for duplicate in [copy.deepcopy(properties), pickle.loads(pickle.dumps(properties))]:
+        duplicate.state(T = 300, p = 1e5)
+        assert duplicate.cache.hits == 1
+
+def test_quantise():
+    exact = cool.PropertyCache()
+    assert exact.quantise(300.3, 1.234e5) == ((None, 300.3, 1.234e5), 300.3, 1.234e5)
+
+    rounded = cool.PropertyCache(T_tolerance = 0.5, p_tolerance = 1e3)
+    key, T, p = rounded.quantise(300.3, 1.2341e5, owner = "a")
+
+    assert (T, p) == (pytest.approx(300.5), pytest.approx(1.23e5))
+    assert rounded.quantise(300.4, 1.2299e5, owner = "a")[0] == key
+    assert rounded.quantise(300.4, 1.2299e5, owner = "b")[0] != key
+    assert rounded.quantise(300.8, 1.2299e5, owner = "a")[0] != key
+
+def test_tolerances_share_states():
+    properties = cool.TransportProperties(model = "thermo", thermo_object = thermo.chemical.Chemical('water'), force_phase = 'l', 
+                                          cache = cool.PropertyCache(T_tolerance = 0.5, p_tolerance = 1e3))
+
+    first = properties.state(T = 300.1, p = 10.0001e5)
+    second = properties.state(T = 299.9, p = 9.9999e5)
+
+    #Both are evaluated at the rounded state
+    assert second == first
+    assert (properties.cache.hits, properties.cache.misses) == (1, 1)
+    assert first == cool.TransportProperties(model = "thermo", thermo_object = thermo.chemical.Chemical('water'), force_phase = 'l').state(T = 300, p = 10e5)
+
+def test_lru_eviction_and_counters():
+    cache = cool.PropertyCache(max_size = 2)
+
+    for T in [300, 310]:
+        cache.put(cache.quantise(T, 1e5)[0], {"T" : T})
+
+    assert cache.get(cache.quantise(300, 1e5)[0]) == {"T" : 300}     #Now the most recently used
+    cache.put(cache.quantise(320, 1e5)[0], {"T" : 320})
+
+    assert len(cache) == 2
+    assert cache.get(cache.quantise(310, 1e5)[0]) is None
+    assert cache.get(cache.quantise(300, 1e5)[0]) == {"T" : 300}
+    assert cache.get(cache.quantise(320, 1e5)[0]) == {"T" : 320}
+    assert (cache.hits, cache.misses) == (3, 1)
+
+    cache.clear()
+    assert (cache.hits, cache.misses, len(cache)) == (0, 0, 0)
+
+def test_state_returns_copies():
+    properties = custom(0.1)
+    properties.cache = cool.PropertyCache()
+
+    properties.state(T = 300, p = 1e5)["k"] = 5
+    assert properties.state(T = 300, p = 1e5)["k"] == 0.1
+
+def test_cache_argument():
+    assert custom().cache is None
+    assert custom(cache = False).cache is None
+    assert isinstance(custom(cache = True).cache, cool.PropertyCache)
+
+    cache = cool.PropertyCache()
+    assert custom(cache = cache).cache is cache
+
+    #Separate objects with cache = True get separate caches
+    assert custom(cache = True).cache is not custom(cache = True).cache
+
+def test_cached_states_match_uncached():
+    water = thermo.chemical.Chemical('water')
+    cached = cool.TransportProperties(model = "thermo", thermo_object = water, force_phase = 'l', cache = True)
+    uncached = cool.TransportProperties(model = "thermo", thermo_object = water, force_phase = 'l')
+    T, p = np.array([300, 320, 300]), np.array([10e5, 20e5, 10e5])
+
+    cached_states = cached.states(T, p)
+    uncached_states = uncached.states(T, p)
+
+    for key in cool.TransportProperties.PROPERTIES:
+        assert np.array_equal(cached_states[key], uncached_states[key]), key
+
+    assert (cached.cache.hits, cached.cache.misses) == (1, 2)
+    assert cached.check_liquid(300, 10e5) and cached.cache.hits == 2
+
+    cached.clear_cache()
+    assert len(cached.cache) == 0
+
+def test_invalid_cache_settings():
+    with pytest.raises(ValueError):
+        cool.PropertyCache(max_size = 0)
+
+    with pytest.raises(ValueError):
+        cool.PropertyCache(T_tolerance = -1)
+
+@pytest.fixture(scope = "module")
+def water():
+    return cool.TransportProperties(model = "thermo", thermo_object = thermo.chemical.Chemical('water'), force_phase = 'l')
+
+@pytest.fixture(scope = "module", params = ["linear", "cubic"])
+def table(request, water):
+    return cool.TransportProperties(model = "table", source = water, T_range = (290, 360), p_range = (5e5, 50e5), T_points = 10, p_points = 5, interpolation = request.param)
+
+def test_table_matches_source_at_nodes(table, water):
+    T, p = table.table_T[:, np.newaxis], table.table_p[np.newaxis, :]
+    interpolated = table.states(T, p)
+    exact = water.states(T, p)
+
+    for key in cool.TransportProperties.PROPERTIES:
+        assert np.allclose(interpolated[key], exact[key], rtol = 1e-9), key
+
+    assert table.state(T = 300, p = 10e5)["liquid"]
+
+def test_table_error_at_cell_centres(table, water):
+    T = (table.table_T[1:] + table.table_T[:-1])[:, np.newaxis]/2
+    p = np.sqrt(table.table_p[1:]*table.table_p[:-1])[np.newaxis, :]
+    interpolated = table.states(T, p)
+    exact = water.states(T, p)
+
+    for key in cool.TransportProperties.PROPERTIES[:-1]:
+        error = np.abs(interpolated[key] - exact[key])/np.abs(exact[key])
+
+        assert 0 < table.table_error[key] < 0.05, key
+        assert np.all(error <= table.table_error[key]*(1 + 1e-9)), key
+
+def test_table_file_round_trip(table, tmp_path):
+    path = str(tmp_path / "table.npz")
+    table.save_table(path)
+    T, p = np.array([291.3, 300, 355.5]), np.array([6e5, 20e5, 45e5])
+
+    for mmap in [True, False]:
+        loaded = cool.TransportProperties(model = "table", file = path, mmap = mmap, interpolation = table.interpolation)
+
+        assert isinstance(loaded.table["k"], np.memmap) == mmap
+        assert loaded.table_error == table.table_error
+
+        for key, values in loaded.states(T, p).items():
+            assert np.array_equal(values, table.states(T, p)[key]), key
+
+def test_table_bounds_warning(water, capsys):
+    table = cool.TransportProperties(model = "table", source = water, T_range = (290, 360), p_range = (5e5, 50e5), T_points = 5, p_points = 3, check_error = False)
+    capsys.readouterr()
+
+    assert table.table_error is None
+    assert table.state(T = 400, p = 100e5) == table.state(T = 360, p = 50e5)
+    assert "outside of the property table" in capsys.readouterr().out
+
+    #Only warns once
+    table.state(T = 200, p = 1e5)
+    assert capsys.readouterr().out == ""
+
+def test_table_errors(water):
+    with pytest.raises(ValueError):
+        cool.TransportProperties(model = "table", source = water, T_range = (290, 360), p_range = (5e5, 50e5), interpolation = "quadratic")
+
+    with pytest.raises(ValueError):
+        cool.TransportProperties(model = "table", source = water, T_range = [300, 290, 310], p_range = (5e5, 50e5))
+
+    with pytest.raises(AttributeError):
+        water.save_table("table.npz")
@@ -0,0 +1,85 @@
+"""
+Tests for the result containers in bamboo.results.
+"""
+import json
+
+import numpy as np
+import pytest
+
+import bamboo.results
+
+@pytest.fixture
+def steady():
+    x = np.linspace(0.1, -0.2, 7)       #Stations run from the nozzle exit to the chamber, like the heating analyses
+    return bamboo.results.HeatingResult(x = x,
+                                        fields = {"T_wall" : 300 + 100*x, "q_dot" : x**2},
+                                        extras = {"boil_off_position" : None},
+                                        metadata = {"analysis" : "test"})
+
+@pytest.fixture
+def transient():
+    x = np.linspace(0.1, -0.2, 7)
+    t = np.arange(4.0)
+    return bamboo.results.HeatingResult(x = x, fields = {"T_wall" : 300 + t[:, np.newaxis] + x}, extras = {"t_events" : [[]]}, t = t)
+
+def test_behaves_like_a_dictionary(steady):
+    assert list(steady) == ["x", "T_wall", "q_dot", "boil_off_position"]
+    assert len(steady) == 4
+    assert "q_dot" in steady and "t" not in steady
+    assert steady["boil_off_position"] is None
+    assert np.array_equal(steady["T_wall"], 300 + 100*steady["x"])
+    assert steady.get("T_coolant") is None
+
+    with pytest.raises(KeyError):
+        steady["T_coolant"]
+
+def test_transient_keys(transient):
+    assert list(transient) == ["x", "t", "T_wall", "t_events"]
+    assert transient["T_wall"].shape == (4, 7)
+
+def test_to_dict_and_json(steady, tmp_path):
+    as_dict = steady.to_dict()
+
+    assert as_dict["x"] == steady["x"].tolist()
+    assert as_dict["T_wall"] == steady["T_wall"].tolist()
+    assert as_dict["boil_off_position"] is None
+
+    steady.to_json(tmp_path / "result.json")
+    with open(tmp_path / "result.json") as file:
+        assert json.load(file) == as_dict
+
+def test_slice_x(steady):
+    part = steady.slice_x(-0.1, 0.05)
+
+    assert np.all((part["x"] >= -0.1) & (part["x"] <= 0.05))
+    assert np.array_equal(part["x"], steady["x"][(steady["x"] >= -0.1) & (steady["x"] <= 0.05)])
+    assert np.array_equal(part["T_wall"], 300 + 100*part["x"])
+    assert part.extras == steady.extras
+    assert part.metadata == steady.metadata
+
+    #Open ended slices, and the slice syntax
+    assert np.all(steady.slice_x(x_min = 0)["x"] >= 0)
+    assert np.all(steady.slice_x(x_max = 0)["x"] <= 0)
+    assert np.array_equal(steady[-0.1:0.05]["x"], part["x"])
+
+    with pytest.raises(ValueError):
+        steady[-0.1:0.05:2]
+
+def test_slice_x_transient(transient):
+    part = transient.slice_x(x_max = 0)
+
+    assert np.array_equal(part["t"], transient["t"])
+    assert part["T_wall"].shape == (4, np.count_nonzero(transient["x"] <= 0))
+
+def test_field_shape_must_match_x():
+    with pytest.raises(ValueError):
+        bamboo.results.HeatingResult(x = np.arange(5.0), fields = {"T_wall" : np.arange(4.0)})
+
+def test_steady_heating_analysis_result(regen_engine):
+    result = regen_engine.steady_heating_analysis(number_of_points = 50, to_json = False)
+
+    assert isinstance(result, bamboo.results.HeatingResult)
+    assert len(result["x"]) == 50
+
+    for key in ["T_wall_inner", "T_wall_outer", "T_coolant", "p0_coolant", "q_dot"]:
+        assert result[key].shape == result["x"].shape, key
@@ -0,0 +1,135 @@
+"""
+Tests for the parameter sweep runner, bamboo.sweep.
+"""
+import copy
+
+import numpy as np
+import pytest
+
+import bamboo as bam
+import bamboo.sweep
+
+def test_apply_chamber_conditions_updates_c_star(regen_engine):
+    variant = copy.deepcopy(regen_engine)
+    bamboo.sweep.apply_parameters(variant, {"chamber_conditions.p0" : 15e5})
+
+    #Same as an engine created with the new chamber conditions
+    fresh = bam.Engine(variant.perfect_gas, bam.ChamberConditions(15e5, variant.chamber_conditions.T0, variant.chamber_conditions.mdot), variant.nozzle)
+
+    assert variant.c_star == pytest.approx(fresh.c_star)
+    assert variant.c_star == pytest.approx(regen_engine.c_star/2)
+
+def test_apply_parameters_checks_choking(regen_engine):
+    #A higher chamber pressure needs a smaller throat for the same mass flow rate
+    with pytest.raises(ValueError):
+        bamboo.sweep.apply_parameters(copy.deepcopy(regen_engine), {"chamber_conditions.p0" : 45e5})
+
+    variant = copy.deepcopy(regen_engine)
+    bamboo.sweep.apply_parameters(variant, {"chamber_conditions.p0" : 45e5}, check_choked = False)
+    assert variant.c_star == pytest.approx(1.5*regen_engine.c_star)
+
+SETTINGS = {"number_of_points" : 30}
+
+def test_grid_ordering():
+    cases = bamboo.sweep.grid({"a" : [1, 2], "b" : [3, 4, 5]})
+
+    #Every combination, with the last parameter changing fastest
+    assert cases == [{"a" : 1, "b" : 3}, {"a" : 1, "b" : 4}, {"a" : 1, "b" : 5},
+                     {"a" : 2, "b" : 3}, {"a" : 2, "b" : 4}, {"a" : 2, "b" : 5}]
+
+def test_apply_jacket_parameters(regen_engine):
+    variant = copy.deepcopy(regen_engine)
+    bamboo.sweep.apply_parameters(variant, {"mdot_coolant" : 0.9, "channel_height" : 2e-3})
+
+    #The jacket is rebuilt, keeping the settings that weren't changed
+    assert variant.cooling_jacket is not regen_engine.cooling_jacket
+    assert variant.cooling_jacket.mdot_coolant == 0.9
+    assert variant.cooling_jacket.channel_height == 2e-3
+    assert variant.cooling_jacket.inlet_p0 == regen_engine.cooling_jacket.inlet_p0
+    assert variant.cooling_jacket.blockage_ratio == regen_engine.cooling_jacket.blockage_ratio
+
+    assert regen_engine.cooling_jacket.mdot_coolant == 1.2
+
+def test_apply_geometry_parameters(regen_engine):
+    variant = copy.deepcopy(regen_engine)
+    bamboo.sweep.apply_parameters(variant, {"inner_wall_thickness" : [1e-3, 3e-3]})
+
+    assert variant.geometry.inner_wall_thickness == [1e-3, 3e-3]
+    assert variant.thickness(variant.geometry.x_min, layer = "wall") == pytest.approx(1e-3)
+    assert variant.thickness(variant.geometry.x_max, layer = "wall") == pytest.approx(3e-3)
+
+def test_apply_attribute_paths(regen_engine):
+    variant = copy.deepcopy(regen_engine)
+    bamboo.sweep.apply_parameters(variant, {"exhaust_transport.custom_mu" : 1e-4, "cooling_jacket.inlet_T" : 300})
+
+    assert variant.exhaust_transport.custom_mu == 1e-4
+    assert variant.cooling_jacket.inlet_T == 300
+    assert regen_engine.exhaust_transport.custom_mu == 9e-5
+
+    with pytest.raises(AttributeError):
+        bamboo.sweep.apply_parameters(variant, {"not_a_parameter" : 1})
+
+    with pytest.raises(AttributeError):
+        bamboo.sweep.apply_parameters(variant, {"cooling_jacket.not_an_attribute" : 1})
+
+def test_failures_are_captured(regen_engine):
+    result = bamboo.sweep.run_sweep(regen_engine, {"inlet_p0" : [60e5, -1e5]}, analysis_kwargs = SETTINGS, max_workers = 1, progress = False)
+
+    assert result.errors[0] is None
+    assert result.errors[1] is not None
+
+    for name in bamboo.sweep.DEFAULT_OUTPUTS:
+        if name != "boil_off_position":
+            assert np.isfinite(result[name][0]), name
+
+        assert np.isnan(result[name][1]), name
+
+def test_matches_run_case(regen_engine):
+    cases = [{"mdot_coolant" : 1.0}, {"mdot_coolant" : 1.4, "channel_height" : 2e-3}]
+    result = bamboo.sweep.run_sweep(regen_engine, cases, analysis_kwargs = SETTINGS, max_workers = 1, progress = False)
+
+    assert list(result["mdot_coolant"]) == [1.0, 1.4]
+    assert np.isnan(result["channel_height"][0])
+
+    for i, case in enumerate(cases):
+        outputs = bamboo.sweep.run_case(regen_engine, case, SETTINGS)
+        assert result["T_wall_inner_max"][i] == outputs["T_wall_inner_max"]
+
+def test_parallel_matches_serial(regen_engine):
+    parameters = {"mdot_coolant" : [1.0, 1.2, 1.4], "channel_height" : [1e-3, 2e-3]}
+    calls = []
+
+    serial = bamboo.sweep.run_sweep(regen_engine, parameters, analysis_kwargs = SETTINGS, max_workers = 1, progress = False)
+    parallel = bamboo.sweep.run_sweep(regen_engine, parameters, analysis_kwargs = SETTINGS, max_workers = 2, chunksize = 2, 
+                                      progress = lambda done, total, failed : calls.append((done, total, failed)))
+
+    for name in serial.columns:
+        assert np.array_equal(parallel[name], serial[name], equal_nan = True), name
+
+    assert list(parallel["error"]) == list(serial["error"])
+    assert calls[-1] == (6, 6, 0)
+
+def test_mesh_is_rebuilt_for_each_case(regen_engine):
+    mesh = regen_engine.discretise(30, spacing = "throat")
+    cases = [{"channel_height" : 1e-3}, {"channel_height" : 2e-3}]
+    result = bamboo.sweep.run_sweep(regen_engine, cases, analysis_kwargs = {"mesh" : mesh}, max_workers = 1, progress = False)
+
+    #Compare with meshes built by hand for each case, at the same stations
+    for i, case in enumerate(cases):
+        variant = copy.deepcopy(regen_engine)
+        bamboo.sweep.apply_parameters(variant, case)
+        expected = variant.steady_heating_analysis(mesh = variant.discretise(x = mesh.x), to_json = False)
+
+        assert result["p0_coolant_drop"][i] == pytest.approx(bamboo.sweep.p0_coolant_drop(expected))
+
+    assert result["p0_coolant_drop"][0] != result["p0_coolant_drop"][1]
+
+def test_mesh_must_span_the_engine(regen_engine):
+    mesh = regen_engine.discretise(30)
+    case = {"geometry.x_min" : regen_engine.geometry.x_min + 0.05}
+
+    with pytest.raises(ValueError):
+        bamboo.sweep.run_case(regen_engine, case, {"mesh" : mesh})
+
+    result = bamboo.sweep.run_sweep(regen_engine, [case], analysis_kwargs = {"mesh" : mesh}, max_workers = 1, progress = False)
+    assert result.errors[0].startswith("ValueError")
@@ -0,0 +1,55 @@
+"""
+Tests for the trajectory simulations in bamboo.trajectory, against each other and against the original bamboo.main.estimate_apogee().
+"""
+import numpy as np
+import pytest
+
+import bamboo.main
+import bamboo.trajectory
+from conftest import make_engine
+
+VEHICLE = {"dry_mass" : 60, "propellant_mass" : 50, "cross_sectional_area" : 0.03}
+
+@pytest.fixture(scope = "module")
+def engine():
+    return make_engine(cooling_jacket = False)
+
+@pytest.fixture(scope = "module")
+def trajectory(engine):
+    return bamboo.trajectory.simulate(engine = engine, **VEHICLE)
+
+def test_simulate(engine, trajectory):
+    assert trajectory.burn_time == pytest.approx(VEHICLE["propellant_mass"]/engine.chamber_conditions.mdot)
+    assert trajectory.apogee_time > trajectory.burn_time
+    assert trajectory.apogee == pytest.approx(np.amax(trajectory.altitude))
+    assert trajectory.velocity[-1] == pytest.approx(0, abs = 1e-6)
+    assert trajectory.burnout_altitude < trajectory.apogee
+    assert trajectory.burnout_velocity > 0
+
+def test_batch_matches_simulate(engine, trajectory):
+    batch = bamboo.trajectory.simulate_batch(engine = engine, **VEHICLE)
+
+    assert batch.apogee == pytest.approx(trajectory.apogee, rel = 1e-5)
+    assert batch.apogee_time == pytest.approx(trajectory.apogee_time, rel = 1e-4)
+    assert batch.burnout_altitude == pytest.approx(trajectory.burnout_altitude, rel = 1e-5)
+    assert batch.burnout_velocity == pytest.approx(trajectory.burnout_velocity, rel = 1e-5)
+    assert not batch.separated
+
+def test_batch_of_vehicles(engine):
+    dry_masses = np.array([[40, 60], [80, 100]])
+    batch = bamboo.trajectory.simulate_batch(engine = engine, dry_mass = dry_masses, propellant_mass = 50, cross_sectional_area = 0.03)
+
+    assert batch.apogee.shape == dry_masses.shape
+    assert len(batch) == dry_masses.size
+
+    for index in np.ndindex(dry_masses.shape):
+        single = bamboo.trajectory.simulate(engine = engine, dry_mass = dry_masses[index], propellant_mass = 50, cross_sectional_area = 0.03)
+        assert batch.apogee[index] == pytest.approx(single.apogee, rel = 1e-5)
+
+def test_estimate_apogee_converges_to_simulate(engine, trajectory):
+    coarse = bamboo.main.estimate_apogee(engine = engine, **VEHICLE)
+    fine = bamboo.main.estimate_apogee(engine = engine, dt = 0.02, **VEHICLE)
+
+    #estimate_apogee() uses fixed steps, so it gets closer to the adaptive result as the timestep shrinks
+    assert abs(fine - trajectory.apogee) < abs(coarse - trajectory.apogee)
+    assert fine == pytest.approx(trajectory.apogee, rel = 5e-3)
@@ -0,0 +1,88 @@
+"""
+Tests for the transient heating analysis.
+"""
+import numpy as np
+import pytest
+
+import bamboo.cooling as cool
+
+def run(engine, **kwargs):
+    settings = {"number_of_points" : 20, "dt" : 0.01, "t_max" : 10, "to_json" : False}
+    settings.update(kwargs)
+
+    return engine.transient_heating_analysis(**settings)
+
+@pytest.fixture
+def reference(ablative_engine):
+    #Explicit with a short timestep, well inside its stability limit
+    return run(ablative_engine, method = "explicit")
+
+@pytest.mark.parametrize("method", ["implicit", "crank-nicolson"])
+def test_implicit_methods_match_explicit(ablative_engine, reference, method):
+    result = run(ablative_engine, method = method)
+
+    assert np.array_equal(result["t"], reference["t"])
+    assert np.allclose(result["T_wall"], reference["T_wall"], rtol = 1e-3)
+    assert np.allclose(result["q_dot"], reference["q_dot"], rtol = 1e-2)
+
+def test_crank_nicolson_more_accurate_than_implicit(ablative_engine, reference):
+    implicit = run(ablative_engine, method = "implicit", dt = 0.5)
+    crank_nicolson = run(ablative_engine, method = "crank-nicolson", dt = 0.5)
+
+    #Compare at the last of the long timesteps
+    i = np.argmin(np.abs(reference["t"] - implicit["t"][-1]))
+    assert reference["t"][i] == pytest.approx(implicit["t"][-1])
+
+    implicit_error = np.amax(np.abs(implicit["T_wall"][-1] - reference["T_wall"][i]))
+    crank_nicolson_error = np.amax(np.abs(crank_nicolson["T_wall"][-1] - reference["T_wall"][i]))
+
+    assert crank_nicolson_error < implicit_error
+
+def test_starts_from_wall_starting_T(ablative_engine):
+    result = run(ablative_engine, method = "implicit", t_max = 1, wall_starting_T = 350)
+
+    assert np.all(result["T_wall"][0] == 350)
+    assert result["T_wall"].shape == (len(result["t"]), len(result["x"]))
+
+def test_invalid_method(ablative_engine):
+    with pytest.raises(ValueError):
+        run(ablative_engine, method = "runge-kutta")
+
+def test_adaptive_reaches_t_max(ablative_engine, reference):
+    result = run(ablative_engine, adaptive = True, tolerance = 0.05)
+    steps = np.diff(result["t"])
+
+    assert result["t"][-1] == pytest.approx(10)
+    assert np.all(steps > 0)
+    assert steps.max() > 5*steps.min()          #The timestep grows as the wall approaches steady state
+
+    #Compare with the reference at its last time, which is just before t_max
+    T_wall = np.array([np.interp(reference["t"][-1], result["t"], result["T_wall"][:, j]) for j in range(len(result["x"]))])
+    assert np.allclose(T_wall, reference["T_wall"][-1], atol = 5)
+
+def test_adaptive_needs_implicit_method(ablative_engine):
+    with pytest.raises(ValueError):
+        run(ablative_engine, adaptive = True, method = "explicit")
+
+def test_terminal_time_event(ablative_engine):
+    result = run(ablative_engine, dt = 0.05, events = [cool.time_event(3.33)])
+
+    assert result["t_events"][0] == [pytest.approx(3.33)]
+    assert 3.33 <= result["t"][-1] < 3.33 + 0.05
+
+def test_non_terminal_event(ablative_engine):
+    T_limit = 1000
+    result = run(ablative_engine, dt = 0.05, events = [cool.wall_temperature_event(T_limit, terminal = False)])
+
+    T_max = result["T_wall"].max(axis = 1)
+    i = np.argmax(T_max > T_limit)
+
+    assert len(result["t_events"][0]) == 1
+    assert result["t"][i - 1] <= result["t_events"][0][0] <= result["t"][i]
+    assert result["t"][-1] == pytest.approx(10 - 0.05)
+
+def test_steady_state_event(ablative_engine):
+    result = run(ablative_engine, dt = 0.05, t_max = 1000, events = [cool.steady_state_event(0.5)])
+
+    assert len(result["t_events"][0]) == 1
+    assert result["t"][-1] < 1000